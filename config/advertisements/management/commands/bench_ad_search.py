@@ -0,0 +1,86 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.test import APIRequestFactory
+
+from advertisements.models import Advertisement
+from advertisements.views import AdSearchView
+from buildings.models import Building, Unit, UnitSpecification
+from users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+QUERIES = [
+    {},
+    {"what_for": Advertisement.RENT, "ordering": "rent"},
+    {"what_for": Advertisement.SALE, "min_price": 2_000_000, "max_price": 3_000_000, "ordering": "-price"},
+    {"what_for": Advertisement.RENT, "bedroom": 2, "min_area": 60, "max_area": 90},
+    {"min_year": 1395, "floor": 3, "ordering": "area"},
+]
+
+
+class Command(BaseCommand):
+    help = "time the advertisement search endpoint over a synthetic dataset. nothing is kept in the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--pages", type=int, default=20, help="pages to walk for the deep page timing")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._generate(options["count"], options["batch_size"])
+                for params in QUERIES:
+                    self._run(params, options["pages"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _generate(self, count, batch_size):
+        start = time.perf_counter()
+        owner = User.objects.create_user(username="bench_ad_search_owner", role=User.MANAGER)
+        building = Building.objects.create(owner=owner, name="bench", unit_count=count)
+        for offset in range(0, count, batch_size):
+            size = min(batch_size, count - offset)
+            units = Unit.objects.bulk_create(
+                [Unit(building=building, unit_number=offset + n + 1) for n in range(size)])
+            specs = UnitSpecification.objects.bulk_create([
+                UnitSpecification(
+                    unit=unit, area=random.randint(40, 250), built_up_area=random.randint(50, 300),
+                    bedroom=random.randint(0, 4), floor=random.randint(0, 15),
+                    year_of_construction=random.randint(1370, 1402), features="parking,elevator")
+                for unit in units])
+            Advertisement.objects.bulk_create([self._ad(spec) for spec in specs])
+        self.stdout.write(f"generated {count} ads in {time.perf_counter() - start:.1f}s")
+
+    @staticmethod
+    def _ad(spec):
+        if random.random() < 0.5:
+            return Advertisement(unit_specification=spec, what_for=Advertisement.SALE,
+                                 price=random.randint(500_000, 10_000_000))
+        return Advertisement(unit_specification=spec, what_for=Advertisement.RENT,
+                             rent=random.randint(1_000, 50_000), mortgage=random.randint(10_000, 500_000))
+
+    def _run(self, params, pages):
+        factory = APIRequestFactory()
+        view = AdSearchView.as_view()
+        timings = []
+        cursor = None
+        for _ in range(pages):
+            query = dict(params, cursor=cursor) if cursor else params
+            start = time.perf_counter()
+            response = view(factory.get("/", query))
+            timings.append((time.perf_counter() - start) * 1000)
+            cursor = response.data.get("next_cursor")
+            if not cursor:
+                break
+        self.stdout.write(
+            f"{params or 'no filters'}: first page {timings[0]:.1f}ms, "
+            f"page {len(timings)} {timings[-1]:.1f}ms")
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0003_advertisement_exchangeable_advertisement_mortgage_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(fields=['what_for', 'price'], name='advertiseme_what_fo_b9c112_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(fields=['what_for', 'rent'], name='advertiseme_what_fo_250787_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(fields=['what_for', 'mortgage'], name='advertiseme_what_fo_82178b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(fields=['what_for'], name='advertiseme_what_fo_102d79_idx'),
+        ),
+    ]
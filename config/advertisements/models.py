@@ -17,3 +17,12 @@ class Advertisement(models.Model):
     rent = models.FloatField(null=True)
     exchangeable = models.BooleanField(null=True)
     date_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["what_for", "price"]),
+            models.Index(fields=["what_for", "rent"]),
+            models.Index(fields=["what_for", "mortgage"]),
+            # ids grow with date_created, so this one also serves the newest first ordering
+            models.Index(fields=["what_for"]),
+        ]
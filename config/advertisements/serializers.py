@@ -1,7 +1,10 @@
 from rest_framework import serializers
 
 from advertisements.models import Advertisement
-from buildings.models import Unit
+from buildings.models import Unit, UnitSpecification
+from buildings.serializers import UnitFilterSerializer
+
+from utils.advertisements import SEARCH_ORDERINGS
 
 
 class AdOutSerializer(serializers.ModelSerializer):
@@ -37,3 +40,35 @@ class AdInSerializer(serializers.ModelSerializer):
             if not data.get("price"):
                 raise serializers.ValidationError(detail="price amount is necessary")
         return data
+
+
+class AdFilterSerializer(UnitFilterSerializer):
+    what_for = serializers.ChoiceField(choices=Advertisement.choices, required=False)
+
+
+class AdSearchSerializer(AdFilterSerializer):
+    min_price = serializers.FloatField(required=False)
+    max_price = serializers.FloatField(required=False)
+    min_rent = serializers.FloatField(required=False)
+    max_rent = serializers.FloatField(required=False)
+    min_mortgage = serializers.FloatField(required=False)
+    max_mortgage = serializers.FloatField(required=False)
+    ordering = serializers.ChoiceField(choices=list(SEARCH_ORDERINGS), required=False)
+
+
+class _AdUnitSpecificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UnitSpecification
+        fields = ["unit", "area", "built_up_area", "bedroom", "floor", "year_of_construction", "features",
+                  "description"]
+
+
+class AdSearchResultSerializer(serializers.ModelSerializer):
+    """
+    only reads the advertisement and its unit specification, so one join is enough
+    """
+    unit_specification = _AdUnitSpecificationSerializer()
+
+    class Meta:
+        model = Advertisement
+        fields = "__all__"
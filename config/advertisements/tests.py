@@ -1,3 +1,47 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from users.models import User
+from buildings.models import Building, Unit, UnitSpecification
+from advertisements.models import Advertisement
+
+
+class AdSearchTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("ad_search")
+        manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        building = Building.objects.create(owner=manager, name="testBuilding", unit_count=4)
+        for n, (bedroom, area, price) in enumerate([(1, 50, 300), (2, 70, 100), (2, 90, 200), (3, 120, None)]):
+            unit = Unit.objects.create(building=building, unit_number=n + 1)
+            spec = UnitSpecification.objects.create(
+                unit=unit, area=area, built_up_area=area, bedroom=bedroom, floor=n, year_of_construction=1400)
+            if price:
+                Advertisement.objects.create(unit_specification=spec, what_for=Advertisement.SALE, price=price)
+            else:
+                Advertisement.objects.create(unit_specification=spec, what_for=Advertisement.RENT, rent=10)
+
+    def _prices(self, response):
+        return [ad["price"] for ad in response.json()["instances"]]
+
+    def test_filter_and_sort(self):
+        response = self.client.get(self.url, {"what_for": Advertisement.SALE, "bedroom": 2, "ordering": "-price"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._prices(response), [200, 100])
+        self.assertEqual(response.json()["instances"][0]["unit_specification"]["area"], 90)
+
+    def test_sorting_pages_through_results(self):
+        response = self.client.get(self.url, {"ordering": "price", "limit": 2})
+        self.assertEqual(self._prices(response), [100, 200])
+        response = self.client.get(self.url, {"ordering": "price", "cursor": response.json()["next_cursor"]})
+        self.assertEqual(self._prices(response), [300])
+        self.assertIsNone(response.json()["next_cursor"])
+
+    def test_invalid_ordering(self):
+        response = self.client.get(self.url, {"ordering": "unit_specification__unit__building__owner__password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -4,5 +4,7 @@ from . import views
 
 urlpatterns = [
     path("", views.AdvertisementView.as_view(), name="advertisements"),
-    path("<int:pk>/", views.DestroyAddView.as_view(), name="delete_ad")
+    path("<int:pk>/", views.DestroyAddView.as_view(), name="delete_ad"),
+    path("search/", views.AdSearchView.as_view(), name="ad_search"),
+    path("features/", views.AdFeatureFacetsView.as_view(), name="ad_feature_facets"),
 ]
@@ -16,6 +16,9 @@ from . import serializers as cs
 
 from buildings.models import Unit
 
+from utils.buildings import filter_unit_specifications, feature_facets
+from utils.advertisements import search_advertisements, get_search_ordering
+
 
 """
 1.The AdvertisementView class is defined as a subclass of APIView.
@@ -44,7 +47,8 @@ class AdvertisementView(APIView):
 
     def get(self, request):
         ads = Advertisement.objects.all()
-        return response(status.HTTP_200_OK, instance=ads, serializer=cs.AdOutSerializer, many=True)
+        return response(status.HTTP_200_OK, instance=ads, serializer=cs.AdOutSerializer, many=True,
+                        request=request, ordering=("-pk",))
 
     def post(self, request):
         has_permission(request, filters.IS_MANAGER, raise_exception=True)
@@ -81,3 +85,34 @@ class DestroyAddView(APIView):
             request, obj=ad.unit_specification.unit.building.owner, raise_exception=True)
         ad.delete()
         return response(status.HTTP_204_NO_CONTENT)
+
+
+
+class AdSearchView(APIView):
+    """
+    filter and sort advertisements. results are paged with the cursor returned in next_cursor
+    """
+
+    def get(self, request):
+        serializer = cs.AdSearchSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        ads = search_advertisements(serializer.validated_data)
+        return response(status.HTTP_200_OK, instance=ads, serializer=cs.AdSearchResultSerializer, many=True,
+                        request=request, ordering=get_search_ordering(serializer.validated_data))
+
+
+class AdFeatureFacetsView(APIView):
+    """
+    number of advertisements per feature, filtered by the query params
+    """
+
+    def get(self, request):
+        serializer = cs.AdFilterSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        data = serializer.validated_data
+        ads = filter_unit_specifications(Advertisement.objects.all(), data, prefix="unit_specification__")
+        if what_for := data.get("what_for"):
+            ads = ads.filter(what_for=what_for)
+        return response(status.HTTP_200_OK, facets=feature_facets(ads, path="unit_specifications__advertisement"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from utils.announcements import archive_expired_batch
+
+
+class Command(BaseCommand):
+    help = "move expired announcements and their read state into the archive table in bounded batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--max-batches", type=int, default=None, help="stop after this many batches")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        archived = batches = 0
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            count = archive_expired_batch(options["batch_size"], now=now)
+            if not count:
+                break
+            archived += count
+            batches += 1
+        self.stdout.write(f"archived {archived} announcements in {batches} batches")
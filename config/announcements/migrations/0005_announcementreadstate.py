@@ -0,0 +1,66 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def convert_seen_by(apps, schema_editor):
+    """
+    turn the seen_by rows into one read state per user and building
+    """
+    Announcement = apps.get_model("announcements", "Announcement")
+    AnnouncementReadState = apps.get_model("announcements", "AnnouncementReadState")
+    SeenBy = Announcement.seen_by.through
+
+    building_ids = dict()
+    for pk, building_id in Announcement.objects.values_list("pk", "building_id").order_by("pk").iterator():
+        building_ids.setdefault(building_id, []).append(pk)
+
+    seen = dict()
+    rows = SeenBy.objects.values_list("user_id", "announcement__building_id", "announcement_id")
+    for user_id, building_id, announcement_id in rows.iterator():
+        seen.setdefault((user_id, building_id), set()).add(announcement_id)
+
+    states = []
+    for (user_id, building_id), seen_ids in seen.items():
+        last_seen_id = 0
+        for pk in building_ids[building_id]:
+            if pk not in seen_ids:
+                break
+            last_seen_id = pk
+        states.append(AnnouncementReadState(
+            user_id=user_id, building_id=building_id, last_seen_id=last_seen_id,
+            seen_ids=sorted(pk for pk in seen_ids if pk > last_seen_id)))
+    AnnouncementReadState.objects.bulk_create(states, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0010_unitspecification_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('announcements', '0004_alter_announcement_seen_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnnouncementReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_seen_id', models.BigIntegerField(default=0)),
+                ('seen_ids', models.JSONField(default=list)),
+                ('building', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='buildings.building')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='announcement_states', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='announcementreadstate',
+            constraint=models.UniqueConstraint(fields=('user', 'building'), name='unique_announcement_read_state'),
+        ),
+        migrations.RunPython(convert_seen_by, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='announcement',
+            name='seen_by',
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('buildings', '0010_unitspecification_search_indexes'),
+        ('announcements', '0005_announcementreadstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAnnouncement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('title', models.CharField(max_length=80)),
+                ('description', models.TextField()),
+                ('pub_data', models.DateTimeField()),
+                ('expire_date', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('read_by', models.JSONField(default=list)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['building', 'expire_date', 'pub_data'], name='announcemen_buildin_45ef4e_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedannouncement',
+            name='building',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_announcements', to='buildings.building'),
+        ),
+        migrations.AddField(
+            model_name='archivedannouncement',
+            name='poster',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('announcements', '0006_archivedannouncement'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['poster', 'pub_data'], name='announcemen_poster__3d7d8d_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.3 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('announcements', '0007_announcement_poster_pub_data_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['expire_date', 'id'], name='announcemen_expire__e4d008_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.3 on 2026-10-18 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('announcements', '0008_announcement_expire_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['building', 'id'], name='announcemen_buildin_e6307e_idx'),
+        ),
+    ]
@@ -9,7 +9,16 @@ class AnnouncementManager(models.Manager):
     def last_days_announcements(self, user, days):
         now = timezone.now()
         past_days = now - timezone.timedelta(days=days)
-        self.filter(poster=user, pub_date__range=[past_days, now]).count()
+        return self.posted_between(user, past_days, now)
+
+    def posted_between(self, user, start, end):
+        return self.filter(poster=user, pub_data__gte=start, pub_data__lt=end).count()
+
+    def live(self):
+        """
+        announcements that are not expired yet
+        """
+        return self.filter(models.Q(expire_date__isnull=True) | models.Q(expire_date__gt=timezone.now()))
 
 
 class Announcement(models.Model):
@@ -19,8 +28,47 @@ class Announcement(models.Model):
     description = models.TextField()
     pub_data = models.DateTimeField(auto_now_add=True)
     expire_date = models.DateTimeField(null=True, blank=True)
-    seen_by = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="seen_announcements")
 
     objects = AnnouncementManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["building", "expire_date", "pub_data"]),
+            models.Index(fields=["poster", "pub_data"]),
+            # archive_expired_batch walks the expired ones in this order
+            models.Index(fields=["expire_date", "id"]),
+            # unread counts range over the ids above the read position of a user
+            models.Index(fields=["building", "id"]),
+        ]
+
+
+class ArchivedAnnouncement(models.Model):
+    """
+    expired announcements moved out of the hot table by the archive_announcements command.
+    read_by keeps the ids of the users that had read it
+    """
+    original_id = models.BigIntegerField(unique=True)
+    building = models.ForeignKey(Building, on_delete=models.CASCADE, related_name="archived_announcements")
+    poster = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    title = models.CharField(max_length=80)
+    description = models.TextField()
+    pub_data = models.DateTimeField()
+    expire_date = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    read_by = models.JSONField(default=list)
+
+
+class AnnouncementReadState(models.Model):
+    """
+    what a user read from a building announcements: every announcement with an id up to last_seen_id,
+    plus the ones in seen_ids that were read out of order. utils.announcements.mark_read keeps it compact
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="announcement_states")
+    building = models.ForeignKey(Building, on_delete=models.CASCADE)
+    last_seen_id = models.BigIntegerField(default=0)
+    seen_ids = models.JSONField(default=list)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "building"], name="unique_announcement_read_state")]
+
 
@@ -1,13 +1,16 @@
 from rest_framework import serializers
 
-from .models import Announcement
+from .models import Announcement, ArchivedAnnouncement
 
 
 class AnnouncementSerializer(serializers.ModelSerializer):
     class Meta:
         model = Announcement
         fields = "__all__"
-        read_only_fields = ["building", "poster", "pub_data", "seen_by"]
-
+        read_only_fields = ["building", "poster", "pub_data"]
 
 
+class ArchivedAnnouncementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedAnnouncement
+        exclude = ["read_by"]
@@ -1,3 +1,156 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
 
-# Create your tests here.
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.exceptions import Throttled
+
+from users.models import User
+from buildings.models import Building, Unit
+from announcements.models import Announcement, AnnouncementReadState, ArchivedAnnouncement
+from utils.announcements import mark_read, unread_count, archive_expired_batch
+from utils import quota
+
+
+class AnnouncementReadStateTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=1)
+        Unit.objects.create(building=cls.building, unit_number=1, resident=cls.resident)
+        cls.announcements = [
+            Announcement.objects.create(building=cls.building, poster=cls.manager, title=f"title {n}", description="")
+            for n in range(4)
+        ]
+
+    def _state(self):
+        return AnnouncementReadState.objects.get(user=self.resident, building=self.building)
+
+    def test_out_of_order_reads_are_compacted(self):
+        first, second, third, fourth = self.announcements
+        mark_read(self.resident, third)
+        mark_read(self.resident, second)
+        self.assertEqual((self._state().last_seen_id, self._state().seen_ids), (0, [second.pk, third.pk]))
+        self.assertEqual(unread_count(self.resident, self.building), 2)
+        mark_read(self.resident, first)
+        self.assertEqual((self._state().last_seen_id, self._state().seen_ids), (third.pk, []))
+        self.assertEqual(unread_count(self.resident, self.building), 1)
+
+    def test_repeat_read_does_not_write(self):
+        mark_read(self.resident, self.announcements[0])
+        with self.assertNumQueries(1):
+            mark_read(self.resident, self.announcements[0])
+
+    def test_unread_endpoint(self):
+        self.client.force_authenticate(user=self.resident)
+        url = reverse("unread_announcements", kwargs={"pk": self.building.pk})
+        self.assertEqual(self.client.get(url).json()["unread"], 4)
+        response = self.client.get(reverse("announcement", kwargs={"pk": self.announcements[0].pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).json()["unread"], 3)
+
+    def test_unread_endpoint_is_for_members(self):
+        url = reverse("unread_announcements", kwargs={"pk": self.building.pk})
+        self.client.force_authenticate(user=self.manager)
+        self.assertEqual(self.client.get(url).json()["unread"], 4)
+        stranger = User.objects.create_user(username="testStranger", role=User.RESIDENT)
+        self.client.force_authenticate(user=stranger)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AnnouncementArchiveTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=1)
+        yesterday = timezone.now() - timezone.timedelta(days=1)
+        tomorrow = timezone.now() + timezone.timedelta(days=1)
+        cls.expired = [
+            Announcement.objects.create(
+                building=cls.building, poster=cls.manager, title=f"expired {n}", description="", expire_date=yesterday)
+            for n in range(3)
+        ]
+        cls.live = Announcement.objects.create(
+            building=cls.building, poster=cls.manager, title="live", description="", expire_date=tomorrow)
+        Announcement.objects.create(building=cls.building, poster=cls.manager, title="no expiry", description="")
+
+    def test_listing_skips_expired(self):
+        self.client.force_authenticate(user=self.resident)
+        response = self.client.get(reverse("building_announcements", kwargs={"pk": self.building.pk}))
+        self.assertEqual([a["title"] for a in response.json()["instances"]], ["no expiry", "live"])
+        self.assertEqual(unread_count(self.resident, self.building), 2)
+
+    def test_archive_in_batches(self):
+        mark_read(self.resident, self.expired[1])
+        mark_read(self.resident, self.live)
+        self.assertEqual(archive_expired_batch(2), 2)
+        self.assertEqual(archive_expired_batch(2), 1)
+        self.assertEqual(archive_expired_batch(2), 0)
+
+        self.assertFalse(Announcement.objects.filter(pk__in=[a.pk for a in self.expired]).exists())
+        archived = ArchivedAnnouncement.objects.get(original_id=self.expired[1].pk)
+        self.assertEqual(archived.read_by, [self.resident.pk])
+        state = AnnouncementReadState.objects.get(user=self.resident, building=self.building)
+        self.assertEqual(state.seen_ids, [self.live.pk])
+
+        self.client.force_authenticate(user=self.resident)
+        response = self.client.get(reverse("archived_announcements", kwargs={"pk": self.building.pk}))
+        self.assertEqual(len(response.json()["instances"]), 3)
+
+
+@override_settings(QUOTAS={quota.ANNOUNCEMENTS: {"limit": 5, "window": 3600}})
+class AnnouncementQuotaTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=1)
+        cls.users = User.objects.bulk_create([User(username=f"poster_{n}") for n in range(25)])
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_burst_from_many_users(self):
+        now = 3600 * 1000 + 1800
+        accepted = {user.pk: 0 for user in self.users}
+        for _ in range(8):
+            for user in self.users:
+                try:
+                    quota.consume(quota.ANNOUNCEMENTS, user, now=now)
+                    accepted[user.pk] += 1
+                except Throttled:
+                    pass
+        self.assertEqual(set(accepted.values()), {5})
+
+    def test_previous_window_is_weighted(self):
+        user = self.users[0]
+        start = 3600 * 1000
+        for _ in range(4):
+            quota.consume(quota.ANNOUNCEMENTS, user, now=start + 3000)
+        # three quarters into the next window a quarter of the previous 4 posts still counts
+        for _ in range(4):
+            quota.consume(quota.ANNOUNCEMENTS, user, now=start + 3600 + 2700)
+        with self.assertRaises(Throttled):
+            quota.consume(quota.ANNOUNCEMENTS, user, now=start + 3600 + 2700)
+
+    def test_endpoint_falls_back_to_database_on_cold_cache(self):
+        for n in range(5):
+            Announcement.objects.create(building=self.building, poster=self.manager, title=f"{n}", description="")
+        self.client.force_authenticate(user=self.manager)
+        url = reverse("building_announcements", kwargs={"pk": self.building.pk})
+        # the building, then both windows counted from the database
+        with self.assertNumQueries(3):
+            response = self.client.post(url, {"title": "one too many", "description": "burst"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        with self.assertNumQueries(1):
+            response = self.client.post(url, {"title": "one too many", "description": "burst"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -2,5 +2,7 @@ from django.urls import path
 from . import views
 urlpatterns = [
     path("building/<int:pk>/", views.AnnouncementsView.as_view(), name="building_announcements"),
+    path("building/<int:pk>/archive/", views.ArchivedAnnouncementsView.as_view(), name="archived_announcements"),
+    path("building/<int:pk>/unread/", views.UnreadAnnouncementsView.as_view(), name="unread_announcements"),
     path("<int:pk>/", views.RetrieveDestroyAnnouncementsView.as_view(), name="announcement")
 ]
\ No newline at end of file
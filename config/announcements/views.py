@@ -7,9 +7,11 @@ from django.shortcuts import get_object_or_404
 
 from buildings.models import Building
 
-from .models import Announcement
+from .models import Announcement, ArchivedAnnouncement
 from . import serializers as cs
 from utils.general import response
+from utils.announcements import mark_read, unread_count
+from utils import quota
 
 from permissions.permissions import has_obj_permission, has_permission
 from permissions import filters
@@ -22,30 +24,32 @@ This is a Django REST framework API view for managing announcements related to a
 
 permission_classes is set to [IsAuthenticated], which means that only authenticated users can access this view.
 
-The get method takes a pk parameter representing the primary key of the building and returns a list of announcements associated with that building. The list is serialized using cs.AnnouncementSerializer.
+The get method takes a pk parameter representing the primary key of the building and returns a list of the not expired announcements associated with that building. The list is serialized using cs.AnnouncementSerializer.
 
-The post method also takes a pk parameter representing the primary key of the building. It creates a new announcement associated with that building using cs.AnnouncementSerializer. If the serializer data is not valid, it returns a 400 Bad Request response with the validation errors. Otherwise, it creates the announcement with the building and poster fields set to the specified building and the current user, respectively. It also adds the current user to the seen_by field of the announcement. The created announcement is serialized using cs.AnnouncementSerializer and returned with a 201 Created response.
+The post method also takes a pk parameter representing the primary key of the building. It creates a new announcement associated with that building using cs.AnnouncementSerializer. If the serializer data is not valid, it returns a 400 Bad Request response with the validation errors. Otherwise, it creates the announcement with the building and poster fields set to the specified building and the current user, respectively. It also marks the announcement as read for the current user. The created announcement is serialized using cs.AnnouncementSerializer and returned with a 201 Created response.
 """
 class AnnouncementsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
         building = get_object_or_404(Building, pk=pk)
-        announcements = Announcement.objects.filter(building=building)
-        return response(status.HTTP_200_OK, instance=announcements, serializer=cs.AnnouncementSerializer, many=True)
+        announcements = Announcement.objects.live().filter(building=building)
+        return response(status.HTTP_200_OK, instance=announcements, serializer=cs.AnnouncementSerializer, many=True,
+                        request=request, ordering=("-pk",))
 
     def post(self, request, pk):
         building = get_object_or_404(Building, pk=pk)
         serializer = cs.AnnouncementSerializer(data=request.data)
         if not serializer.is_valid():
             return response(status.HTTP_200_OK, errors=serializer.errors)
-        announcement = Announcement.objects.create(**serializer.data, building=building, poster=request.user)
-        announcement.seen_by.add(request.user)
+        with quota.reserve(quota.ANNOUNCEMENTS, request.user):
+            announcement = Announcement.objects.create(**serializer.data, building=building, poster=request.user)
+        mark_read(request.user, announcement)
         return response(status.HTTP_201_CREATED, instance=announcement, serializer=cs.AnnouncementSerializer)
 
 
 """
-In the get method, the announcement is retrieved using the given pk and the user who retrieved it is added to the list of seen_by. The AnnouncementSerializer is used to serialize the announcement instance and returned as the response.
+In the get method, the announcement is retrieved using the given pk and it is marked as read for the user who retrieved it (repeat reads don't write anything). The AnnouncementSerializer is used to serialize the announcement instance and returned as the response.
 
 In the delete method, the announcement is retrieved using the given pk. If the user who is requesting the deletion has the appropriate permission (i.e. either the poster of the announcement or a manager), the announcement is deleted and a 204 NO CONTENT response is returned. If the user does not have the appropriate permission, a PermissionDenied exception is raised.
 """
@@ -54,7 +58,7 @@ class RetrieveDestroyAnnouncementsView(APIView):
 
     def get(self, request, pk):
         announcement = get_object_or_404(Announcement, pk=pk)
-        announcement.seen_by.add(request.user)
+        mark_read(request.user, announcement)
         return response(status.HTTP_200_OK, instance=announcement, serializer=cs.AnnouncementSerializer)
 
     def delete(self, request, pk):
@@ -63,3 +67,30 @@ class RetrieveDestroyAnnouncementsView(APIView):
             announcement.delete()
             return response(status.HTTP_204_NO_CONTENT)
         raise PermissionDenied
+
+
+class UnreadAnnouncementsView(APIView):
+    """
+    unread count of a building for its owner or one of its residents
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        building = get_object_or_404(Building, pk=pk)
+        if not (has_obj_permission(request, obj=building.owner)
+                or building.units.filter(resident=request.user).exists()):
+            raise PermissionDenied
+        return response(status.HTTP_200_OK, unread=unread_count(request.user, building))
+
+
+class ArchivedAnnouncementsView(APIView):
+    """
+    expired announcements of a building moved to the archive by the archive_announcements command
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        building = get_object_or_404(Building, pk=pk)
+        announcements = ArchivedAnnouncement.objects.filter(building=building)
+        return response(status.HTTP_200_OK, instance=announcements, serializer=cs.ArchivedAnnouncementSerializer,
+                        many=True, request=request, ordering=("-pk",))
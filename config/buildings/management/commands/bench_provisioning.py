@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.models import User
+from utils.buildings import create_building
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "measure the per-unit cost of provisioning a building. nothing is kept in the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[50, 500, 5000])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'units':>8} {'total (s)':>12} {'per unit (ms)':>15}")
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    owner = User.objects.create_user(username="bench_provisioning_owner", role=User.MANAGER)
+                    start = time.perf_counter()
+                    create_building(owner, name="bench", unit_count=size)
+                    elapsed = time.perf_counter() - start
+                    raise _Rollback
+            except _Rollback:
+                pass
+            self.stdout.write(f"{size:>8} {elapsed:>12.2f} {elapsed / size * 1000:>15.2f}")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from buildings.models import Building
+from utils.buildings import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "recalculate the occupancy counters of buildings from their units and fix the drifted ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="only report drifted counters")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                Building.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+            drifted_buildings = rebuild_counters(Building.objects.filter(pk__in=pks), fix=not options["verify"])
+            for building, stored, counter in drifted_buildings:
+                drifted += 1
+                self.stdout.write(f"building {building.pk}: (occupied, vacant, members) {stored} -> {counter}")
+            checked += len(pks)
+        action = "found" if options["verify"] else "fixed"
+        self.stdout.write(f"checked {checked} buildings, {action} {drifted} drifted")
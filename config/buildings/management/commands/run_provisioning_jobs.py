@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.buildings import claim_provisioning_job, run_provisioning_job, purge_credentials
+
+
+class Command(BaseCommand):
+    help = "worker process that creates the units and residents of background building jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="exit when there are no jobs left")
+        parser.add_argument("--interval", type=float, default=2, help="seconds to sleep when there is no job")
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_provisioning_job()
+            if job is None:
+                if purged := purge_credentials():
+                    self.stdout.write(f"deleted {purged} undelivered credential chunks")
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+            self.stdout.write(f"job {job.pk}: building {job.building_id} from unit {job.units_done + 1}")
+            try:
+                run_provisioning_job(job)
+            except Exception as e:
+                self.stderr.write(f"job {job.pk} failed: {e}")
+                continue
+            self.stdout.write(f"job {job.pk}: done, {job.units_done} units")
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0005_alter_unitspecification_features'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProvisioningJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'pending'), ('RUNNING', 'running'), ('DONE', 'done'), ('FAILED', 'failed')], default='PENDING', max_length=7)),
+                ('chunk_size', models.IntegerField(default=100)),
+                ('units_done', models.IntegerField(default=0)),
+                ('residents_info', models.JSONField(default=list)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('building', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='provisioning_jobs', to='buildings.building')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='provisioningjob',
+            index=models.Index(fields=['status', 'updated_at'], name='buildings_p_status_e5d390_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0006_provisioningjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['building', 'unit_number'], name='buildings_u_buildin_29e163_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:09
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def fill_counters(apps, schema_editor):
+    Building = apps.get_model("buildings", "Building")
+    Unit = apps.get_model("buildings", "Unit")
+    counters = Unit.objects.values("building").annotate(
+        units=Count("id"),
+        occupied=Count("resident"),
+        members=Sum("members", filter=Q(resident__isnull=False)),
+    )
+    buildings = []
+    for counter in counters:
+        buildings.append(Building(
+            pk=counter["building"],
+            occupied_units=counter["occupied"],
+            vacant_units=counter["units"] - counter["occupied"],
+            total_members=counter["members"] or 0,
+        ))
+    Building.objects.bulk_update(buildings, ["occupied_units", "vacant_units", "total_members"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0007_unit_building_unit_number_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='building',
+            name='occupied_units',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='total_members',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='vacant_units',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+def parse_features(text):
+    return sorted({name.strip().lower()[:50] for name in (text or "").split(",") if name.strip()})
+
+
+def backfill_tags(apps, schema_editor):
+    Feature = apps.get_model("buildings", "Feature")
+    UnitSpecification = apps.get_model("buildings", "UnitSpecification")
+    Tag = UnitSpecification.tags.through
+
+    specs = UnitSpecification.objects.exclude(features__isnull=True).values_list("pk", "features")
+    parsed = [(pk, parse_features(features)) for pk, features in specs.iterator(chunk_size=1000)]
+    names = {name for _, spec_features in parsed for name in spec_features}
+    Feature.objects.bulk_create([Feature(name=name) for name in names], ignore_conflicts=True)
+    feature_ids = dict(Feature.objects.values_list("name", "pk"))
+    Tag.objects.bulk_create(
+        [Tag(unitspecification_id=pk, feature_id=feature_ids[name]) for pk, spec_features in parsed
+         for name in spec_features],
+        batch_size=1000, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0008_building_occupancy_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Feature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='unitspecification',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='unit_specifications', to='buildings.feature'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0009_feature_tags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='unitspecification',
+            index=models.Index(fields=['bedroom', 'area'], name='buildings_u_bedroom_71350a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unitspecification',
+            index=models.Index(fields=['floor'], name='buildings_u_floor_85fb75_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unitspecification',
+            index=models.Index(fields=['year_of_construction'], name='buildings_u_year_of_936733_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.1.3 on 2026-10-18 19:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def move_credentials(apps, schema_editor):
+    """
+    the credentials of the jobs that were not delivered yet become one chunk starting at the first unit
+    """
+    ProvisioningJob = apps.get_model("buildings", "ProvisioningJob")
+    ProvisioningCredentials = apps.get_model("buildings", "ProvisioningCredentials")
+    jobs = ProvisioningJob.objects.values_list("pk", "residents_info")
+    ProvisioningCredentials.objects.bulk_create([
+        ProvisioningCredentials(job_id=pk, first_unit=residents_info[0]["unit"], residents_info=residents_info)
+        for pk, residents_info in jobs.iterator() if residents_info
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0010_unitspecification_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='provisioningjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ProvisioningCredentials',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_unit', models.IntegerField()),
+                ('residents_info', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credentials', to='buildings.provisioningjob')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='provisioningcredentials',
+            constraint=models.UniqueConstraint(fields=('job', 'first_unit'), name='unique_job_chunk'),
+        ),
+        migrations.RunPython(move_credentials, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='provisioningjob',
+            name='residents_info',
+        ),
+    ]
@@ -10,6 +10,10 @@ class Building(models.Model):
     name = models.CharField(max_length=50)
     unit_count = models.IntegerField()
     address = models.TextField(null=True, blank=True)
+    # maintained by utils.buildings.update_counters, rebuild with the rebuild_building_counters command
+    occupied_units = models.IntegerField(default=0)
+    vacant_units = models.IntegerField(default=0)
+    total_members = models.IntegerField(default=0)
 
 
 class Unit(models.Model):
@@ -21,6 +25,19 @@ class Unit(models.Model):
     members = models.IntegerField(default=1)
     unit_number = models.IntegerField()
 
+    class Meta:
+        indexes = [models.Index(fields=["building", "unit_number"])]
+
+
+class Feature(models.Model):
+    """
+    a unit feature like parking or elevator. names are stored lower-cased
+    """
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
 
 class UnitSpecification(models.Model):
     unit = models.OneToOneField(Unit, on_delete=models.CASCADE)
@@ -30,4 +47,60 @@ class UnitSpecification(models.Model):
     floor = models.IntegerField()
     year_of_construction = models.IntegerField()
     features = models.TextField(help_text="in a comma-seperated format", null=True)
+    # indexed copy of features, kept in sync by utils.buildings.set_features
+    tags = models.ManyToManyField(Feature, related_name="unit_specifications", blank=True)
     description = models.TextField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["bedroom", "area"]),
+            models.Index(fields=["floor"]),
+            models.Index(fields=["year_of_construction"]),
+        ]
+
+
+class ProvisioningJob(models.Model):
+    """
+    creates the units and residents of a big building in the background. progress is committed chunk by chunk
+    together with the generated credentials, so a crashed or failed job resumes from the last committed chunk
+    """
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    status_choices = (
+        (PENDING, "pending"),
+        (RUNNING, "running"),
+        (DONE, "done"),
+        (FAILED, "failed")
+    )
+    building = models.ForeignKey(Building, on_delete=models.CASCADE, related_name="provisioning_jobs")
+    status = models.CharField(max_length=7, choices=status_choices, default=PENDING)
+    chunk_size = models.IntegerField(default=100)
+    units_done = models.IntegerField(default=0)
+    # times a worker claimed the job, failed jobs are retried until MAX_JOB_ATTEMPTS
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "updated_at"])]
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+
+class ProvisioningCredentials(models.Model):
+    """
+    the generated usernames and plaintext passwords of one chunk of a provisioning job. deleted once they are
+    delivered to the manager, or after CREDENTIALS_TTL if they never are
+    """
+    job = models.ForeignKey(ProvisioningJob, on_delete=models.CASCADE, related_name="credentials")
+    first_unit = models.IntegerField()
+    residents_info = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["job", "first_unit"], name="unique_job_chunk")]
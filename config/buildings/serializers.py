@@ -1,4 +1,4 @@
-from .models import Building, Unit, UnitSpecification
+from .models import Building, Unit, UnitSpecification, ProvisioningJob
 
 from users.models import User
 
@@ -21,9 +21,19 @@ class BuildingBaseSerializer(serializers.Serializer):
 
 
 class CreateBuildingSerializer(BuildingBaseSerializer):
+    MAX_UNITS = 50
+    MAX_BACKGROUND_UNITS = 5000
+
     name = serializers.CharField(max_length=20)
 
-    unit_count = serializers.IntegerField(max_value=50)
+    unit_count = serializers.IntegerField(min_value=0, max_value=MAX_BACKGROUND_UNITS)
+    background = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, data):
+        if not data.get("background") and data["unit_count"] > self.MAX_UNITS:
+            raise serializers.ValidationError(
+                detail=f"buildings with more than {self.MAX_UNITS} units must be created in background")
+        return data
 
 
 class UpdateBuildingSerializer(BuildingBaseSerializer):
@@ -49,8 +59,28 @@ class ResidentSerializer(serializers.ModelSerializer):
 
 
 class UnitSpecificationSerializer(serializers.ModelSerializer):
+    tags = serializers.SlugRelatedField(slug_field="name", many=True, read_only=True)
 
     class Meta:
         model = UnitSpecification
         fields = "__all__"
 
+
+
+class ProvisioningJobSerializer(serializers.ModelSerializer):
+    unit_count = serializers.IntegerField(source="building.unit_count")
+
+    class Meta:
+        model = ProvisioningJob
+        exclude = ["chunk_size"]
+
+
+class UnitFilterSerializer(BuildingBaseSerializer):
+    building = serializers.IntegerField(required=False)
+    bedroom = serializers.IntegerField(required=False)
+    floor = serializers.IntegerField(required=False)
+    min_area = serializers.FloatField(required=False)
+    max_area = serializers.FloatField(required=False)
+    min_year = serializers.IntegerField(required=False)
+    max_year = serializers.IntegerField(required=False)
+    features = serializers.CharField(required=False, help_text="in a comma-seperated format")
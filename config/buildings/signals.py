@@ -0,0 +1,14 @@
+"""
+keep the occupancy counters of the buildings right when residents are deleted outside remove_resident
+"""
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from users.models import User
+from utils.buildings import vacate_units
+
+
+@receiver(pre_delete, sender=User)
+def vacate_resident_units(sender, instance, **kwargs):
+    # sent inside the transaction of the delete, before unit.resident is set to null
+    vacate_units(instance)
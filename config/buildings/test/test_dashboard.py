@@ -0,0 +1,92 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from users.models import User
+from buildings.models import Building, Unit
+from announcements.models import Announcement
+from financials.models import Bill
+from tickets.models import Ticket
+from utils.buildings import rebuild_counters
+from utils.dashboard import LATEST_ANNOUNCEMENTS
+
+
+class ManagerDashboardTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("manager_dashboard")
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.other_manager = User.objects.create_user(username="otherManager", role=User.MANAGER)
+        Building.objects.create(owner=cls.other_manager, name="otherBuilding", unit_count=1)
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def _create_building(self, n, units=3):
+        building = Building.objects.create(owner=self.manager, name=f"testBuilding{n}", unit_count=units)
+        residents = User.objects.bulk_create(
+            [User(username=f"resident_{n}_{i}", role=User.RESIDENT) for i in range(units - 1)])
+        units = Unit.objects.bulk_create(
+            [Unit(building=building, unit_number=i + 1, resident=residents[i] if i < len(residents) else None)
+             for i in range(units)])
+        rebuild_counters(Building.objects.filter(pk=building.pk))
+        now = timezone.now()
+        Bill.objects.bulk_create([
+            Bill(amount=10, created_by=self.manager, unit=units[0], expire_date=now - timezone.timedelta(days=1),
+                 description="overdue"),
+            Bill(amount=20, created_by=self.manager, unit=units[1], expire_date=now + timezone.timedelta(days=1),
+                 description="due"),
+            Bill(amount=40, created_by=self.manager, unit=units[1], expire_date=now, description="paid",
+                 is_paid=True),
+        ])
+        Ticket.objects.bulk_create([
+            Ticket(building=building, from_user=residents[0], to_user=self.manager, title="t", message="m", seen=seen)
+            for seen in (True, False, False)
+        ])
+        Announcement.objects.bulk_create([
+            Announcement(building=building, poster=self.manager, title=f"announcement {i}", description="d")
+            for i in range(LATEST_ANNOUNCEMENTS + 2)
+        ])
+        return building
+
+    def test_dashboard(self):
+        building = self._create_building(0)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["instances"]), 1)
+        dashboard = response.data["instances"][0]
+        self.assertEqual(dashboard["id"], building.pk)
+        self.assertEqual(dashboard["occupancy"]["occupied_units"], 2)
+        self.assertEqual(dashboard["occupancy"]["vacant_units"], 1)
+        self.assertEqual(dashboard["bills"], {"outstanding": 30, "outstanding_count": 2, "overdue": 10,
+                                              "overdue_count": 1})
+        self.assertEqual(dashboard["tickets"], {"unread": 2, "open": 3})
+        self.assertEqual([a["title"] for a in dashboard["latest_announcements"]],
+                         [f"announcement {i}" for i in range(LATEST_ANNOUNCEMENTS + 1, 1, -1)])
+
+    def test_constant_number_of_queries(self):
+        self._create_building(0)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+        for n in range(1, 6):
+            self._create_building(n, units=n + 3)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["instances"]), 6)
+
+    def test_empty_building(self):
+        Building.objects.create(owner=self.manager, name="empty", unit_count=0)
+        dashboard = self.client.get(self.url).data["instances"][0]
+        self.assertEqual(dashboard["bills"]["outstanding"], 0)
+        self.assertEqual(dashboard["tickets"]["unread"], 0)
+        self.assertEqual(dashboard["latest_announcements"], [])
+
+    def test_only_managers(self):
+        resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        self.client.force_authenticate(user=resident)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
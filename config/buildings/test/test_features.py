@@ -0,0 +1,48 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from users.models import User
+from buildings.models import Building, Unit, UnitSpecification
+from advertisements.models import Advertisement
+
+
+class FeatureFacetsTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=3)
+        cls.units = Unit.objects.bulk_create([Unit(building=cls.building, unit_number=n) for n in range(1, 4)])
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def _add_specification(self, unit, features, bedroom=2):
+        url = reverse("create_unit_specification")
+        response = self.client.post(url, {
+            "unit": unit.pk, "area": 80, "built_up_area": 90, "bedroom": bedroom, "floor": 1,
+            "year_of_construction": 1400, "features": features})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return UnitSpecification.objects.get(pk=response.json()["instances"]["id"])
+
+    def test_features_are_stored_as_tags(self):
+        unit_spec = self._add_specification(self.units[0], "Parking, elevator,,parking ")
+        self.assertEqual(sorted(unit_spec.tags.values_list("name", flat=True)), ["elevator", "parking"])
+
+    def test_unit_and_ad_facets(self):
+        first = self._add_specification(self.units[0], "parking,elevator")
+        self._add_specification(self.units[1], "parking", bedroom=3)
+        self._add_specification(self.units[2], "storage", bedroom=3)
+        Advertisement.objects.create(unit_specification=first, what_for=Advertisement.RENT, rent=10)
+
+        response = self.client.get(reverse("unit_feature_facets"))
+        self.assertEqual(response.json()["facets"], [
+            {"name": "parking", "count": 2}, {"name": "elevator", "count": 1}, {"name": "storage", "count": 1}])
+        response = self.client.get(reverse("unit_feature_facets"), {"bedroom": 3, "features": "parking"})
+        self.assertEqual(response.json()["facets"], [{"name": "parking", "count": 1}])
+        response = self.client.get(reverse("ad_feature_facets"), {"what_for": Advertisement.RENT})
+        self.assertEqual(response.json()["facets"], [{"name": "elevator", "count": 1}, {"name": "parking", "count": 1}])
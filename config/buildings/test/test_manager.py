@@ -1,3 +1,6 @@
+from unittest import mock
+
+from django.db import IntegrityError
 from django.test import TestCase
 from django.urls import reverse
 
@@ -7,6 +10,7 @@ from rest_framework.authtoken.models import Token
 
 from users.models import User
 from buildings.models import Building, Unit
+from utils.buildings import create_building
 
 
 class ManagerTestCase(TestCase):
@@ -26,3 +30,22 @@ class ManagerTestCase(TestCase):
         response = self.client.post(self.building_url, data={"name": "testBuilding", "unit_count": 10})
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+
+    def test_create_building_provisions_units_and_residents(self):
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.post(self.building_url, data={"name": "testBuilding", "unit_count": 10})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        building = Building.objects.get(pk=response.json()["instances"]["id"])
+        residents_info = response.json()["residents_info"]
+        self.assertEqual(building.units.count(), 10)
+        self.assertEqual(len(residents_info), 10)
+        resident = User.objects.get(username=residents_info[0]["username"])
+        self.assertTrue(resident.check_password(residents_info[0]["password"]))
+        self.assertEqual(Unit.objects.get(building=building, unit_number=1).resident, resident)
+
+    def test_create_building_is_atomic(self):
+        with mock.patch("utils.buildings.Unit.objects.bulk_create", side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                create_building(self.manager, name="testBuilding", unit_count=3)
+        self.assertFalse(Building.objects.filter(name="testBuilding").exists())
+        self.assertFalse(User.objects.filter(role=User.RESIDENT).exists())
@@ -0,0 +1,43 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from users.models import User
+from buildings.models import Building, Unit
+
+
+class UnitsPaginationTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=7)
+        Unit.objects.bulk_create([Unit(building=cls.building, unit_number=n) for n in range(7, 0, -1)])
+        cls.url = reverse("buildings_units", kwargs={"pk": cls.building.pk})
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def test_walk_pages_with_cursor(self):
+        unit_numbers = []
+        params = {"limit": 3}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            unit_numbers += [unit["unit_number"] for unit in response.json()["instances"]]
+            if not response.json()["next_cursor"]:
+                break
+            params["cursor"] = response.json()["next_cursor"]
+        self.assertEqual(unit_numbers, [1, 2, 3, 4, 5, 6, 7])
+        self.assertNotIn("total", response.json())
+
+    def test_total_is_opt_in(self):
+        response = self.client.get(self.url, {"limit": 2, "total": "true"})
+        self.assertEqual(response.json()["total"], 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from users.models import User
+from buildings.models import ProvisioningJob, ProvisioningCredentials
+from utils import buildings as building_utils
+
+
+class ProvisioningJobTestCase(TestCase):
+    client_class = APIClient
+    default_password = "password123"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.building_url = reverse("buildings")
+        cls.manager = User.objects.create_user(username="testManager", password=cls.default_password, role=User.MANAGER)
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def test_big_building_requires_background(self):
+        response = self.client.post(self.building_url, data={"name": "testBuilding", "unit_count": 60})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_background_job_reports_progress_and_residents(self):
+        response = self.client.post(self.building_url,
+                                    data={"name": "testBuilding", "unit_count": 5, "background": True})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_url = reverse("provisioning_job", kwargs={"pk": response.json()["job_id"]})
+
+        response = self.client.get(job_url)
+        self.assertEqual(response.json()["instances"]["status"], ProvisioningJob.PENDING)
+        self.assertNotIn("residents_info", response.json())
+
+        job = building_utils.claim_provisioning_job()
+        building_utils.run_provisioning_job(job)
+        response = self.client.get(job_url)
+        self.assertEqual(response.json()["instances"]["status"], ProvisioningJob.DONE)
+        self.assertEqual([info["unit"] for info in response.json()["residents_info"]], [1, 2, 3, 4, 5])
+
+        # the plaintext passwords are gone once delivered
+        response = self.client.get(job_url)
+        self.assertNotIn("residents_info", response.json())
+        self.assertFalse(ProvisioningCredentials.objects.exists())
+
+    def test_job_resumes_from_last_committed_chunk(self):
+        job = building_utils.start_provisioning_job(self.manager, name="testBuilding", unit_count=5)
+        ProvisioningJob.objects.filter(pk=job.pk).update(chunk_size=2)
+        job = building_utils.claim_provisioning_job()
+        insert_units = building_utils._insert_units
+        calls = []
+
+        def crash_on_second_chunk(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("worker crashed")
+            return insert_units(*args, **kwargs)
+
+        with mock.patch("utils.buildings._insert_units", side_effect=crash_on_second_chunk):
+            with self.assertRaises(RuntimeError), self.assertLogs("utils.buildings", "ERROR"):
+                building_utils.run_provisioning_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.units_done, 2)
+        self.assertEqual(job.building.units.count(), 2)
+        building_utils.run_provisioning_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProvisioningJob.DONE)
+        self.assertEqual(sorted(job.building.units.values_list("unit_number", flat=True)), [1, 2, 3, 4, 5])
+        self.assertEqual([chunk.first_unit for chunk in job.credentials.order_by("first_unit")], [1, 3, 5])
+        self.assertEqual(len(building_utils.deliver_credentials(job)), 5)
+
+    def test_failed_job_is_retried(self):
+        job = building_utils.start_provisioning_job(self.manager, name="testBuilding", unit_count=3)
+        job = building_utils.claim_provisioning_job()
+        with mock.patch("utils.buildings._insert_units", side_effect=RuntimeError("database went away")):
+            with self.assertRaises(RuntimeError), self.assertLogs("utils.buildings", "ERROR"):
+                building_utils.run_provisioning_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.error, "provisioning stopped after 0 units")
+        self.assertIsNone(building_utils.claim_provisioning_job())
+
+        retry_at = timezone.now() - building_utils.JOB_RETRY_AFTER - timezone.timedelta(seconds=1)
+        ProvisioningJob.objects.filter(pk=job.pk).update(updated_at=retry_at)
+        job = building_utils.claim_provisioning_job()
+        self.assertEqual((job.status, job.attempts), (ProvisioningJob.RUNNING, 2))
+        building_utils.run_provisioning_job(job)
+        self.assertEqual(job.building.units.count(), 3)
+
+        ProvisioningJob.objects.filter(pk=job.pk).update(
+            status=ProvisioningJob.FAILED, attempts=building_utils.MAX_JOB_ATTEMPTS, updated_at=retry_at)
+        self.assertIsNone(building_utils.claim_provisioning_job())
+
+    def test_undelivered_credentials_expire(self):
+        job = building_utils.start_provisioning_job(self.manager, name="testBuilding", unit_count=2)
+        building_utils.run_provisioning_job(building_utils.claim_provisioning_job())
+        self.assertEqual(building_utils.purge_credentials(), 0)
+        ProvisioningCredentials.objects.update(
+            created_at=timezone.now() - building_utils.CREDENTIALS_TTL - timezone.timedelta(seconds=1))
+        self.assertEqual(building_utils.purge_credentials(), 1)
+        self.assertEqual(building_utils.deliver_credentials(job), [])
@@ -0,0 +1,103 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from users.models import User
+from buildings.models import Building, Unit
+from utils.buildings import rebuild_counters, assign_resident, remove_resident
+from utils.exceptions import BadRequest
+
+
+class GetAllResidentsTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def _create_building(self, unit_count, vacant=0):
+        building = Building.objects.create(owner=self.manager, name="testBuilding", unit_count=unit_count)
+        residents = User.objects.bulk_create(
+            [User(username=f"resident_{building.pk}_{n}", role=User.RESIDENT) for n in range(unit_count - vacant)])
+        Unit.objects.bulk_create(
+            [Unit(building=building, unit_number=n + 1, members=2,
+                  resident=residents[n] if n < len(residents) else None)
+             for n in range(unit_count)])
+        rebuild_counters(Building.objects.filter(pk=building.pk))
+        return reverse("buildings_residents", kwargs={"pk": building.pk})
+
+    def test_occupancy_summary(self):
+        url = self._create_building(5, vacant=2)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["instances"]), 3)
+        self.assertEqual(response.json()["all_members"], 6)
+        self.assertEqual(response.json()["occupancy"], {
+            "occupied_units": 3, "vacant_units": 2, "total_members": 6, "members_per_unit": 2})
+
+    def test_query_count_does_not_grow_with_units(self):
+        small_building_url = self._create_building(3)
+        big_building_url = self._create_building(40)
+        with self.assertNumQueries(2):
+            self.client.get(small_building_url)
+        with self.assertNumQueries(2):
+            response = self.client.get(big_building_url)
+        self.assertEqual(len(response.json()["instances"]), 40)
+
+
+class OccupancyCountersTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        cls.building = Building.objects.create(
+            owner=cls.manager, name="testBuilding", unit_count=2, occupied_units=1, vacant_units=1, total_members=1)
+        cls.occupied_unit = Unit.objects.create(building=cls.building, unit_number=1, resident=cls.resident)
+        cls.vacant_unit = Unit.objects.create(building=cls.building, unit_number=2, members=3)
+
+    def _counters(self):
+        self.building.refresh_from_db()
+        return self.building.occupied_units, self.building.vacant_units, self.building.total_members
+
+    def test_assign_and_remove_resident(self):
+        self.client.force_authenticate(user=self.manager)
+        url = reverse("units_resident", kwargs={"pk": self.vacant_unit.pk})
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._counters(), (2, 0, 4))
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._counters(), (1, 1, 1))
+
+    def test_resident_updates_members(self):
+        self.client.force_authenticate(user=self.resident)
+        url = reverse("user", kwargs={"pk": self.resident.pk})
+        self.assertEqual(self.client.put(url, {"members": 4}).status_code, status.HTTP_200_OK)
+        self.assertEqual(self._counters(), (1, 1, 4))
+
+    def test_rebuild_fixes_drifted_counters(self):
+        Building.objects.filter(pk=self.building.pk).update(occupied_units=5, total_members=0)
+        drifted = rebuild_counters(Building.objects.filter(pk=self.building.pk))
+        self.assertEqual([(stored, counter) for _, stored, counter in drifted], [((5, 1, 0), (1, 1, 1))])
+        self.assertEqual(self._counters(), (1, 1, 1))
+
+    def test_deleting_a_resident_frees_the_unit(self):
+        self.resident.delete()
+        self.assertEqual(self._counters(), (0, 2, 0))
+
+    def test_filled_unit_is_not_counted_twice(self):
+        self.assertRaises(BadRequest, assign_resident, Unit.objects.get(pk=self.occupied_unit.pk),
+                          User.objects.create_user(username="late", role=User.RESIDENT))
+        # a stale copy of the unit that still looks vacant
+        stale_unit = Unit.objects.get(pk=self.vacant_unit.pk)
+        assign_resident(Unit.objects.get(pk=self.vacant_unit.pk), User.objects.create_user(username="first"))
+        self.assertRaises(BadRequest, assign_resident, stale_unit, User.objects.create_user(username="second"))
+        self.assertEqual(self._counters(), (2, 0, 4))
+        remove_resident(stale_unit)
+        self.assertRaises(BadRequest, remove_resident, stale_unit)
+        self.assertEqual(self._counters(), (1, 1, 1))
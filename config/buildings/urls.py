@@ -9,8 +9,11 @@ urlpatterns = [
     path("units/<int:pk>/", views.RetrieveUnitView.as_view(), name="unit"),
     path("units/<int:pk>/resident/", views.UnitsResidentView.as_view(), name="units_resident"),
     path("unit/specification/", views.UnitSpecificationView.as_view(), name="create_unit_specification"),
+    path("unit/features/", views.UnitFeatureFacetsView.as_view(), name="unit_feature_facets"),
     path("unit/specification/<int:pk>/", views.RetrieveUpdateUnitSpecificationView.as_view(),
          name="unit_specification"),
+    path("jobs/<int:pk>/", views.ProvisioningJobView.as_view(), name="provisioning_job"),
     path("my_buildings/", views.ManagerBuildingListView.as_view(), name="manager_buildings"),
+    path("dashboard/", views.ManagerDashboardView.as_view(), name="manager_dashboard"),
 ]
 
@@ -3,19 +3,23 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework import status
 
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
 from . import serializers as cs
 from .custom_permission_classes import IsManager
 
-from .models import Unit, Building, UnitSpecification
+from .models import Unit, Building, UnitSpecification, ProvisioningJob
 
 from users.models import User
 
 from utils import helper
 from utils.general import response
 from utils.db import update_instance
-from utils.buildings import get_all_residents
+from utils.buildings import (
+    get_all_residents, create_building, start_provisioning_job, deliver_credentials, assign_resident, remove_resident,
+    set_features, filter_unit_specifications, feature_facets)
+from utils.dashboard import get_dashboard
 
 from permissions.permissions import has_obj_permission, has_permission
 from permissions import filters
@@ -31,42 +35,63 @@ class BuildingView(APIView):
         only staff
         """
         buildings = Building.objects.all()
-        return response(status.HTTP_200_OK, instance=buildings, serializer=cs.BuildingSerializer, many=True)
+        return response(status.HTTP_200_OK, instance=buildings, serializer=cs.BuildingSerializer, many=True,
+                        request=request)
 
     def post(self, request):
         """
         only managers
         """
-        residents_info = list()
-        residents = list()
         serializer = cs.CreateBuildingSerializer(data=request.data)
-        if serializer.is_valid():
-            building = Building.objects.create(**serializer.data, owner=request.user)
-        else:
+        if not serializer.is_valid():
             return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
-        for unit in range(building.unit_count):
-            username = helper.random_username(building)
-            password = helper.generate_random_password(10)
-            residents.append(User.objects.create_user(username=username, password=password, role=User.RESIDENT))
-            residents_info.append({"unit": unit + 1, "username": username, "password": password})
-        Unit.objects.bulk_create(
-            [Unit(
-                building=building,
-                unit_number=u + 1,
-                resident=r)
-                for u, r in enumerate(residents)])
+        data = dict(serializer.data)
+        if data.pop("background"):
+            job = start_provisioning_job(request.user, **data)
+            return response(status.HTTP_202_ACCEPTED, instance=job.building,
+                            serializer=cs.BuildingSerializer, job_id=job.pk)
+        building, residents_info = create_building(request.user, **data)
         return response(
             status.HTTP_201_CREATED, instance=building, serializer=cs.BuildingSerializer, residents_info=residents_info)
 
 
+class ProvisioningJobView(APIView):
+    """
+    progress of a background building creation. residents_info is returned once, the first time the job is seen
+    done, and isn't kept afterwards
+    """
+    permission_classes = [cp.IsManager]
+
+    def get(self, request, pk):
+        job = get_object_or_404(ProvisioningJob.objects.select_related("building"), pk=pk)
+        has_obj_permission(request, obj=job.building.owner, raise_exception=True)
+        if job.status == ProvisioningJob.DONE:
+            if residents_info := deliver_credentials(job):
+                return response(status.HTTP_200_OK, instance=job, serializer=cs.ProvisioningJobSerializer,
+                                residents_info=residents_info)
+            return response(status.HTTP_200_OK, instance=job, serializer=cs.ProvisioningJobSerializer,
+                            detail="residents info was already delivered")
+        return response(status.HTTP_200_OK, instance=job, serializer=cs.ProvisioningJobSerializer)
+
+
 class ManagerBuildingListView(APIView):
     permission_classes = [cp.IsManager]
 
     def get(self, request):
         manager_buildings = Building.objects.filter(owner=request.user)
         return response(status.HTTP_200_OK, instance=manager_buildings,
-                        serializer=cs.BuildingSerializer, many=True,
-                        total=manager_buildings.count())
+                        serializer=cs.BuildingSerializer, many=True, request=request)
+
+
+class ManagerDashboardView(APIView):
+    """
+    occupancy, unpaid and overdue bills, tickets and latest announcements of every building of the manager
+    """
+    permission_classes = [cp.IsManager]
+
+    def get(self, request):
+        buildings, page = get_dashboard(request.user, request)
+        return response(status.HTTP_200_OK, instances=buildings, **page)
 
 
 class RetrieveUpdateDestroyBuildingView(APIView):
@@ -100,8 +125,9 @@ class BuildingsUnitsView(APIView):
     def get(self, request, pk):
         building = get_object_or_404(Building, pk=pk)
         has_obj_permission(request, obj=building.owner, raise_exception=True)
-        units = building.units.all()
-        return response(status.HTTP_200_OK, instance=units, serializer=cs.UnitSerializer, many=True)
+        units = building.units.select_related("resident")
+        return response(status.HTTP_200_OK, instance=units, serializer=cs.UnitSerializer, many=True,
+                        request=request, ordering=("unit_number",))
 
 
 class UnitsResidentView(APIView):
@@ -119,8 +145,9 @@ class UnitsResidentView(APIView):
         if not unit.resident:
             username = helper.random_username(building)
             password = helper.generate_random_password(10)
-            unit.resident = User.objects.create_user(username=username, password=password)
-            unit.save()
+            # the new user goes away with the transaction if another request filled the unit first
+            with transaction.atomic():
+                assign_resident(unit, User.objects.create_user(username=username, password=password))
             unit.refresh_from_db()
             return response(status.HTTP_201_CREATED,
                             instance=unit,
@@ -134,10 +161,9 @@ class UnitsResidentView(APIView):
         """
         unit = get_object_or_404(Unit, pk=pk)
         has_obj_permission(request, obj=unit.building.owner, raise_exception=True)
-        resident = unit.resident
-        unit.resident = None
-        resident.delete()
-        unit.save()
+        if not unit.resident:
+            return response(status.HTTP_400_BAD_REQUEST, detail="unit doesn't have a resident")
+        remove_resident(unit)
         return response(status.HTTP_204_NO_CONTENT, detail="resident deleted")
 
 
@@ -148,11 +174,11 @@ class GetAllResidentsView(APIView):
     permission_classes = [cp.IsManager]
 
     def get(self, request, pk):
-        building = get_object_or_404(Building, pk=pk)
+        building = get_object_or_404(Building.objects.select_related("owner"), pk=pk)
         has_obj_permission(request, obj=building.owner, raise_exception=True)
-        residents = get_all_residents(building)
-        return response(status.HTTP_200_OK, instance=residents[0],
-                        serializer=cs.ResidentSerializer, many=True, all_members=residents[1].pop("all_members"))
+        residents, occupancy = get_all_residents(building)
+        return response(status.HTTP_200_OK, instance=residents, serializer=cs.ResidentSerializer, many=True,
+                        all_members=building.total_members, occupancy=occupancy)
 
 
 class RetrieveUnitView(APIView):
@@ -180,8 +206,10 @@ class UnitSpecificationView(APIView):
         if UnitSpecification.objects.filter(unit=unit).exists():
             return response(status.HTTP_400_BAD_REQUEST, detail="unit specification already exist")
         data["unit"] = unit
-        unit_spec = UnitSpecification.objects.create(**data)
-        unit_spec.save()
+        data.pop("tags", None)
+        with transaction.atomic():
+            unit_spec = UnitSpecification.objects.create(**data)
+            set_features(unit_spec, unit_spec.features)
         unit_spec.refresh_from_db()
         return response(status.HTTP_201_CREATED, instance=unit_spec, serializer=cs.UnitSpecificationSerializer)
 
@@ -200,4 +228,19 @@ class RetrieveUpdateUnitSpecificationView(APIView):
         has_obj_permission(request, obj=unit.building.owner)
         unit_spec = unit.unitspecification
         unit_spec.delete()
-        return response(status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return response(status.HTTP_204_NO_CONTENT)
+
+
+class UnitFeatureFacetsView(APIView):
+    """
+    number of units per feature in the manager buildings, filtered by the query params
+    """
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def get(self, request):
+        serializer = cs.UnitFilterSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        unit_specs = filter_unit_specifications(
+            UnitSpecification.objects.filter(unit__building__owner=request.user), serializer.validated_data)
+        return response(status.HTTP_200_OK, facets=feature_facets(unit_specs))
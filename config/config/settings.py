@@ -35,6 +35,9 @@ INSTALLED_APPS = [
     'advertisements.apps.AdvertisementsConfig',
     'notifications.apps.NotificationsConfig',
     'poll.apps.PollConfig',
+    'search.apps.SearchConfig',
+    'events.apps.EventsConfig',
+    'idempotency.apps.IdempotencyConfig',
     'rest_framework_simplejwt',
     'rest_framework_swagger',
     'drf_spectacular',
@@ -128,6 +131,27 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Cache
+# the posting quotas keep their counters here. every worker must see the same counters,
+# so on deploy use a shared backend like django.core.cache.backends.redis.RedisCache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Posting quotas: at most "limit" posts per user in any sliding window of "window" seconds
+
+QUOTAS = {
+    'announcements': {'limit': 10, 'window': 24 * 60 * 60},
+    'tickets': {'limit': 20, 'window': 60 * 60},
+}
+
+# Seconds the response of a request sent with an Idempotency-Key header is replayed to its retries
+
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
 # Default primary key field type
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
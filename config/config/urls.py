@@ -15,6 +15,7 @@ urlpatterns = [
     path("api/financials/", include("financials.urls")),
     path("api/advertisement/", include("advertisements.urls")),
     path("api/polls/", include("poll.urls")),
+    path("api/search/", include("search.urls")),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     # Optional UI:
     path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
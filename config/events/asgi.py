@@ -0,0 +1,118 @@
+"""
+server-sent events endpoint. django 4.1 can't stream from async views, so the stream is a small ASGI
+app mounted in front of django in config/asgi.py
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+
+from django.db import close_old_connections
+from django.db.models import Q
+
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .broker import broker, BUILDING, USER, POLLS
+
+PATH = "/api/events/"
+# idle connections get a comment line every HEARTBEAT seconds so proxies don't close them
+HEARTBEAT = 15
+
+
+def _get_token(scope) -> str:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0] in api_settings.AUTH_HEADER_TYPES:
+                return parts[1]
+    # EventSource can't send headers
+    return parse_qs(scope.get("query_string", b"").decode()).get("token", [None])[0]
+
+
+def _get_channels(token: str):
+    """
+    channels of the buildings the user owns or lives in, plus the user own channel. poll results are for admins
+    only, so only staff get the polls channel
+    """
+    from buildings.models import Building
+    from users.models import User
+
+    close_old_connections()
+    try:
+        user_id = AccessToken(token)[api_settings.USER_ID_CLAIM]
+        user = User.objects.get(pk=user_id, is_active=True)
+    except (TokenError, KeyError, User.DoesNotExist):
+        return None
+    buildings = Building.objects.filter(Q(owner=user) | Q(units__resident=user)).values_list("pk", flat=True)
+    channels = [BUILDING.format(pk) for pk in set(buildings)] + [USER.format(user.pk)]
+    if user.is_staff:
+        channels.append(POLLS)
+    close_old_connections()
+    return channels
+
+
+def format_event(event) -> bytes:
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def _response(send, status, body=b""):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def stream(channels, receive, send, heartbeat=HEARTBEAT):
+    """
+    send the events of the channels until the client disconnects
+    """
+    subscription = broker.subscribe(channels)
+
+    async def wait_for_disconnect():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        subscription.put(None)
+
+    watcher = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ]})
+        await send({"type": "http.response.body", "body": b": connected\n\n", "more_body": True})
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                await send({"type": "http.response.body", "body": b": heartbeat\n\n", "more_body": True})
+                continue
+            if event is None:
+                break
+            await send({"type": "http.response.body", "body": format_event(event), "more_body": True})
+    finally:
+        broker.unsubscribe(subscription)
+        watcher.cancel()
+
+
+class EventStreamApp:
+    """
+    serves PATH as an event stream and passes every other request to the django application
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != PATH:
+            return await self.application(scope, receive, send)
+        if scope["method"] != "GET":
+            return await _response(send, 405, b'{"detail": "method not allowed"}')
+        token = _get_token(scope)
+        channels = await sync_to_async(_get_channels)(token) if token else None
+        if channels is None:
+            return await _response(send, 401, b'{"detail": "authentication credentials were not provided or invalid"}')
+        await stream(channels, receive, send)
@@ -0,0 +1,75 @@
+"""
+in-process publish/subscribe for the event stream. publishers can be sync code in any thread,
+subscribers are connections running on an event loop. only connections served by the same process
+get the events, so the API must run in the same ASGI process as the stream
+"""
+import asyncio
+import itertools
+import threading
+from typing import Iterable
+
+BUILDING = "building:{}"
+USER = "user:{}"
+POLLS = "polls"
+
+QUEUE_SIZE = 32
+
+
+class Subscription:
+    __slots__ = ("channels", "queue", "loop", "dropped")
+
+    def __init__(self, channels: Iterable[str], maxsize: int):
+        self.channels = frozenset(channels)
+        self.queue = asyncio.Queue(maxsize)
+        self.loop = asyncio.get_running_loop()
+        self.dropped = 0
+
+    def put(self, event):
+        """
+        never block a publisher, a slow connection loses its oldest events instead
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class Broker:
+    def __init__(self):
+        self._subscriptions = dict()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, channels: Iterable[str], maxsize: int = QUEUE_SIZE) -> Subscription:
+        subscription = Subscription(channels, maxsize)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscriptions = self._subscriptions.get(channel)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self._subscriptions[channel]
+
+    def publish(self, channel: str, event_type: str, data: dict):
+        event = (next(self._ids), event_type, data)
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # the loop of the connection is already closed
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(set().union(*self._subscriptions.values())) if self._subscriptions else 0
+
+
+broker = Broker()
@@ -0,0 +1,64 @@
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from events.asgi import stream
+from events.broker import broker, BUILDING, USER, POLLS
+
+
+class Command(BaseCommand):
+    help = "open idle event stream connections in this process and measure memory per connection and fan-out latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=1000)
+        parser.add_argument("--buildings", type=int, default=10)
+        parser.add_argument("--events", type=int, default=20)
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options["connections"], options["buildings"], options["events"]))
+
+    async def run(self, connections: int, buildings: int, events: int):
+        received = [asyncio.Queue() for _ in range(connections)]
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        def sender(queue):
+            async def send(message):
+                if message.get("body", b"").startswith(b"id:"):
+                    queue.put_nowait(time.perf_counter())
+            return send
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tasks = [
+            asyncio.ensure_future(stream(
+                [BUILDING.format(i % buildings), USER.format(i), POLLS], receive, sender(received[i]), heartbeat=3600))
+            for i in range(connections)
+        ]
+        # let every connection subscribe
+        while broker.subscriber_count() < connections:
+            await asyncio.sleep(0.01)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        memory = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+        latencies = []
+        for _ in range(events):
+            start = time.perf_counter()
+            broker.publish(POLLS, "poll", {"question": 1, "choice": 1, "votes": 1})
+            arrivals = [await queue.get() for queue in received]
+            latencies.append((max(arrivals) - start) * 1000)
+
+        disconnected.set()
+        await asyncio.gather(*tasks)
+
+        self.stdout.write(f"connections: {connections}")
+        self.stdout.write(f"memory per connection: {memory / connections / 1024:.2f} KiB")
+        self.stdout.write(f"fan-out to all connections (ms): median {statistics.median(latencies):.2f}, "
+                          f"max {max(latencies):.2f}")
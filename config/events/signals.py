@@ -0,0 +1,41 @@
+"""
+publish building activity to the event stream once the transaction that caused it is committed
+"""
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from announcements.models import Announcement
+from poll.models import Choice
+from tickets.models import Ticket
+
+from .broker import broker, BUILDING, USER, POLLS
+
+
+def _publish(channels, event_type, data):
+    def publish():
+        for channel in channels:
+            broker.publish(channel, event_type, data)
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_save, sender=Announcement)
+def publish_announcement(sender, instance, created, **kwargs):
+    if created:
+        _publish([BUILDING.format(instance.building_id)], "announcement", {
+            "id": instance.pk, "building": instance.building_id, "title": instance.title})
+
+
+@receiver(post_save, sender=Ticket)
+def publish_ticket(sender, instance, created, **kwargs):
+    # tickets are private, only the sender and the receiver get them
+    channels = {USER.format(user_id) for user_id in (instance.from_user_id, instance.to_user_id) if user_id}
+    _publish(channels, "ticket", {
+        "id": instance.pk, "building": instance.building_id, "created": created, "seen": instance.seen})
+
+
+@receiver(post_save, sender=Choice)
+def publish_poll_tally(sender, instance, **kwargs):
+    # polls are not bound to a building, only staff streams subscribe to their channel
+    _publish([POLLS], "poll", {"question": instance.question_id, "choice": instance.pk, "votes": instance.votes})
@@ -0,0 +1,139 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+
+from django.test import TestCase
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+from buildings.models import Building, Unit
+from announcements.models import Announcement
+
+from .asgi import EventStreamApp, PATH, stream, _get_channels
+from .broker import Broker, broker, BUILDING, POLLS
+
+
+async def _request(app, path=PATH, query_string=b"", headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query_string, "headers": list(headers)}
+    await app(scope, receive, send)
+    return messages
+
+
+class BrokerTestCase(TestCase):
+    def test_fan_out(self):
+        async def run():
+            test_broker = Broker()
+            first = test_broker.subscribe([BUILDING.format(1), POLLS])
+            second = test_broker.subscribe([BUILDING.format(2)])
+            test_broker.publish(BUILDING.format(1), "announcement", {"id": 1})
+            test_broker.publish(POLLS, "poll", {"votes": 1})
+            await asyncio.sleep(0)
+            return first.queue.qsize(), second.queue.qsize(), test_broker.subscriber_count()
+
+        self.assertEqual(async_to_sync(run)(), (2, 0, 2))
+
+    def test_slow_subscriber_drops_oldest(self):
+        async def run():
+            test_broker = Broker()
+            subscription = test_broker.subscribe([POLLS], maxsize=2)
+            for votes in range(5):
+                test_broker.publish(POLLS, "poll", {"votes": votes})
+            await asyncio.sleep(0)
+            return [subscription.queue.get_nowait()[2]["votes"] for _ in range(2)], subscription.dropped
+
+        self.assertEqual(async_to_sync(run)(), ([3, 4], 3))
+
+    def test_unsubscribe(self):
+        async def run():
+            test_broker = Broker()
+            subscription = test_broker.subscribe([POLLS])
+            test_broker.unsubscribe(subscription)
+            return test_broker.subscriber_count()
+
+        self.assertEqual(async_to_sync(run)(), 0)
+
+
+class EventStreamTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=1)
+        Unit.objects.create(building=cls.building, unit_number=1, resident=cls.resident)
+
+    def setUp(self):
+        self.app = EventStreamApp(None)
+
+    def test_without_token(self):
+        messages = async_to_sync(_request)(self.app)
+        self.assertEqual(messages[0]["status"], 401)
+
+    def test_invalid_token(self):
+        messages = async_to_sync(_request)(self.app, query_string=b"token=invalid")
+        self.assertEqual(messages[0]["status"], 401)
+
+    def test_other_paths_go_to_django(self):
+        calls = []
+
+        async def django_app(scope, receive, send):
+            calls.append(scope["path"])
+
+        async_to_sync(_request)(EventStreamApp(django_app), path="/api/buildings/")
+        self.assertEqual(calls, ["/api/buildings/"])
+
+    def test_stream_sends_events(self):
+        async def run():
+            messages = []
+            disconnect = asyncio.Event()
+
+            async def receive():
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                messages.append(message)
+                if message.get("body", b"").startswith(b"id:"):
+                    disconnect.set()
+
+            task = asyncio.ensure_future(stream([BUILDING.format(self.building.pk)], receive, send))
+            while broker.subscriber_count() == 0:
+                await asyncio.sleep(0)
+            broker.publish(BUILDING.format(self.building.pk), "announcement", {"id": 1})
+            await task
+            return messages
+
+        messages = async_to_sync(run)()
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), messages[0]["headers"])
+        self.assertIn(b"event: announcement\ndata: {\"id\": 1}", messages[-1]["body"])
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_announcement_is_published_on_commit(self):
+        published = []
+        original = broker.publish
+        broker.publish = lambda channel, event_type, data: published.append((channel, event_type))
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                Announcement.objects.create(
+                    building=self.building, poster=self.manager, title="title", description="description")
+        finally:
+            broker.publish = original
+        self.assertEqual(published, [(BUILDING.format(self.building.pk), "announcement")])
+
+    def test_resident_channels(self):
+        channels = _get_channels(str(AccessToken.for_user(self.resident)))
+        self.assertCountEqual(channels, [BUILDING.format(self.building.pk), f"user:{self.resident.pk}"])
+
+    def test_only_staff_get_poll_tallies(self):
+        admin = User.objects.create_user(username="testAdmin", is_staff=True)
+        self.assertIn(POLLS, _get_channels(str(AccessToken.for_user(admin))))
+        self.assertNotIn(POLLS, _get_channels(str(AccessToken.for_user(self.manager))))
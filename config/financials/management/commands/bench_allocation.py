@@ -0,0 +1,25 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.allocation import allocate, to_minor
+
+
+class Command(BaseCommand):
+    help = "measure splitting an amount between many weighted units with exact rounding"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--units", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--amount", default="123456789.99")
+
+    def handle(self, *args, **options):
+        total = to_minor(options["amount"])
+        self.stdout.write(f"{'units':>8} {'allocate (ms)':>15} {'sum is exact':>14}")
+        for count in options["units"]:
+            # areas in hundredths of a square meter
+            weights = [random.randint(3000, 30000) for _ in range(count)]
+            start = time.perf_counter()
+            shares = allocate(total, weights)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{count:>8} {elapsed * 1000:>15.1f} {str(sum(shares) == total):>14}")
@@ -0,0 +1,78 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from buildings.models import Building, Unit
+from financials.models import Bill
+from users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "compare the bill queries joining units with the ones on the building key. nothing is kept in the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bills", type=int, default=1000000, help="10000000 for the full size table")
+        parser.add_argument("--buildings", type=int, default=1000)
+        parser.add_argument("--units", type=int, default=20, help="units per building")
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def _fill(self, owner, options):
+        buildings = Building.objects.bulk_create(
+            [Building(owner=owner, name=f"bench {n}", unit_count=options["units"])
+             for n in range(options["buildings"])])
+        units = Unit.objects.bulk_create(
+            [Unit(building=building, unit_number=n + 1) for building in buildings for n in range(options["units"])],
+            batch_size=5000)
+        now = timezone.now()
+        for start in range(0, options["bills"], 50000):
+            Bill.objects.bulk_create([
+                Bill(unit_id=unit.pk, building_id=unit.building_id, amount=100, created_by=owner, description="bench",
+                     expire_date=now + timezone.timedelta(days=random.randint(-120, 30)), is_paid=random.random() < .7)
+                for unit in random.choices(units, k=min(50000, options["bills"] - start))
+            ], batch_size=5000)
+        return buildings
+
+    def _time(self, label, queries, repeat):
+        timings = []
+        for _ in range(repeat):
+            query = random.choice(queries)
+            start = time.perf_counter()
+            query()
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(f"{label:<40} {statistics.median(timings) * 1000:>10.2f} ms")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                owner = User.objects.create_user(username="bench_bill_building_owner", role=User.MANAGER)
+                start = time.perf_counter()
+                buildings = self._fill(owner, options)
+                self.stdout.write(f"{options['bills']} bills in {time.perf_counter() - start:.1f}s")
+                ids = [building.pk for building in buildings]
+                pages = [ids[i:i + 50] for i in range(0, len(ids), 50)]
+                for key in ("unit__building", "building"):
+                    self.stdout.write(f"-- {key}")
+                    self._time("bill page of a building", [
+                        lambda pk=pk: list(Bill.objects.filter(**{key: pk}).order_by("-pk")[:50]) for pk in ids
+                    ], options["repeat"])
+                    self._time("overdue total of a building", [
+                        lambda pk=pk: Bill.objects.overdue().filter(**{key: pk}).aggregate(Sum("amount"))
+                        for pk in ids
+                    ], options["repeat"])
+                    self._time("outstanding of 50 buildings", [
+                        lambda page=page: list(Bill.objects.filter(**{f"{key}__in": page}, is_paid=False).values(key)
+                                               .annotate(total=Sum("amount"), count=Count("pk")).order_by())
+                        for page in pages
+                    ], options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
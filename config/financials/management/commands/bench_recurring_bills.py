@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from buildings.models import Building, Unit
+from financials.models import RecurringCharge
+from users.models import User
+from utils.buildings import rebuild_counters
+from utils.financials import bill_charge, get_period
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "measure the monthly billing run throughput and the cost of a rerun. nothing is kept in the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--units", type=int, default=100000)
+        parser.add_argument("--buildings", type=int, default=100)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        period = get_period(timezone.localdate())
+        per_building = options["units"] // options["buildings"]
+        try:
+            with transaction.atomic():
+                owner = User.objects.create_user(username="bench_recurring_bills_owner", role=User.MANAGER)
+                buildings = Building.objects.bulk_create(
+                    [Building(owner=owner, name=f"bench {n}", unit_count=per_building)
+                     for n in range(options["buildings"])])
+                for building in buildings:
+                    Unit.objects.bulk_create(
+                        [Unit(building=building, unit_number=n + 1) for n in range(per_building)], batch_size=5000)
+                rebuild_counters(Building.objects.filter(owner=owner))
+                charges = RecurringCharge.objects.bulk_create(
+                    [RecurringCharge(building=building, created_by=owner, amount=1000, day_of_month=1,
+                                     description="service charge") for building in buildings])
+                for label in ("first run", "rerun"):
+                    units = created = 0
+                    start = time.perf_counter()
+                    for charge in RecurringCharge.objects.filter(pk__in=[c.pk for c in charges]).select_related(
+                            "building"):
+                        charge_units, charge_created = bill_charge(charge, period, options["chunk_size"])
+                        units += charge_units
+                        created += charge_created
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(f"{label}: {units} units, {created} bills in {elapsed:.2f}s "
+                                      f"({units / elapsed:.0f} units/s)")
+                raise _Rollback
+        except _Rollback:
+            pass
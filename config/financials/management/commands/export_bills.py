@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from financials.models import Bill
+from utils.exports import export_bills, filter_bills, FORMATS, CSV
+
+
+class Command(BaseCommand):
+    help = "stream bills as CSV or newline delimited JSON, to stdout or a file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--building", type=int, help="every building by default")
+        parser.add_argument("--period", help="YYYY-MM")
+        paid = parser.add_mutually_exclusive_group()
+        paid.add_argument("--paid", dest="is_paid", action="store_true", default=None)
+        paid.add_argument("--unpaid", dest="is_paid", action="store_false")
+        parser.add_argument("--output", choices=FORMATS, default=CSV)
+        parser.add_argument("--file", help="written to stdout by default")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        period = None
+        if options["period"]:
+            try:
+                period = datetime.strptime(options["period"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("period must be YYYY-MM")
+        bills = Bill.objects.all()
+        if options["building"]:
+            bills = bills.filter(building=options["building"])
+        chunks = export_bills(filter_bills(bills, period, options["is_paid"]), options["output"],
+                              options["chunk_size"])
+        if not options["file"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(options["file"], "w", newline="") as file:
+            file.writelines(chunks)
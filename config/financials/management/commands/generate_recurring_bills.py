@@ -0,0 +1,42 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from utils.exceptions import BadRequest
+from utils.financials import due_charges, bill_charge, get_period
+
+
+class Command(BaseCommand):
+    help = "bill every due recurring charge for a month. running it again for the same month creates nothing new"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period", help="YYYY-MM, the current month by default")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options["period"]:
+            try:
+                period = datetime.strptime(options["period"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("period must be YYYY-MM")
+        else:
+            period = get_period(today)
+
+        charges = units = created = 0
+        start = time.perf_counter()
+        for charge in due_charges(period, today).iterator():
+            try:
+                charge_units, charge_created = bill_charge(charge, period, options["chunk_size"])
+            except BadRequest as e:
+                self.stderr.write(f"charge {charge.pk} of building {charge.building_id}: {e.detail}")
+                continue
+            charges += 1
+            units += charge_units
+            created += charge_created
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{period:%Y-%m}: {charges} charges, {units} units, {created} bills created in {elapsed:.2f}s "
+            f"({units / elapsed if elapsed else 0:.0f} units/s)")
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from buildings.models import Building
+from utils.rollups import verify_rollups
+
+
+class Command(BaseCommand):
+    help = "recompute the monthly bill rollups from the bills, filling the missing ones and fixing the drifted ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--building", type=int, help="every building by default")
+        parser.add_argument("--check", action="store_true", help="only report the drifted rollups")
+        parser.add_argument("--batch-size", type=int, default=200, help="buildings per query")
+
+    @staticmethod
+    def _totals(totals):
+        billed, billed_count, collected, collected_count = totals
+        return f"billed {billed} in {billed_count}, collected {collected} in {collected_count}"
+
+    def handle(self, *args, **options):
+        buildings = Building.objects.order_by("pk")
+        if options["building"]:
+            buildings = buildings.filter(pk=options["building"])
+        batch_size = options["batch_size"]
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            pks = list(buildings.filter(pk__gt=last_pk).values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+            for building_id, month, stored, actual in verify_rollups(pks, fix=not options["check"]):
+                drifted += 1
+                self.stdout.write(f"building {building_id} {month:%Y-%m}: {self._totals(stored)} -> "
+                                  f"{self._totals(actual)}")
+            checked += len(pks)
+        action = "found" if options["check"] else "fixed"
+        self.stdout.write(f"checked {checked} buildings, {action} {drifted} drifted months")
+        if drifted and options["check"]:
+            # non zero exit status for monitoring
+            raise SystemExit(1)
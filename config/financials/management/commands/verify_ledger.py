@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from financials.models import UnitBalance
+from utils.ledger import unbalanced_postings, verify_balances
+
+
+class Command(BaseCommand):
+    help = ("recompute the unit balances from their ledger entries and report the drifted snapshots, and the "
+            "postings whose entries don't add up to zero")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="overwrite drifted snapshots with the ledger total")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                UnitBalance.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+            for balance, stored, actual in verify_balances(UnitBalance.objects.filter(pk__in=pks), fix=options["fix"]):
+                drifted += 1
+                self.stdout.write(f"unit {balance.unit_id}: balance {stored} -> {actual}")
+            checked += len(pks)
+        action = "fixed" if options["fix"] else "found"
+        self.stdout.write(f"checked {checked} balances, {action} {drifted} drifted")
+        # an unbalanced posting can't be fixed from the ledger itself
+        unbalanced = unbalanced_postings(batch_size)
+        for posting, total in unbalanced:
+            self.stdout.write(f"posting {posting}: entries add up to {total}")
+        self.stdout.write(f"found {len(unbalanced)} unbalanced postings")
+        if (drifted and not options["fix"]) or unbalanced:
+            # non zero exit status for monitoring
+            raise SystemExit(1)
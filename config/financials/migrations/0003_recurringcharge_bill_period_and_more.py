@@ -0,0 +1,60 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:28
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0010_unitspecification_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('financials', '0002_bill_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringCharge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.FloatField()),
+                ('divide_by', models.CharField(choices=[('member', 'member'), ('unit', 'unit')], default='unit', max_length=6)),
+                ('day_of_month', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(28)])),
+                ('expire_days', models.PositiveSmallIntegerField(default=30)),
+                ('description', models.TextField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('last_period', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='period',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recurringcharge',
+            name='building',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_charges', to='buildings.building'),
+        ),
+        migrations.AddField(
+            model_name='recurringcharge',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='charge',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bills', to='financials.recurringcharge'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringcharge',
+            index=models.Index(fields=['is_active', 'day_of_month'], name='financials__is_acti_64cf3c_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bill',
+            constraint=models.UniqueConstraint(fields=('charge', 'unit', 'period'), name='unique_charge_unit_period'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financials', '0003_recurringcharge_bill_period_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bill',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='recurringcharge',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='recurringcharge',
+            name='divide_by',
+            field=models.CharField(choices=[('member', 'member'), ('unit', 'unit'), ('area', 'area')], default='unit', max_length=6),
+        ),
+    ]
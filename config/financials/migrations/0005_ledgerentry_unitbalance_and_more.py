@@ -0,0 +1,80 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+
+
+def fill_ledger(apps, schema_editor):
+    """
+    a charge entry for every existing bill and a payment entry for the paid ones, in bill order
+    """
+    Bill = apps.get_model("financials", "Bill")
+    LedgerEntry = apps.get_model("financials", "LedgerEntry")
+    UnitBalance = apps.get_model("financials", "UnitBalance")
+    balances = dict()
+    entries = []
+
+    def flush():
+        for entry in LedgerEntry.objects.bulk_create(entries):
+            balances[entry.unit_id].last_entry = entry
+        entries.clear()
+
+    bills = Bill.objects.filter(unit__isnull=False).order_by("pk").values_list(
+        "pk", "unit_id", "amount", "is_paid", "created_by_id", "date_created", "description")
+    for pk, unit_id, amount, is_paid, created_by_id, date_created, description in bills.iterator(chunk_size=2000):
+        balance = balances.setdefault(unit_id, UnitBalance(unit_id=unit_id, balance=Decimal("0.00")))
+        amount = Decimal(amount).quantize(Decimal("0.01"))
+        postings = [("CHARGE", amount)] + ([("PAYMENT", -amount)] if is_paid else [])
+        for kind, posted in postings:
+            balance.balance += posted
+            entries.append(LedgerEntry(
+                unit_id=unit_id, bill_id=pk, kind=kind, amount=posted, balance=balance.balance,
+                created_by_id=created_by_id, created_at=date_created, description=description))
+        if len(entries) >= 2000:
+            flush()
+    flush()
+    UnitBalance.objects.bulk_create(balances.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('buildings', '0010_unitspecification_search_indexes'),
+        ('financials', '0004_alter_bill_amount_alter_recurringcharge_amount_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CHARGE', 'charge'), ('PAYMENT', 'payment'), ('ADJUST', 'adjustment')], max_length=7)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('description', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('bill', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='financials.bill')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='buildings.unit')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UnitBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('last_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='financials.ledgerentry')),
+                ('unit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='balance', to='buildings.unit')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['unit', 'id'], name='financials__unit_id_d7eb9c_idx'),
+        ),
+        migrations.RunPython(fill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financials', '0005_ledgerentry_unitbalance_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['is_paid', 'expire_date'], name='financials__is_paid_c18f0a_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financials', '0006_bill_financials__is_paid_c18f0a_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='settlement',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+    ]
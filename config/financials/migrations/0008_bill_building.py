@@ -0,0 +1,46 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:40
+
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+
+CHUNK_SIZE = 10000
+
+
+def fill_building(apps, schema_editor):
+    """
+    copy the building of the unit into every bill, one primary key range per transaction so a big table isn't
+    rewritten under a single lock and an interrupted run carries on from where it stopped
+    """
+    Bill = apps.get_model("financials", "Bill")
+    Unit = apps.get_model("buildings", "Unit")
+    building = models.Subquery(Unit.objects.filter(pk=models.OuterRef("unit_id")).values("building_id")[:1])
+    bills = Bill.objects.filter(building__isnull=True, unit__isnull=False)
+    last = bills.aggregate(last=models.Max("pk"))["last"] or 0
+    start = bills.aggregate(first=models.Min("pk"))["first"] or 0
+    while start and start <= last:
+        with transaction.atomic():
+            bills.filter(pk__gte=start, pk__lt=start + CHUNK_SIZE).update(building_id=building)
+        start += CHUNK_SIZE
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('buildings', '0010_unitspecification_search_indexes'),
+        ('financials', '0007_bill_settlement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='building',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bills', to='buildings.building'),
+        ),
+        migrations.RunPython(fill_building, migrations.RunPython.noop),
+        # built once the column is filled
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['building', 'is_paid', 'expire_date'], name='financials__buildin_c0eb5f_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0010_unitspecification_search_indexes'),
+        ('financials', '0008_bill_building'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyBillRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('billed', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('billed_count', models.IntegerField(default=0)),
+                ('collected', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('collected_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('building', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bill_rollups', to='buildings.building')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='monthlybillrollup',
+            constraint=models.UniqueConstraint(fields=('building', 'month'), name='unique_building_month'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 4.1.3 on 2026-10-18 19:11
+
+import uuid
+
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+
+CHUNK_SIZE = 10000
+COUNTER_ACCOUNTS = {"CHARGE": "INCOME", "PAYMENT": "CASH", "ADJUST": "INCOME"}
+
+
+def add_counter_entries(apps, schema_editor):
+    """
+    give every existing unit entry its building, a posting id and the counter entry on the building account, one
+    primary key range per transaction. the entries already done have a posting id, so an interrupted run carries on
+    """
+    LedgerEntry = apps.get_model("financials", "LedgerEntry")
+    entries = LedgerEntry.objects.filter(posting__isnull=True)
+    last = entries.aggregate(last=models.Max("pk"))["last"] or 0
+    start = entries.aggregate(first=models.Min("pk"))["first"] or 0
+    while start and start <= last:
+        with transaction.atomic():
+            chunk = list(entries.filter(pk__gte=start, pk__lt=start + CHUNK_SIZE).select_related("unit"))
+            counters = []
+            for entry in chunk:
+                entry.building_id = entry.unit.building_id
+                entry.posting = uuid.uuid4()
+                counters.append(LedgerEntry(
+                    posting=entry.posting, account=COUNTER_ACCOUNTS[entry.kind], building_id=entry.building_id,
+                    bill_id=entry.bill_id, kind=entry.kind, amount=-entry.amount, description=entry.description,
+                    created_by_id=entry.created_by_id, created_at=entry.created_at))
+            LedgerEntry.objects.bulk_update(chunk, ["building", "posting"], batch_size=500)
+            LedgerEntry.objects.bulk_create(counters, batch_size=500)
+        start += CHUNK_SIZE
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('buildings', '0011_provisioning_credentials'),
+        ('financials', '0009_monthlybillrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledgerentry',
+            name='account',
+            field=models.CharField(choices=[('UNIT', 'unit'), ('INCOME', 'building income'), ('CASH', 'building cash')], default='UNIT', max_length=6),
+        ),
+        migrations.AddField(
+            model_name='ledgerentry',
+            name='building',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='buildings.building'),
+        ),
+        migrations.AddField(
+            model_name='ledgerentry',
+            name='posting',
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='balance',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='unit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='buildings.unit'),
+        ),
+        migrations.RunPython(add_counter_entries, migrations.RunPython.noop),
+        # required and indexed once every entry has them
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='building',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='buildings.building'),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='posting',
+            field=models.UUIDField(db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['building', 'account', 'id'], name='financials__buildin_d162db_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.1.3 on 2026-10-18 19:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0011_provisioning_credentials'),
+        ('financials', '0010_double_entry_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='unit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='buildings.unit'),
+        ),
+    ]
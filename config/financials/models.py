@@ -1,19 +1,179 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
-from buildings.models import Unit
+from buildings.models import Building, Unit
 
 from django.conf import settings
 from django.utils import timezone
 
 
+class RecurringCharge(models.Model):
+    """
+    a charge billed to the units of a building every month by the generate_recurring_bills command.
+    day_of_month stops at 28 so every month has it
+    """
+    MEMBER = "member"
+    UNIT = "unit"
+    AREA = "area"
+    divide_by_choices = (
+        (MEMBER, "member"),
+        (UNIT, "unit"),
+        (AREA, "area")
+    )
+    building = models.ForeignKey(Building, on_delete=models.CASCADE, related_name="recurring_charges")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    divide_by = models.CharField(max_length=6, choices=divide_by_choices, default=UNIT)
+    day_of_month = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(28)])
+    expire_days = models.PositiveSmallIntegerField(default=30)
+    description = models.TextField()
+    is_active = models.BooleanField(default=True)
+    # first day of the last month that was fully billed
+    last_period = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["is_active", "day_of_month"])]
+
+
+class BillQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        fill the building of the bills given only a unit, with one query
+        """
+        objs = list(objs)
+        if unit_ids := {bill.unit_id for bill in objs if bill.building_id is None and bill.unit_id is not None}:
+            buildings = dict(Unit.objects.filter(pk__in=unit_ids).values_list("pk", "building_id"))
+            for bill in objs:
+                if bill.building_id is None and bill.unit_id is not None:
+                    bill.building_id = buildings.get(bill.unit_id)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def with_overdue(self, now=None):
+        """
+        annotate overdue, computed by the database
+        """
+        now = now or timezone.now()
+        return self.annotate(overdue=models.ExpressionWrapper(
+            models.Q(is_paid=False, expire_date__lt=now), output_field=models.BooleanField()))
+
+    def overdue(self, now=None):
+        """
+        unpaid bills past their expire date, a range scan of the (is_paid, expire_date) index
+        """
+        return self.filter(is_paid=False, expire_date__lt=now or timezone.now())
+
+
 class Bill(models.Model):
-    amount = models.FloatField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     unit = models.ForeignKey(Unit, related_name="Bills", on_delete=models.SET_NULL, null=True)
+    # copied from the unit so bill queries don't join units and the bill stays in its building when the unit goes
+    building = models.ForeignKey(Building, related_name="bills", on_delete=models.SET_NULL, null=True, blank=True)
     date_created = models.DateTimeField(auto_now_add=True)
     expire_date = models.DateTimeField()
     description = models.TextField()
     is_paid = models.BooleanField(default=False)
+    charge = models.ForeignKey(RecurringCharge, related_name="bills", on_delete=models.SET_NULL, null=True,
+                               blank=True)
+    # first day of the month a recurring charge was billed for
+    period = models.DateField(null=True, blank=True)
+    # set by the settlement that paid the bill, tells which rows a conditional UPDATE actually changed
+    settlement = models.UUIDField(null=True, blank=True, db_index=True)
+
+    objects = BillQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["charge", "unit", "period"], name="unique_charge_unit_period"),
+        ]
+        indexes = [
+            models.Index(fields=["is_paid", "expire_date"]),
+            models.Index(fields=["building", "is_paid", "expire_date"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.building_id is None and self.unit_id is not None:
+            self.building_id = self.unit.building_id
+        super().save(*args, **kwargs)
 
     def is_overdue(self):
+        if hasattr(self, "overdue"):
+            return self.overdue
         return not self.is_paid and self.expire_date < timezone.now()
+
+
+class LedgerEntry(models.Model):
+    """
+    one side of a double entry posting. amount is a debit when positive: what a unit owes on its account, cash
+    received on the building cash account. every unit entry has a counter entry of the opposite amount on the
+    building income account (charges and adjustments) or cash account (payments) with the same posting id, so the
+    entries of a posting add up to zero. unit and balance, the running balance of the unit after the entry, are only
+    set on the unit side, unit is cleared when the unit is deleted
+    """
+    CHARGE = "CHARGE"
+    PAYMENT = "PAYMENT"
+    ADJUSTMENT = "ADJUST"
+    kind_choices = (
+        (CHARGE, "charge"),
+        (PAYMENT, "payment"),
+        (ADJUSTMENT, "adjustment")
+    )
+    UNIT = "UNIT"
+    INCOME = "INCOME"
+    CASH = "CASH"
+    account_choices = (
+        (UNIT, "unit"),
+        (INCOME, "building income"),
+        (CASH, "building cash"),
+    )
+    COUNTER_ACCOUNTS = {CHARGE: INCOME, PAYMENT: CASH, ADJUSTMENT: INCOME}
+    posting = models.UUIDField(db_index=True)
+    account = models.CharField(max_length=6, choices=account_choices, default=UNIT)
+    building = models.ForeignKey(Building, related_name="ledger_entries", on_delete=models.CASCADE)
+    # kept when the unit is deleted, the counter entry of its posting stays too
+    unit = models.ForeignKey(Unit, related_name="ledger_entries", on_delete=models.SET_NULL, null=True, blank=True)
+    bill = models.ForeignKey(Bill, related_name="ledger_entries", on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=7, choices=kind_choices)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    balance = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    description = models.TextField(blank=True, default="")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["unit", "id"]),
+            models.Index(fields=["building", "account", "id"]),
+        ]
+
+
+class UnitBalance(models.Model):
+    """
+    balance snapshot of a unit, updated in the transaction of every ledger entry. positive means the unit owes
+    """
+    unit = models.OneToOneField(Unit, related_name="balance", on_delete=models.CASCADE)
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_entry = models.ForeignKey(LedgerEntry, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name="+")
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class MonthlyBillRollup(models.Model):
+    """
+    billed and collected totals of the bills of a building for a month, moved along with every charge, payment and
+    cancelled bill. a bill counts in the month of its period, or of its creation when it has none.
+    collected is the paid part of the bills of the month, whenever they were paid
+    """
+    building = models.ForeignKey(Building, related_name="bill_rollups", on_delete=models.CASCADE)
+    # first day of the month
+    month = models.DateField()
+    billed = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    billed_count = models.IntegerField(default=0)
+    collected = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    collected_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # also the index of the building month range scans of the revenue report
+        constraints = [models.UniqueConstraint(fields=["building", "month"], name="unique_building_month")]
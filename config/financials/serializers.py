@@ -1,11 +1,14 @@
 from rest_framework import serializers
 
-from .models import Bill
+from .models import Bill, RecurringCharge, LedgerEntry
 from buildings.models import Unit
+from utils import allocation, exports
 
 
 class BillSerializer(serializers.ModelSerializer):
-    is_overdue = serializers.BooleanField(default="is_overdue")
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, coerce_to_string=False)
+    # read from the overdue annotation of Bill.objects.with_overdue() when it's there
+    is_overdue = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Bill
@@ -14,12 +17,85 @@ class BillSerializer(serializers.ModelSerializer):
 
 
 class NewBillSerializer(serializers.Serializer):
-    MEMBER = "member"
-    UNIT = "unit"
+    MEMBER = allocation.MEMBER
+    UNIT = allocation.UNIT
+    AREA = allocation.AREA
+    CUSTOM = allocation.CUSTOM
 
-    amount = serializers.FloatField()
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=0)
     unit = serializers.PrimaryKeyRelatedField(queryset=Unit.objects.all(), required=False)
-    divide_by = serializers.ChoiceField(choices=(MEMBER, UNIT), required=False)
+    divide_by = serializers.ChoiceField(choices=allocation.METHODS, required=False)
+    # unit id -> weight, for divide_by custom
+    weights = serializers.DictField(child=serializers.IntegerField(min_value=0), required=False)
     expire_date = serializers.IntegerField()
     description = serializers.CharField()
 
+    def validate_weights(self, weights):
+        try:
+            return {int(unit_id): weight for unit_id, weight in weights.items()}
+        except ValueError:
+            raise serializers.ValidationError("keys must be unit ids")
+
+    def validate(self, attrs):
+        if attrs.get("divide_by") == self.CUSTOM and not attrs.get("weights"):
+            raise serializers.ValidationError("weights are required to divide by custom weights")
+        return attrs
+
+
+class SettleBillsSerializer(serializers.Serializer):
+    """
+    either bill ids or a filter of the bills to settle
+    """
+    bills = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000,
+                                  required=False)
+    building = serializers.IntegerField(min_value=1, required=False)
+    unit = serializers.IntegerField(min_value=1, required=False)
+    # any day of the month of a recurring charge
+    period = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        filters = {key for key in ("building", "unit", "period") if key in attrs}
+        if "bills" in attrs and filters:
+            raise serializers.ValidationError("either bills or a filter must be provided, not both")
+        if "bills" not in attrs and not filters:
+            raise serializers.ValidationError("bills or a filter must be provided")
+        return attrs
+
+
+class BillExportSerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=exports.FORMATS, default=exports.CSV)
+    # any day of the month to export
+    period = serializers.DateField(required=False)
+    is_paid = serializers.BooleanField(required=False)
+
+
+class RevenueSerializer(serializers.Serializer):
+    # any day of the first and last months
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+
+
+class RecurringChargeSerializer(serializers.ModelSerializer):
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=0, coerce_to_string=False)
+
+    class Meta:
+        model = RecurringCharge
+        fields = "__all__"
+        read_only_fields = ["building", "created_by", "last_period", "created_at"]
+
+
+class LedgerEntrySerializer(serializers.ModelSerializer):
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, coerce_to_string=False)
+    balance = serializers.DecimalField(max_digits=14, decimal_places=2, coerce_to_string=False, allow_null=True)
+
+    class Meta:
+        model = LedgerEntry
+        fields = "__all__"
+
+
+class AdjustmentSerializer(serializers.Serializer):
+    """
+    positive amounts add to what the unit owes, negative ones credit it
+    """
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    description = serializers.CharField()
@@ -1,3 +1,659 @@
-from django.test import TestCase
+import json
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from threading import Barrier, Thread
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+from buildings.models import Building, Unit, UnitSpecification
+from financials.models import Bill, RecurringCharge, LedgerEntry, UnitBalance, MonthlyBillRollup
+from utils import allocation
+from utils.buildings import rebuild_counters
+from utils.financials import bill_charge, due_charges
+from utils.ledger import get_balance, unbalanced_postings
+from utils.rollups import verify_rollups
+
+
+class RecurringChargeTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=5)
+        residents = User.objects.bulk_create([User(username=f"resident_{n}", role=User.RESIDENT) for n in range(3)])
+        Unit.objects.bulk_create(
+            [Unit(building=cls.building, unit_number=n + 1, members=n + 1, resident=residents[n] if n < 3 else None)
+             for n in range(5)])
+        rebuild_counters(Building.objects.filter(pk=cls.building.pk))
+        cls.building.refresh_from_db()
+        cls.period = date(2026, 10, 1)
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def _charge(self, **kwargs):
+        return RecurringCharge.objects.create(**{
+            "building": self.building, "created_by": self.manager, "amount": 600, "day_of_month": 5,
+            "description": "service charge", **kwargs})
+
+    def test_create_charge(self):
+        res = self.client.post(reverse("recurring_charges", args=[self.building.pk]),
+                               {"amount": 100, "day_of_month": 1, "description": "cleaning", "divide_by": "member"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["instances"]["building"], self.building.pk)
+
+        res = self.client.post(reverse("recurring_charges", args=[self.building.pk]),
+                               {"amount": 100, "day_of_month": 31, "description": "cleaning"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bill_charge_by_unit(self):
+        charge = self._charge()
+        self.assertEqual(bill_charge(charge, self.period, chunk_size=2), (5, 5))
+        bills = Bill.objects.filter(charge=charge, period=self.period)
+        self.assertEqual(sorted(bills.values_list("amount", flat=True)), [120] * 5)
+        self.assertEqual(timezone.localtime(bills.first().expire_date).date(), date(2026, 11, 4))
+        charge.refresh_from_db()
+        self.assertEqual(charge.last_period, self.period)
+
+    def test_bill_charge_by_member(self):
+        charge = self._charge(divide_by=RecurringCharge.MEMBER)
+        self.assertEqual(bill_charge(charge, self.period), (3, 3))
+        self.assertEqual(sorted(Bill.objects.filter(charge=charge).values_list("amount", flat=True)),
+                         [100, 200, 300])
+
+    def test_rerun_creates_nothing(self):
+        charge = self._charge()
+        bill_charge(charge, self.period, chunk_size=2)
+        # an interrupted run that billed part of the building
+        Bill.objects.filter(charge=charge, unit__unit_number__gt=3).delete()
+        self.assertEqual(bill_charge(charge, self.period, chunk_size=2), (5, 2))
+        self.assertEqual(bill_charge(charge, self.period, chunk_size=2), (5, 0))
+        self.assertEqual(Bill.objects.filter(charge=charge).count(), 5)
+
+    def test_due_charges(self):
+        early, late = self._charge(day_of_month=5), self._charge(day_of_month=20)
+        self._charge(day_of_month=1, last_period=self.period)
+        self._charge(is_active=False)
+        self.assertEqual(list(due_charges(self.period, date(2026, 10, 10))), [early])
+        self.assertEqual(list(due_charges(date(2026, 9, 1), date(2026, 10, 10))), [early, late])
+        self.assertEqual(list(due_charges(date(2026, 11, 1), date(2026, 10, 10))), [])
+
+    def test_command(self):
+        self._charge()
+        out = StringIO()
+        call_command("generate_recurring_bills", period="2026-09", stdout=out)
+        self.assertIn("1 charges, 5 units, 5 bills created", out.getvalue())
+        call_command("generate_recurring_bills", period="2026-09", stdout=out)
+        self.assertEqual(Bill.objects.count(), 5)
+
+    def test_split_bill_view(self):
+        res = self.client.post(reverse("bills", args=[self.building.pk]),
+                               {"amount": 60, "divide_by": "member", "expire_date": 10, "description": "water"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sorted(bill["amount"] for bill in res.data["instances"]), [10, 20, 30])
+
+
+class AllocationTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=3)
+        cls.units = Unit.objects.bulk_create([Unit(building=cls.building, unit_number=n + 1) for n in range(3)])
+        UnitSpecification.objects.bulk_create([
+            UnitSpecification(unit=unit, area=area, built_up_area=area, bedroom=1, floor=1, year_of_construction=2000)
+            for unit, area in zip(cls.units, (50.5, 100, 0))
+        ])
+        rebuild_counters(Building.objects.filter(pk=cls.building.pk))
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def test_shares_add_up_exactly(self):
+        self.assertEqual(allocation.allocate(100, [1, 1, 1]), [34, 33, 33])
+        self.assertEqual(allocation.allocate(1000, [1, 2, 3, 4, 5, 6, 7]), [36, 71, 107, 143, 179, 214, 250])
+        for total in (1, 7, 999, 10 ** 12 + 1):
+            self.assertEqual(sum(allocation.allocate(total, [3, 7, 11, 0, 13])), total)
+
+    def test_largest_remainder_gets_the_extra_cent(self):
+        # exact shares 0.6, 1.2 and 1.2 cents: the floors 0, 1, 1 leave one cent for the 0.6 remainder
+        self.assertEqual(allocation.allocate(3, [1, 2, 2]), [1, 1, 1])
+
+    def test_minor_units(self):
+        self.assertEqual(allocation.to_minor("10.005"), 1001)
+        self.assertEqual(allocation.to_minor(0.1 + 0.2), 30)
+        self.assertEqual(str(allocation.from_minor(1001)), "10.01")
+
+    def test_split_by_unit_keeps_every_cent(self):
+        res = self.client.post(reverse("bills", args=[self.building.pk]),
+                               {"amount": "100", "divide_by": "unit", "expire_date": 10, "description": "water"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        amounts = sorted(Bill.objects.values_list("amount", flat=True))
+        self.assertEqual(amounts, [Decimal("33.33"), Decimal("33.33"), Decimal("33.34")])
+
+    def test_split_by_area(self):
+        shares = allocation.allocate_units(Unit.objects.filter(building=self.building), "150.50", allocation.AREA)
+        # the unit without an area takes no share
+        self.assertEqual(shares, [(self.units[0].pk, Decimal("50.50")), (self.units[1].pk, Decimal("100.00"))])
+
+    def test_split_by_custom_weights(self):
+        res = self.client.post(reverse("bills", args=[self.building.pk]), {
+            "amount": "10", "divide_by": "custom", "weights": {self.units[0].pk: 1, self.units[2].pk: 3},
+            "expire_date": 10, "description": "repairs"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(dict(Bill.objects.values_list("unit", "amount")),
+                         {self.units[0].pk: Decimal("2.50"), self.units[2].pk: Decimal("7.50")})
+
+    def test_custom_weights_of_other_buildings(self):
+        other = Building.objects.create(owner=self.manager, name="other", unit_count=1)
+        unit = Unit.objects.create(building=other, unit_number=1)
+        res = self.client.post(reverse("bills", args=[self.building.pk]), {
+            "amount": "10", "divide_by": "custom", "weights": {unit.pk: 1}, "expire_date": 10,
+            "description": "repairs"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Bill.objects.exists())
+
+
+class LedgerTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=2)
+        cls.unit = Unit.objects.create(building=cls.building, unit_number=1, resident=cls.resident)
+        cls.other_unit = Unit.objects.create(building=cls.building, unit_number=2)
+        rebuild_counters(Building.objects.filter(pk=cls.building.pk))
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def _bill(self, **data):
+        return self.client.post(reverse("bills", args=[self.building.pk]),
+                                {"expire_date": 10, "description": "bill", **data})
+
+    def test_bill_lifecycle(self):
+        self._bill(amount="100", divide_by="unit")
+        self.assertEqual(get_balance(self.unit.pk), Decimal("50.00"))
+        single = self._bill(amount="30", unit=self.unit.pk).data["instances"]
+        self.assertEqual(get_balance(self.unit.pk), Decimal("80.00"))
+
+        self.client.post(reverse("paid", args=[single["id"]]))
+        self.assertEqual(get_balance(self.unit.pk), Decimal("50.00"))
+        first = Bill.objects.filter(unit=self.unit, is_paid=False).get()
+        self.client.delete(reverse("bill", args=[first.pk]))
+        self.assertEqual(get_balance(self.unit.pk), Decimal("0.00"))
+
+        kinds = list(LedgerEntry.objects.filter(unit=self.unit).order_by("pk").values_list("kind", "balance"))
+        self.assertEqual(kinds, [
+            (LedgerEntry.CHARGE, Decimal("50.00")), (LedgerEntry.CHARGE, Decimal("80.00")),
+            (LedgerEntry.PAYMENT, Decimal("50.00")), (LedgerEntry.ADJUSTMENT, Decimal("0.00"))])
+
+    def test_delete_bill(self):
+        bill = Bill.objects.get(pk=self._bill(amount="30", unit=self.unit.pk).data["instances"]["id"])
+        other = User.objects.create_user(username="otherManager", role=User.MANAGER)
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.delete(reverse("bill", args=[bill.pk])).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.manager)
+        self.client.post(reverse("paid", args=[bill.pk]))
+        self.assertEqual(self.client.delete(reverse("bill", args=[bill.pk])).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Bill.objects.filter(pk=bill.pk).exists())
+        self.assertEqual(get_balance(self.unit.pk), Decimal("0.00"))
+
+    def test_every_entry_has_a_counter_entry(self):
+        self._bill(amount="100", divide_by="unit")
+        self.client.post(reverse("paid", args=[Bill.objects.filter(unit=self.unit).get().pk]))
+        accounts = dict(LedgerEntry.objects.filter(building=self.building).values("account").annotate(
+            total=Sum("amount")).order_by().values_list("account", "total"))
+        self.assertEqual(accounts, {LedgerEntry.UNIT: Decimal("50.00"), LedgerEntry.INCOME: Decimal("-100.00"),
+                                    LedgerEntry.CASH: Decimal("50.00")})
+        self.assertEqual(unbalanced_postings(), [])
+
+        LedgerEntry.objects.filter(account=LedgerEntry.CASH).update(amount=40)
+        out = StringIO()
+        with self.assertRaises(SystemExit):
+            call_command("verify_ledger", stdout=out)
+        self.assertIn("found 1 unbalanced postings", out.getvalue())
+
+    def test_deleted_unit_keeps_its_postings(self):
+        self._bill(amount="100", divide_by="unit")
+        Unit.objects.filter(pk=self.other_unit.pk).delete()
+        self.assertEqual(LedgerEntry.objects.filter(account=LedgerEntry.UNIT, unit__isnull=True).count(), 1)
+        self.assertEqual(unbalanced_postings(), [])
+
+    def test_balance_is_one_row_read(self):
+        self._bill(amount="100", divide_by="unit")
+        self.client.force_authenticate(user=self.resident)
+        res = self.client.get(reverse("unit_balance", args=[self.unit.pk]))
+        self.assertEqual(res.data["balance"], Decimal("50.00"))
+        with self.assertNumQueries(1):
+            get_balance(self.unit.pk)
+
+    def test_adjustments(self):
+        res = self.client.post(reverse("unit_ledger", args=[self.unit.pk]),
+                               {"amount": "-12.5", "description": "refund"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(get_balance(self.unit.pk), Decimal("-12.50"))
+
+        self.client.force_authenticate(user=self.resident)
+        res = self.client.post(reverse("unit_ledger", args=[self.unit.pk]), {"amount": "-100", "description": "me"})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        res = self.client.get(reverse("unit_ledger", args=[self.unit.pk]))
+        self.assertEqual(len(res.data["instances"]), 1)
+        res = self.client.get(reverse("unit_ledger", args=[self.other_unit.pk]))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_recurring_charges_are_posted(self):
+        charge = RecurringCharge.objects.create(building=self.building, created_by=self.manager, amount=10,
+                                                day_of_month=1, description="service")
+        bill_charge(charge, date(2026, 10, 1))
+        self.assertEqual(get_balance(self.other_unit.pk), Decimal("5.00"))
+
+    def test_verify(self):
+        self._bill(amount="100", divide_by="unit")
+        UnitBalance.objects.filter(unit=self.unit).update(balance=1)
+        out = StringIO()
+        with self.assertRaises(SystemExit):
+            call_command("verify_ledger", stdout=out)
+        self.assertIn(f"unit {self.unit.pk}: balance 1.00 -> 50.00", out.getvalue())
+        call_command("verify_ledger", fix=True, stdout=out)
+        self.assertEqual(get_balance(self.unit.pk), Decimal("50.00"))
+        call_command("verify_ledger", stdout=out)
+        self.assertIn("found 0 drifted", out.getvalue())
+
+
+class OverdueTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.buildings = Building.objects.bulk_create(
+            [Building(owner=cls.manager, name=f"testBuilding{n}", unit_count=1) for n in range(3)])
+        units = Unit.objects.bulk_create([Unit(building=building, unit_number=1) for building in cls.buildings[:2]])
+        now = timezone.now()
+        Bill.objects.bulk_create([
+            Bill(amount=amount, created_by=cls.manager, unit=unit, description="bill", is_paid=is_paid,
+                 expire_date=now - timezone.timedelta(days=days))
+            for unit, amount, days, is_paid in (
+                (units[0], 10, 5, False), (units[0], 20, 45, False), (units[0], 40, 120, False),
+                (units[0], 80, 5, True), (units[0], 160, -5, False), (units[1], 7, 70, False),
+            )
+        ])
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def test_is_overdue_is_annotated(self):
+        # building, owner and the bills, is_overdue doesn't cost a query per bill
+        with self.assertNumQueries(3):
+            res = self.client.get(reverse("bills", args=[self.buildings[0].pk]))
+        self.assertEqual(sorted(bill["is_overdue"] for bill in res.data["instances"]), [False, False, True, True, True])
+
+    def test_building_report(self):
+        res = self.client.get(reverse("building_overdue", args=[self.buildings[0].pk]), {"limit": 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([bill["amount"] for bill in res.data["instances"]], [40, 20])
+        self.assertEqual(res.data["summary"]["count"], 3)
+        self.assertEqual(res.data["summary"]["total"], 70)
+        buckets = ("days_0_30", "days_30_60", "days_60_90", "days_90_plus")
+        self.assertEqual([res.data["summary"][key] for key in buckets], [10, 20, 0, 40])
+
+        res = self.client.get(reverse("building_overdue", args=[self.buildings[0].pk]),
+                              {"limit": 2, "cursor": res.data["next_cursor"]})
+        self.assertEqual([bill["amount"] for bill in res.data["instances"]], [10])
+
+    def test_manager_report(self):
+        with self.assertNumQueries(3):
+            res = self.client.get(reverse("manager_overdue"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row["building"], row["count"], row["total"]) for row in res.data["instances"]],
+                         [(self.buildings[0].pk, 3, 70), (self.buildings[1].pk, 1, 7), (self.buildings[2].pk, 0, 0)])
+        self.assertEqual(res.data["instances"][1]["days_60_90"], 7)
+        self.assertEqual((res.data["summary"]["count"], res.data["summary"]["total"]), (4, 77))
+
+    def test_other_manager(self):
+        other = User.objects.create_user(username="otherManager", role=User.MANAGER)
+        self.client.force_authenticate(user=other)
+        res = self.client.get(reverse("building_overdue", args=[self.buildings[0].pk]))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        res = self.client.get(reverse("manager_overdue"))
+        self.assertEqual((res.data["instances"], res.data["summary"]["count"]), ([], 0))
+
+
+class SettleBillsTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=2)
+        cls.units = Unit.objects.bulk_create([Unit(building=cls.building, unit_number=n) for n in (1, 2)])
+        other = User.objects.create_user(username="otherManager", role=User.MANAGER)
+        other_unit = Unit.objects.create(
+            building=Building.objects.create(owner=other, name="otherBuilding", unit_count=1), unit_number=1)
+        cls.period = date(2026, 10, 1)
+        cls.bills = Bill.objects.bulk_create([
+            Bill(amount=amount, created_by=cls.manager, unit=unit, expire_date=timezone.now(), description="bill",
+                 period=period)
+            for unit, amount, period in ((cls.units[0], 10, cls.period), (cls.units[1], 20, cls.period),
+                                         (cls.units[0], 40, None), (other_unit, 80, cls.period))
+        ])
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def test_settle_ids(self):
+        ids = [bill.pk for bill in self.bills]
+        Bill.objects.filter(pk=ids[1]).update(is_paid=True)
+        res = self.client.post(reverse("settle_bills"), {"bills": ids}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual((res.data["settled"], res.data["amount"]), (2, 50))
+        self.assertEqual(res.data["results"], {ids[0]: "paid", ids[1]: "already_paid", ids[2]: "paid",
+                                               ids[3]: "not_found"})
+        self.assertFalse(Bill.objects.get(pk=ids[3]).is_paid)
+        self.assertEqual(get_balance(self.units[0].pk), Decimal("-50.00"))
+
+    def test_settle_period(self):
+        res = self.client.post(reverse("settle_bills"), {"building": self.building.pk, "period": "2026-10-15"},
+                               format="json")
+        self.assertEqual(res.data["results"], {self.bills[0].pk: "paid", self.bills[1].pk: "paid"})
+        res = self.client.post(reverse("settle_bills"), {"unit": self.units[0].pk}, format="json")
+        self.assertEqual(res.data["results"], {self.bills[2].pk: "paid"})
+
+    def test_invalid(self):
+        for data in ({}, {"bills": [self.bills[0].pk], "unit": self.units[0].pk}, {"bills": []}):
+            res = self.client.post(reverse("settle_bills"), data, format="json")
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_paid_view(self):
+        url = reverse("paid", args=[self.bills[0].pk])
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(url).data["detail"], "already paid")
+        res = self.client.post(reverse("paid", args=[self.bills[3].pk]))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConcurrentSettlementTestCase(TransactionTestCase):
+
+    def test_every_bill_is_paid_once(self):
+        manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        building = Building.objects.create(owner=manager, name="testBuilding", unit_count=1)
+        unit = Unit.objects.create(building=building, unit_number=1)
+        bill_ids = [bill.pk for bill in Bill.objects.bulk_create([
+            Bill(amount=10, created_by=manager, unit=unit, expire_date=timezone.now(), description="bill")
+            for _ in range(20)])]
+        # every thread settles the same bills, each one must be paid and posted once
+        threads = 8
+        barrier = Barrier(threads)
+        settled, errors = [], []
+
+        def settle():
+            from utils.financials import settle_bills
+            try:
+                barrier.wait()
+                done = 0
+                while done < 3:
+                    try:
+                        settled.extend(bill.pk for bill in settle_bills(manager, bill_ids)[1])
+                        done += 1
+                    except OperationalError:
+                        # the in memory sqlite test database refuses concurrent writers instead of waiting,
+                        # the settlement rolled back as a whole and is tried again
+                        pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [Thread(target=settle) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(settled), bill_ids)
+        self.assertEqual(LedgerEntry.objects.filter(kind=LedgerEntry.PAYMENT, account=LedgerEntry.UNIT).count(),
+                         20)
+        self.assertEqual(get_balance(unit.pk), Decimal("-200.00"))
+
+
+class ConcurrentBillingTestCase(TransactionTestCase):
+
+    def test_every_unit_is_billed_and_posted_once(self):
+        manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        building = Building.objects.create(owner=manager, name="testBuilding", unit_count=12)
+        Unit.objects.bulk_create([Unit(building=building, unit_number=n) for n in range(1, 13)])
+        charge = RecurringCharge.objects.create(building=building, created_by=manager, amount=120, day_of_month=1,
+                                                description="service")
+        # every thread bills the same charge for the same period
+        threads = 6
+        barrier = Barrier(threads)
+        created, errors = [], []
+
+        def run():
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        created.append(bill_charge(charge, date(2026, 10, 1), chunk_size=5)[1])
+                        break
+                    except OperationalError:
+                        # the in memory sqlite test database refuses concurrent writers instead of waiting,
+                        # the chunk rolled back and the run is tried again
+                        pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [Thread(target=run) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+        # a run retried after some of its chunks committed doesn't count them again
+        self.assertLessEqual(sum(created), 12)
+        self.assertEqual(Bill.objects.filter(charge=charge).count(), 12)
+        self.assertEqual(LedgerEntry.objects.filter(kind=LedgerEntry.CHARGE, account=LedgerEntry.UNIT).count(), 12)
+
+class BillBuildingTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=2)
+        cls.unit = Unit.objects.create(building=cls.building, unit_number=1)
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def _bill(self, **kwargs):
+        return Bill(amount=10, created_by=self.manager, unit=self.unit, expire_date=timezone.now(),
+                    description="bill", **kwargs)
+
+    def test_building_is_filled_on_create(self):
+        bill = self._bill()
+        bill.save()
+        self.assertEqual(bill.building_id, self.building.pk)
+        with self.assertNumQueries(2):
+            bills = Bill.objects.bulk_create([self._bill(), self._bill()])
+        self.assertEqual({bill.building_id for bill in bills}, {self.building.pk})
+
+    def test_bill_stays_in_building_without_unit(self):
+        Bill.objects.bulk_create([self._bill()])
+        self.unit.delete()
+        res = self.client.get(reverse("bills", args=[self.building.pk]))
+        self.assertEqual(len(res.data["instances"]), 1)
+        self.assertIsNone(res.data["instances"][0]["unit"])
+
+        res = self.client.get(reverse("bill", args=[res.data["instances"][0]["id"]]))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class ExportTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=1)
+        unit = Unit.objects.create(building=cls.building, unit_number=7)
+        other_unit = Unit.objects.create(
+            building=Building.objects.create(owner=cls.manager, name="otherBuilding", unit_count=1), unit_number=1)
+        cls.bills = Bill.objects.bulk_create([
+            Bill(amount=amount, created_by=cls.manager, unit=unit, expire_date=timezone.now(), description="bill",
+                 period=period, is_paid=is_paid)
+            for amount, period, is_paid in (("10.50", date(2026, 9, 1), True), ("20.00", date(2026, 10, 1), False),
+                                            ("30.00", None, False))
+        ] + [Bill(amount=1, created_by=cls.manager, unit=other_unit, expire_date=timezone.now(), description="other")])
+        cls.url = reverse("bills_export", args=[cls.building.pk])
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def _export(self, **params):
+        res = self.client.get(self.url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return b"".join(res.streaming_content).decode()
+
+    def test_csv(self):
+        lines = self._export().splitlines()
+        self.assertEqual(lines[0].split(",")[:5], ["id", "building", "unit", "unit_number", "amount"])
+        self.assertEqual([line.split(",")[4] for line in lines[1:]], ["10.50", "20.00", "30.00"])
+
+    def test_ndjson_filters(self):
+        rows = [json.loads(line) for line in self._export(output="ndjson", is_paid="false").splitlines()]
+        self.assertEqual([(row["id"], row["amount"], row["unit_number"]) for row in rows],
+                         [(self.bills[1].pk, "20.00", 7), (self.bills[2].pk, "30.00", 7)])
+        rows = self._export(output="ndjson", period="2026-09-20").splitlines()
+        self.assertEqual([json.loads(row)["id"] for row in rows], [self.bills[0].pk])
+        # bills without a period count in the month they were created
+        rows = self._export(output="ndjson", period=str(timezone.localdate())).splitlines()
+        self.assertIn(self.bills[2].pk, [json.loads(row)["id"] for row in rows])
+
+    def test_invalid(self):
+        self.assertEqual(self.client.get(self.url, {"output": "xml"}).status_code, status.HTTP_400_BAD_REQUEST)
+        other = User.objects.create_user(username="otherManager", role=User.MANAGER)
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_asgi_stream(self):
+        from config.asgi import application
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        token = str(AccessToken.for_user(self.manager))
+        async_to_sync(application)({
+            "type": "http", "method": "GET", "path": self.url, "query_string": b"output=ndjson",
+            "headers": [(b"host", b"testserver"), (b"authorization", f"Bearer {token}".encode())],
+        }, receive, send)
+        self.assertEqual(messages[0]["status"], status.HTTP_200_OK)
+        rows = b"".join(message.get("body", b"") for message in messages[1:]).decode().splitlines()
+        self.assertEqual([json.loads(row)["id"] for row in rows], [bill.pk for bill in self.bills[:3]])
+
+    def test_command(self):
+        out = StringIO()
+        call_command("export_bills", "--unpaid", "--output", "ndjson", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+        out = StringIO()
+        call_command("export_bills", "--building", str(self.building.pk), "--period", "2026-09", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+class RollupTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=2)
+        cls.units = Unit.objects.bulk_create([Unit(building=cls.building, unit_number=n) for n in (1, 2)])
+        cls.url = reverse("building_revenue", args=[cls.building.pk])
+        cls.month = timezone.localdate().replace(day=1)
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def _totals(self, month=None):
+        rollup = MonthlyBillRollup.objects.filter(building=self.building, month=month or self.month).first()
+        return rollup and (rollup.billed, rollup.billed_count, rollup.collected, rollup.collected_count)
+
+    def test_rollups_follow_the_bills(self):
+        self.client.post(reverse("bills", args=[self.building.pk]),
+                         {"amount": "100.01", "divide_by": "unit", "expire_date": 30, "description": "water"})
+        self.client.post(reverse("bills", args=[self.building.pk]),
+                         {"amount": 5, "unit": self.units[0].pk, "expire_date": 30, "description": "key"})
+        self.assertEqual(self._totals(), (Decimal("105.01"), 3, 0, 0))
+
+        bills = list(Bill.objects.order_by("pk"))
+        self.client.post(reverse("settle_bills"), {"bills": [bills[0].pk, bills[1].pk]}, format="json")
+        self.assertEqual(self._totals(), (Decimal("105.01"), 3, Decimal("100.01"), 2))
+        self.client.delete(reverse("bill", args=[bills[2].pk]))
+        self.assertEqual(self._totals(), (Decimal("100.01"), 2, Decimal("100.01"), 2))
+        self.assertEqual(verify_rollups([self.building.pk]), [])
+
+    def test_recurring_charges_count_in_their_period(self):
+        charge = RecurringCharge.objects.create(building=self.building, created_by=self.manager, amount=60,
+                                                day_of_month=1, description="service charge")
+        bill_charge(charge, date(2025, 1, 1))
+        self.assertEqual(self._totals(date(2025, 1, 1)), (60, 2, 0, 0))
+
+    def test_revenue(self):
+        bill_charge(RecurringCharge.objects.create(building=self.building, created_by=self.manager, amount=60,
+                                                   day_of_month=1, description="service charge"), date(2025, 1, 1))
+        with self.assertNumQueries(3):
+            res = self.client.get(self.url, {"since": "2024-12-01", "until": "2025-02-10"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row["month"], row["billed"], row["outstanding"]) for row in res.data["months"]],
+                         [(date(2024, 12, 1), 0, 0), (date(2025, 1, 1), 60, 60), (date(2025, 2, 1), 0, 0)])
+        self.assertEqual(res.data["totals"]["billed_count"], 2)
+        self.assertEqual(len(self.client.get(self.url).data["months"]), 36)
+        self.assertEqual(self.client.get(self.url, {"since": "2010-01-01"}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild(self):
+        now = timezone.now()
+        Bill.objects.bulk_create([
+            Bill(amount=amount, created_by=self.manager, unit=self.units[0], expire_date=now, description="bill",
+                 is_paid=is_paid) for amount, is_paid in ((10, True), (20, False))])
+        out = StringIO()
+        with self.assertRaises(SystemExit):
+            call_command("rebuild_bill_rollups", "--check", stdout=out)
+        self.assertIn("found 1 drifted", out.getvalue())
+        call_command("rebuild_bill_rollups", stdout=StringIO())
+        self.assertEqual(self._totals(), (30, 2, 10, 1))
+        call_command("rebuild_bill_rollups", "--check", stdout=out)
+        self.assertIn("found 0 drifted", out.getvalue())
+
+    def test_fix_zeroes_stale_months(self):
+        stale = date(2020, 1, 1)
+        MonthlyBillRollup.objects.create(building=self.building, month=stale, billed=5, billed_count=1)
+        self.assertEqual(len(verify_rollups([self.building.pk], fix=True)), 1)
+        # kept for the writers that may be waiting on the row
+        self.assertEqual(self._totals(stale), (0, 0, 0, 0))
+        self.assertEqual(verify_rollups([self.building.pk]), [])
@@ -5,6 +5,15 @@ from . import views
 urlpatterns = [
     path("<int:pk>/", views.RetrieveDestroyView.as_view(), name="bill"),
     path("<int:pk>/paid/", views.PaidView.as_view(), name="paid"),
+    path("settle/", views.SettleBillsView.as_view(), name="settle_bills"),
     path("buildings/<int:pk>/", views.BillView.as_view(), name="bills"),
+    path("buildings/<int:pk>/export/", views.BillExportView.as_view(), name="bills_export"),
+    path("buildings/<int:pk>/revenue/", views.BuildingRevenueView.as_view(), name="building_revenue"),
+    path("buildings/<int:pk>/overdue/", views.BuildingOverdueView.as_view(), name="building_overdue"),
+    path("overdue/", views.ManagerOverdueView.as_view(), name="manager_overdue"),
     path("my_bills/", views.ResidentBillsView.as_view(), name="my_bills"),
+    path("buildings/<int:pk>/charges/", views.RecurringChargeView.as_view(), name="recurring_charges"),
+    path("units/<int:pk>/ledger/", views.UnitLedgerView.as_view(), name="unit_ledger"),
+    path("units/<int:pk>/balance/", views.UnitBalanceView.as_view(), name="unit_balance"),
+    path("charges/<int:pk>/", views.RetrieveDestroyRecurringChargeView.as_view(), name="recurring_charge"),
 ]
@@ -1,11 +1,14 @@
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework import status
 
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
 from utils.general import response, unauthorized
-from utils.buildings import count_all_members
 
 from buildings.custom_permission_classes import IsManager
 
@@ -15,9 +18,16 @@ from permissions import filters
 from buildings.models import Building, Unit
 
 from . import serializers as cs
-from .models import Bill
+from .models import Bill, RecurringCharge, LedgerEntry
 
-from utils.financials import get_expire_date, check_serializer_keys
+from utils.financials import (
+    get_expire_date, check_serializer_keys, create_bills, overdue_summary, overdue_by_building, settle_bills, PAID,
+    ALREADY_PAID)
+from utils.exports import export_bills, filter_bills, CONTENT_TYPES
+from utils.idempotency import idempotent
+from utils.pagination import paginate
+from utils.rollups import get_revenue
+from utils.ledger import post_charges, cancel_charge, adjust, get_balance
 
 """
 The view has two methods:
@@ -35,9 +45,11 @@ class BillView(APIView):
     def get(self, request, pk):
         building = get_object_or_404(Building, pk=pk)
         has_obj_permission(request, obj=building.owner, raise_exception=True)
-        bills = Bill.objects.filter(unit__building=building)
-        return response(status.HTTP_200_OK, instance=bills, serializer=cs.BillSerializer, many=True)
+        bills = Bill.objects.with_overdue().filter(building=building)
+        return response(status.HTTP_200_OK, instance=bills, serializer=cs.BillSerializer, many=True,
+                        request=request, ordering=("-pk",))
 
+    @idempotent
     def post(self, request, pk):
         serializer = cs.NewBillSerializer(data=request.data)
         if not serializer.is_valid():
@@ -48,42 +60,45 @@ class BillView(APIView):
         check_serializer_keys(data)
         expire_date = get_expire_date(data)
         created_by = request.user
-        amount = data["amount"]
+        amount = serializer.validated_data["amount"]
         if unit_pk := data.get("unit"):
             unit = get_object_or_404(Unit, pk=unit_pk)
             if unit.building != building:
                 return unauthorized()
 
-            bill = Bill.objects.create(amount=amount, created_by=created_by, unit=unit, expire_date=expire_date)
-            bill.save()
+            with transaction.atomic():
+                bill = Bill.objects.create(amount=amount, created_by=created_by, unit=unit, building=building,
+                                           expire_date=expire_date)
+                post_charges([bill])
             bill.refresh_from_db()
             return response(status.HTTP_201_CREATED, instance=bill, serializer=cs.BillSerializer)
         if divide_by := data.get("divide_by"):
-            bills = list()
-            units = building.units.all()
-            if divide_by == serializer.UNIT:
-                amount_per_unit = amount / units.count()
-                bills = Bill.objects.bulk_create(
-                    [
-                        Bill(
-                            amount=amount_per_unit, created_by=created_by,
-                            unit=u, expire_date=expire_date) for u in units
-                    ]
-                )
-            if divide_by == serializer.MEMBER:
-                all_members = count_all_members(units)["all_members"]
-                amount_per_member = amount / all_members
-
-                bills = Bill.objects.bulk_create(
-                    [
-                        Bill(
-                            amount=amount_per_member * u.members, created_by=request.user,
-                            unit=u, expire_date=expire_date) for u in units
-                    ]
-                )
-
+            bills = create_bills(building, amount, divide_by, serializer.validated_data.get("weights"),
+                                 created_by=created_by, expire_date=expire_date, description=data["description"])
             return response(status.HTTP_201_CREATED, instance=bills, serializer=cs.BillSerializer, many=True)
 
+
+class BillExportView(APIView):
+    """
+    every bill of a building as a CSV or newline delimited JSON stream for accounting
+    """
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def get(self, request, pk):
+        # a plain dict, a QueryDict turns a missing is_paid into False
+        serializer = cs.BillExportSerializer(data=request.query_params.dict())
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        building = get_object_or_404(Building, pk=pk)
+        has_obj_permission(request, obj=building.owner, raise_exception=True)
+        data = serializer.validated_data
+        bills = filter_bills(Bill.objects.filter(building=building), data.get("period"), data.get("is_paid"))
+        output = data["output"]
+        stream = StreamingHttpResponse(export_bills(bills, output), content_type=CONTENT_TYPES[output])
+        period = f"-{data['period']:%Y-%m}" if "period" in data else ""
+        stream["Content-Disposition"] = f'attachment; filename="bills-{building.pk}{period}.{output}"'
+        return stream
+
 """
 This is a view that handles GET requests for bills that belong to a specific resident. The view filters bills by the user's residence and returns them serialized using BillSerializer.
 
@@ -94,8 +109,9 @@ class ResidentBillsView(APIView):
     def get(self, request):
         if request.user.is_manager:
             return response(status.HTTP_400_BAD_REQUEST, detail=f"use {BillView.__name__}")
-        resident_bills = Bill.objects.filter(unit__resident=request.user)
-        return response(status.HTTP_200_OK, instance=resident_bills, serializer=cs.BillSerializer, many=True)
+        resident_bills = Bill.objects.with_overdue().filter(unit__resident=request.user)
+        return response(status.HTTP_200_OK, instance=resident_bills, serializer=cs.BillSerializer, many=True,
+                        request=request, ordering=("-pk",))
 
 """
 It seems that the PaidView API view is used to update a bill as paid by a manager. The view only allows POST requests and requires authentication as well as the IsManager permission.
@@ -106,15 +122,32 @@ class PaidView(APIView):
     permission_classes = [IsAuthenticated, IsManager]
 
     def post(self, request, pk):
-        if bill := Bill.objects.filter(pk=pk, unit__building__owner=request.user).first():
-            if bill.is_paid:
-                return response(status.HTTP_400_BAD_REQUEST, detail="already paid")
-            bill.is_paid = True
-            bill.save()
+        _, _, outcomes = settle_bills(request.user, [pk])
+        if outcomes[pk] == PAID:
             return response(status.HTTP_200_OK, detail="paid")
+        if outcomes[pk] == ALREADY_PAID:
+            return response(status.HTTP_400_BAD_REQUEST, detail="already paid")
         return response(
             status.HTTP_400_BAD_REQUEST, detail="bill either not found or its not for this manager buildings")
 
+
+class SettleBillsView(APIView):
+    """
+    pay many bills of the manager buildings at once, by id or by building, unit and period
+    """
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def post(self, request):
+        serializer = cs.SettleBillsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        data = serializer.validated_data
+        bill_filters = {key: data[key] for key in ("building", "unit", "period") if key in data}
+        settlement, settled, outcomes = settle_bills(request.user, data.get("bills"), **bill_filters)
+        return response(status.HTTP_200_OK, settlement=settlement, settled=len(settled),
+                        amount=sum(bill.amount for bill in settled),
+                        results=outcomes or {bill.pk: PAID for bill in settled})
+
 """
 The RetrieveDestroyView class seems to be an API view for retrieving and deleting a specific bill. Here is a breakdown of its methods:
 
@@ -125,19 +158,156 @@ delete: This method is used for deleting a specific bill instance. It first chec
 class RetrieveDestroyView(APIView):
 
     def get(self, request, pk):
-        bill = get_object_or_404(Bill, pk=pk)
-        is_bill_owner = has_obj_permission(request, obj=bill.unit.resident)
-        is_building_manager = has_obj_permission(request, obj=bill.unit.building.owner)
+        bill = get_object_or_404(Bill.objects.with_overdue().select_related("unit", "building"), pk=pk)
+        is_bill_owner = bill.unit is not None and has_obj_permission(request, pk=bill.unit.resident_id)
+        is_building_manager = bill.building is not None and has_obj_permission(request, pk=bill.building.owner_id)
         if is_bill_owner or is_building_manager:
             return response(status.HTTP_200_OK, instance=bill, serializer=cs.BillSerializer)
         return response(status.HTTP_401_UNAUTHORIZED)
 
     def delete(self, request, pk):
-        bill = get_object_or_404(Bill, pk=pk)
+        bill = get_object_or_404(Bill.objects.select_related("building"), pk=pk)
         has_permission(request, filters.IS_MANAGER, raise_exception=True)
+        has_obj_permission(request, pk=bill.building and bill.building.owner_id, raise_exception=True)
+
+        with transaction.atomic():
+            # locked unpaid, so a settlement can't pay it before it is deleted
+            bill = Bill.objects.select_for_update().filter(pk=pk, is_paid=False).first()
+            if bill is None:
+                return response(
+                    status.HTTP_400_BAD_REQUEST, detail="you can't delete a bill that's already has been paid")
+            cancel_charge(bill, created_by=request.user)
+            bill.delete()
+        return response(status.HTTP_204_NO_CONTENT)
+
 
-        if bill.is_paid:
-            return response(
-                status.HTTP_400_BAD_REQUEST, detail="you can't delete a bill that's already has been paid")
-        bill.delete()
+class RecurringChargeView(APIView):
+    """
+    monthly charges of a building, billed by the generate_recurring_bills command
+    """
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def get(self, request, pk):
+        building = get_object_or_404(Building, pk=pk)
+        has_obj_permission(request, obj=building.owner, raise_exception=True)
+        charges = RecurringCharge.objects.filter(building=building)
+        return response(status.HTTP_200_OK, instance=charges, serializer=cs.RecurringChargeSerializer, many=True,
+                        request=request)
+
+    def post(self, request, pk):
+        building = get_object_or_404(Building, pk=pk)
+        has_obj_permission(request, obj=building.owner, raise_exception=True)
+        serializer = cs.RecurringChargeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        charge = serializer.save(building=building, created_by=request.user)
+        return response(status.HTTP_201_CREATED, instance=charge, serializer=cs.RecurringChargeSerializer)
+
+
+class RetrieveDestroyRecurringChargeView(APIView):
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def get(self, request, pk):
+        charge = get_object_or_404(RecurringCharge.objects.select_related("building"), pk=pk)
+        has_obj_permission(request, obj=charge.building.owner, raise_exception=True)
+        return response(status.HTTP_200_OK, instance=charge, serializer=cs.RecurringChargeSerializer)
+
+    def delete(self, request, pk):
+        """
+        stops the charge, the bills it already generated are kept
+        """
+        charge = get_object_or_404(RecurringCharge.objects.select_related("building"), pk=pk)
+        has_obj_permission(request, obj=charge.building.owner, raise_exception=True)
+        charge.is_active = False
+        charge.save(update_fields=["is_active"])
         return response(status.HTTP_204_NO_CONTENT)
+
+
+def _get_unit_for(request, pk, manager_only=False) -> Unit:
+    unit = get_object_or_404(Unit.objects.select_related("building"), pk=pk)
+    is_building_manager = has_obj_permission(request, obj=unit.building.owner)
+    is_resident = not manager_only and has_obj_permission(request, obj=unit.resident)
+    if not (is_building_manager or is_resident):
+        raise PermissionDenied
+    return unit
+
+
+class UnitLedgerView(APIView):
+    """
+    ledger entries of a unit, newest first. the manager of the building can post adjustments
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        unit = _get_unit_for(request, pk)
+        entries = LedgerEntry.objects.filter(unit=unit)
+        return response(status.HTTP_200_OK, instance=entries, serializer=cs.LedgerEntrySerializer, many=True,
+                        request=request, ordering=("-pk",))
+
+    def post(self, request, pk):
+        unit = _get_unit_for(request, pk, manager_only=True)
+        serializer = cs.AdjustmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        data = serializer.validated_data
+        entry = adjust(unit.pk, data["amount"], request.user, data["description"])
+        return response(status.HTTP_201_CREATED, instance=entry, serializer=cs.LedgerEntrySerializer)
+
+
+class UnitBalanceView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        unit = _get_unit_for(request, pk)
+        return response(status.HTTP_200_OK, unit=unit.pk, balance=get_balance(unit.pk))
+
+
+class BuildingOverdueView(APIView):
+    """
+    overdue totals of a building with a page of its overdue bills, oldest first
+    """
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def get(self, request, pk):
+        building = get_object_or_404(Building, pk=pk)
+        has_obj_permission(request, obj=building.owner, raise_exception=True)
+        now = timezone.now()
+        bills = Bill.objects.filter(building=building)
+        return response(status.HTTP_200_OK, instance=bills.overdue(now).with_overdue(now),
+                        serializer=cs.BillSerializer, many=True, request=request, ordering=("expire_date", "pk"),
+                        summary=overdue_summary(bills, now))
+
+
+class ManagerOverdueView(APIView):
+    """
+    overdue totals of every building of the manager and of all of them together
+    """
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def get(self, request):
+        now = timezone.now()
+        buildings, page = paginate(Building.objects.filter(owner=request.user), request)
+        summaries = overdue_by_building([building.pk for building in buildings], now)
+        return response(
+            status.HTTP_200_OK,
+            instances=[{"building": building.pk, "name": building.name, **summaries[building.pk]}
+                       for building in buildings],
+            summary=overdue_summary(Bill.objects.filter(building__owner=request.user), now),
+            **page,
+        )
+
+
+class BuildingRevenueView(APIView):
+    """
+    monthly billed, collected and outstanding totals of a building, read from the monthly rollups
+    """
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def get(self, request, pk):
+        serializer = cs.RevenueSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        building = get_object_or_404(Building, pk=pk)
+        has_obj_permission(request, obj=building.owner, raise_exception=True)
+        data = serializer.validated_data
+        return response(status.HTTP_200_OK, **get_revenue(building.pk, data.get("since"), data.get("until")))
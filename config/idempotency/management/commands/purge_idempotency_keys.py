@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from utils.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = "delete the expired idempotency keys and their stored responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"purged {purge_expired(options['batch_size'])} expired keys")
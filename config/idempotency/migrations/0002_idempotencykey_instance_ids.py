@@ -0,0 +1,18 @@
+# Generated by Django 4.1.3 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('idempotency', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='instance_ids',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.1.3 on 2026-10-18 19:40
+
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+
+def compress_responses(apps, schema_editor):
+    """
+    the stored responses become compressed bodies. the ones kept as instance ids can't be replayed as they were
+    and are dropped, the next request with their key runs again
+    """
+    IdempotencyKey = apps.get_model("idempotency", "IdempotencyKey")
+    IdempotencyKey.objects.filter(instance_ids__isnull=False).delete()
+    keys = IdempotencyKey.objects.filter(status_code__isnull=False)
+    for record in keys.iterator():
+        body = json.dumps(record.response, cls=DjangoJSONEncoder) if record.response is not None else ""
+        record.body = zlib.compress(body.encode())
+        record.save(update_fields=["body"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('idempotency', '0002_idempotencykey_instance_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='body',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(compress_responses, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='idempotencykey',
+            name='instance_ids',
+        ),
+        migrations.RemoveField(
+            model_name='idempotencykey',
+            name='response',
+        ),
+    ]
@@ -0,0 +1,142 @@
+from io import StringIO
+from threading import Barrier, Thread
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from users.models import User
+from buildings.models import Building, Unit
+from financials.models import Bill
+from tickets.models import Ticket
+from utils import quota
+from .models import IdempotencyKey
+
+
+class IdempotencyTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=3)
+        Unit.objects.create(building=cls.building, unit_number=1, resident=cls.resident)
+        Unit.objects.bulk_create([Unit(building=cls.building, unit_number=n) for n in (2, 3)])
+        cls.bills_url = reverse("bills", args=[cls.building.pk])
+        cls.bill = {"amount": 100, "divide_by": "unit", "expire_date": 30, "description": "water"}
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_authenticate(user=self.manager)
+
+    def _post_bills(self, data, key="retry-1"):
+        return self.client.post(self.bills_url, data, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_response(self):
+        first = self._post_bills(self.bill)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        with CaptureQueriesContext(connection) as queries:
+            retry = self._post_bills(self.bill)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertFalse([query for query in queries if "financials_" in query["sql"]])
+        self.assertEqual(Bill.objects.count(), 3)
+
+    def test_replay_is_the_original_response(self):
+        first = self._post_bills(self.bill)
+        Bill.objects.filter(pk=first.json()["instances"][0]["id"]).update(is_paid=True)
+        Bill.objects.filter(pk=first.json()["instances"][1]["id"]).delete()
+        with CaptureQueriesContext(connection) as queries:
+            retry = self._post_bills(self.bill)
+        self.assertEqual(retry.json(), first.json())
+        self.assertFalse([query for query in queries if "financials_" in query["sql"]])
+
+    def test_keys_are_per_request(self):
+        self._post_bills(self.bill)
+        self.assertEqual(self._post_bills({**self.bill, "amount": 200}).status_code,
+                         status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(self._post_bills(self.bill, key="retry-2").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post(self.bills_url, self.bill, format="json").status_code,
+                         status.HTTP_201_CREATED)
+        self.assertEqual(Bill.objects.count(), 9)
+
+    def test_keys_are_per_user(self):
+        self._post_bills(self.bill)
+        self.client.force_authenticate(user=self.resident)
+        res = self.client.post(reverse("tickets"), {"title": "noise", "message": "again"},
+                               HTTP_IDEMPOTENCY_KEY="retry-1")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(QUOTAS={quota.TICKETS: {"limit": 0, "window": 3600}})
+    def test_failed_request_releases_the_key(self):
+        self.client.force_authenticate(user=self.resident)
+        res = self.client.post(reverse("tickets"), {"title": "noise", "message": "again"},
+                               HTTP_IDEMPOTENCY_KEY="ticket-1")
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_expired_key_runs_again(self):
+        self._post_bills(self.bill)
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        self.assertNotIn("Idempotent-Replayed", self._post_bills(self.bill))
+        self.assertEqual(Bill.objects.count(), 6)
+
+    def test_purge(self):
+        self._post_bills(self.bill)
+        self._post_bills(self.bill, key="retry-2")
+        IdempotencyKey.objects.filter(key="retry-1").update(expires_at=timezone.now())
+        out = StringIO()
+        call_command("purge_idempotency_keys", stdout=out)
+        self.assertIn("purged 1", out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["retry-2"])
+
+
+class ConcurrentIdempotencyTestCase(TransactionTestCase):
+
+    def test_duplicates_create_one_ticket(self):
+        manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        building = Building.objects.create(owner=manager, name="testBuilding", unit_count=1)
+        Unit.objects.create(building=building, unit_number=1, resident=resident)
+        # every thread sends the same request with the same key
+        threads = 6
+        barrier = Barrier(threads)
+        statuses, errors = [], []
+
+        def post():
+            client = APIClient()
+            client.force_authenticate(user=resident)
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        res = client.post(reverse("tickets"), {"title": "leak", "message": "kitchen"},
+                                          HTTP_IDEMPOTENCY_KEY="ticket-1")
+                        break
+                    except OperationalError:
+                        # the in memory sqlite test database refuses concurrent writers instead of waiting,
+                        # the request rolled back as a whole and is sent again
+                        pass
+                statuses.append(res.status_code)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [Thread(target=post) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(statuses, [status.HTTP_201_CREATED] * threads)
+        self.assertEqual(Ticket.objects.count(), 1)
@@ -7,6 +7,7 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from .models import Question, Choice, Vote
 from .serializer import QuestionSerializer, ChoiceSerializer
 from buildings.custom_permission_classes import IsManager
+from utils.general import response
 
 # Create your views here.
 
@@ -15,8 +16,8 @@ class QuestionView(APIView):
 
     def get(self,request):
         question = Question.objects.all()
-        serializer = QuestionSerializer(question, many=True)
-        return Response(status=status.HTTP_200_OK, data=serializer.data)
+        return response(status.HTTP_200_OK, instance=question, serializer=QuestionSerializer, many=True,
+                        request=request, ordering=("-pk",))
 
     def post(self,request):
         serializer = QuestionSerializer(data=request.data)
@@ -39,8 +40,8 @@ class ChoiceView(APIView):
 
     def get(self,request):
         choices = Choice.objects.all()
-        serializer = ChoiceSerializer(choices, many=True)
-        return Response(status=status.HTTP_200_OK, data=serializer.data)
+        return response(status.HTTP_200_OK, instance=choices, serializer=ChoiceSerializer, many=True,
+                        request=request)
 
 
 class VoteView(APIView):
@@ -66,5 +67,5 @@ class ResultView(APIView):
     permission_classes = [IsAdminUser]
     def get(self,request,qid):
         choice = Choice.objects.filter(question=qid)
-        serializer = ChoiceSerializer(choice, many=True)
-        return Response(status=status.HTTP_200_OK, data=serializer.data)
\ No newline at end of file
+        return response(status.HTTP_200_OK, instance=choice, serializer=ChoiceSerializer, many=True,
+                        request=request)
\ No newline at end of file
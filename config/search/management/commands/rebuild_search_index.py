@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from utils import search
+
+
+class Command(BaseCommand):
+    help = "rebuild the full-text search index of ads, announcements and tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError("full-text search needs the sqlite database backend")
+        with transaction.atomic():
+            counts = search.rebuild_index(options["chunk_size"])
+        for kind, count in counts.items():
+            self.stdout.write(f"indexed {count} {kind}s")
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+from utils import search
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    MAX_LIMIT = 50
+
+    q = serializers.CharField(max_length=200)
+    kinds = serializers.MultipleChoiceField(choices=list(search.KIND_CODES), required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, default=20)
+    offset = serializers.IntegerField(min_value=0, max_value=1000, default=0)
+
+    def create(self, validated_data):
+        pass
+
+    def update(self, instance, validated_data):
+        pass
@@ -0,0 +1,50 @@
+"""
+keep the full-text index in sync with the searchable models. bulk_create and queryset.update() don't
+send these signals, run the rebuild_search_index command after bulk changes to searchable text
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from advertisements.models import Advertisement
+from announcements.models import Announcement
+from buildings.models import UnitSpecification
+from tickets.models import Ticket
+
+from utils import search
+
+
+@receiver(post_save, sender=Advertisement)
+def index_advertisement(sender, instance, **kwargs):
+    search.index_objects(search.AD, [instance])
+
+
+@receiver(post_save, sender=UnitSpecification)
+def index_unit_specification_ads(sender, instance, created, **kwargs):
+    if not created:
+        ads = Advertisement.objects.filter(unit_specification=instance).select_related("unit_specification")
+        search.index_objects(search.AD, ads)
+
+
+@receiver(post_save, sender=Announcement)
+def index_announcement(sender, instance, **kwargs):
+    search.index_objects(search.ANNOUNCEMENT, [instance])
+
+
+@receiver(post_save, sender=Ticket)
+def index_ticket(sender, instance, **kwargs):
+    search.index_objects(search.TICKET, [instance])
+
+
+@receiver(post_delete, sender=Advertisement)
+def remove_advertisement(sender, instance, **kwargs):
+    search.remove_objects(search.AD, [instance.pk])
+
+
+@receiver(post_delete, sender=Announcement)
+def remove_announcement(sender, instance, **kwargs):
+    search.remove_objects(search.ANNOUNCEMENT, [instance.pk])
+
+
+@receiver(post_delete, sender=Ticket)
+def remove_ticket(sender, instance, **kwargs):
+    search.remove_objects(search.TICKET, [instance.pk])
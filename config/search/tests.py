@@ -0,0 +1,60 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from users.models import User
+from buildings.models import Building, Unit
+from announcements.models import Announcement
+from tickets.models import Ticket
+from utils import search
+
+
+class SearchTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("search")
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        cls.stranger = User.objects.create_user(username="testStranger", role=User.RESIDENT)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=1)
+        Unit.objects.create(building=cls.building, unit_number=1, resident=cls.resident)
+        cls.announcement = Announcement.objects.create(
+            building=cls.building, poster=cls.manager, title="Elevator maintenance",
+            description="the elevator is out of service on monday")
+        Announcement.objects.create(
+            building=cls.building, poster=cls.manager, title="Parking", description="elevator mentioned once")
+        cls.ticket = Ticket.objects.create(
+            building=cls.building, from_user=cls.resident, to_user=cls.manager, title="Broken elevator",
+            message="please fix")
+
+    def _search(self, user, q):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.url, {"q": q})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(result["kind"], result["instance"]["id"]) for result in response.json()["results"]]
+
+    def test_ranked_and_scoped_results(self):
+        results = self._search(self.resident, "elevator")
+        announcements = [object_id for kind, object_id in results if kind == search.ANNOUNCEMENT]
+        self.assertEqual(announcements[0], self.announcement.pk)
+        self.assertEqual(len(announcements), 2)
+        self.assertIn((search.TICKET, self.ticket.pk), results)
+        self.assertEqual(self._search(self.stranger, "elevator"), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.ticket.title = "Leaking roof"
+        self.ticket.save()
+        self.assertNotIn((search.TICKET, self.ticket.pk), self._search(self.manager, "broken"))
+        self.assertIn((search.TICKET, self.ticket.pk), self._search(self.manager, "leak"))
+        self.announcement.delete()
+        self.assertEqual(len(self._search(self.manager, "monday")), 0)
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self._search(self.manager, 'elevator" OR "'), [])
+
+    def test_rebuild(self):
+        self.assertEqual(search.rebuild_index(), {search.AD: 0, search.ANNOUNCEMENT: 2, search.TICKET: 1})
@@ -0,0 +1,41 @@
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework import status
+
+from advertisements.serializers import AdSearchResultSerializer
+from announcements.serializers import AnnouncementSerializer
+from tickets.serializers import TicketSerializer
+
+from utils.general import response
+from utils import search
+
+from . import serializers as cs
+
+RESULT_SERIALIZERS = {
+    search.AD: AdSearchResultSerializer,
+    search.ANNOUNCEMENT: AnnouncementSerializer,
+    search.TICKET: TicketSerializer,
+}
+
+
+class SearchView(APIView):
+    """
+    full-text search over ads, announcements and tickets ranked by relevance.
+    users only get announcements of their buildings and their own (or their buildings) tickets
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not search.is_supported():
+            return response(status.HTTP_501_NOT_IMPLEMENTED, detail="full-text search is not available")
+        serializer = cs.SearchQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        data = serializer.validated_data
+        results = search.search(
+            request.user, data["q"], list(data.get("kinds") or search.KIND_CODES), data["limit"], data["offset"])
+        return response(status.HTTP_200_OK, results=[
+            {"kind": result["kind"], "rank": result["rank"],
+             "instance": RESULT_SERIALIZERS[result["kind"]](result["instance"]).data}
+            for result in results
+        ])
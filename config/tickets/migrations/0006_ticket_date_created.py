@@ -0,0 +1,23 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:17
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0005_remove_ticket_message_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='date_created',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['from_user', 'date_created'], name='tickets_tic_from_us_0dd8da_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0006_ticket_date_created'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['to_user', 'seen', 'id'], name='tickets_tic_to_user_f6c97b_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.1.3 on 2026-10-18 18:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0010_unitspecification_search_indexes'),
+        ('tickets', '0007_ticket_tickets_tic_to_user_f6c97b_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSLA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('responded', models.IntegerField(default=0)),
+                ('total_response_seconds', models.BigIntegerField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='first_response_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='priority',
+            field=models.SmallIntegerField(choices=[(0, 'low'), (1, 'normal'), (2, 'high'), (3, 'urgent')], default=1),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='status',
+            field=models.CharField(choices=[('OPEN', 'open'), ('PROGRESS', 'in progress'), ('CLOSED', 'closed')], default='OPEN', max_length=8),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('closed_at__isnull', True)), fields=['to_user', '-priority', 'date_created', 'id'], name='ticket_queue_idx'),
+        ),
+        migrations.AddField(
+            model_name='ticketsla',
+            name='building',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_sla', to='buildings.building'),
+        ),
+    ]
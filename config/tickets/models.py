@@ -1,14 +1,61 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 from buildings.models import Building
 
 
 class Ticket(models.Model):
+    OPEN = "OPEN"
+    IN_PROGRESS = "PROGRESS"
+    CLOSED = "CLOSED"
+    status_choices = (
+        (OPEN, "open"),
+        (IN_PROGRESS, "in progress"),
+        (CLOSED, "closed")
+    )
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+    URGENT = 3
+    priority_choices = (
+        (LOW, "low"),
+        (NORMAL, "normal"),
+        (HIGH, "high"),
+        (URGENT, "urgent")
+    )
     building = models.ForeignKey(Building, on_delete=models.CASCADE)
     from_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="sent_tickets")
     to_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     title = models.CharField(max_length=80)
     message = models.TextField()
     seen = models.BooleanField(default=False, null=True)
+    date_created = models.DateTimeField(default=timezone.now)
+    status = models.CharField(max_length=8, choices=status_choices, default=OPEN)
+    priority = models.SmallIntegerField(choices=priority_choices, default=NORMAL)
+    first_response_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["from_user", "date_created"]),
+            models.Index(fields=["to_user", "seen", "id"]),
+            # the manager queue: only tickets that are still open, in the order they are served
+            models.Index(fields=["to_user", "-priority", "date_created", "id"], name="ticket_queue_idx",
+                         condition=models.Q(closed_at__isnull=True)),
+        ]
+
+
+class TicketSLA(models.Model):
+    """
+    time to first response of the tickets of a building, kept as a histogram that is updated when a ticket gets its
+    first response. RESPONSE_BUCKETS are the upper bounds (in minutes) of the histogram buckets, the last bucket
+    has no upper bound
+    """
+    RESPONSE_BUCKETS = [5, 15, 30, 60, 120, 240, 480, 720, 1440, 2880, 4320, 10080]
+
+    building = models.OneToOneField(Building, on_delete=models.CASCADE, related_name="ticket_sla")
+    responded = models.IntegerField(default=0)
+    total_response_seconds = models.BigIntegerField(default=0)
+    histogram = models.JSONField(default=list)
 
@@ -13,11 +13,37 @@ class MangerNewTicketSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ticket
-        fields = ["building", "from_user", "to_user", "title", "message"]
+        fields = ["building", "from_user", "to_user", "title", "message", "priority"]
         read_only_fields = ["from_user"]
 
 
 class ResidentNewTicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
-        fields = ["title", "message"]
+        fields = ["title", "message", "priority"]
+
+
+class InboxSerializer(serializers.Serializer):
+    unread = serializers.BooleanField(default=False)
+
+
+class MarkSeenSerializer(serializers.Serializer):
+    MAX_IDS = 500
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False,
+                                max_length=MAX_IDS, required=False)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if not attrs["all"] and "ids" not in attrs:
+            raise serializers.ValidationError("send the ids to mark or all=true")
+        return attrs
+
+
+class TicketStatusSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Ticket.status_choices)
+    priority = serializers.ChoiceField(choices=Ticket.priority_choices, required=False)
+
+
+class QueueSerializer(serializers.Serializer):
+    building = serializers.IntegerField(min_value=1, required=False)
@@ -1,3 +1,185 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from users.models import User
+from buildings.models import Building, Unit
+from tickets.models import Ticket, TicketSLA
+from utils import quota, tickets
+
+
+@override_settings(QUOTAS={quota.TICKETS: {"limit": 3, "window": 3600}})
+class TicketQuotaTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("tickets")
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=10)
+        cls.residents = User.objects.bulk_create(
+            [User(username=f"resident_{n}", role=User.RESIDENT) for n in range(10)])
+        Unit.objects.bulk_create(
+            [Unit(building=cls.building, unit_number=n + 1, resident=r) for n, r in enumerate(cls.residents)])
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_burst_from_many_residents(self):
+        statuses = []
+        for resident in self.residents:
+            self.client.force_authenticate(user=resident)
+            statuses += [self.client.post(self.url, {"title": "noise", "message": "again"}).status_code
+                         for _ in range(5)]
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), 30)
+        self.assertEqual(statuses.count(status.HTTP_429_TOO_MANY_REQUESTS), 20)
+        self.assertEqual(Ticket.objects.count(), 30)
+
+    def test_failed_create_gives_the_slot_back(self):
+        self.client.force_authenticate(user=self.residents[0])
+        with mock.patch("tickets.views.Ticket.objects.create", side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.url, {"title": "noise", "message": "again"})
+        statuses = [self.client.post(self.url, {"title": "noise", "message": "again"}).status_code for _ in range(4)]
+        self.assertEqual(statuses, [status.HTTP_201_CREATED] * 3 + [status.HTTP_429_TOO_MANY_REQUESTS])
+
+
+class InboxTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("inbox")
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=2)
+        Unit.objects.create(building=cls.building, unit_number=1, resident=cls.resident)
+        Unit.objects.create(building=cls.building, unit_number=2)
+        cls.tickets = Ticket.objects.bulk_create([
+            Ticket(building=cls.building, from_user=cls.manager, to_user=cls.resident, title=f"ticket {n}",
+                   message="message", seen=n < 2)
+            for n in range(5)
+        ])
+        Ticket.objects.create(building=cls.building, from_user=cls.resident, to_user=cls.manager, title="other",
+                              message="message")
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.resident)
+
+    def test_inbox_is_not_duplicated_by_units(self):
+        res = self.client.get(reverse("tickets"))
+        self.assertEqual(len(res.data["instances"]), 5)
+
+    def test_inbox_with_unread_count(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(self.url, {"limit": 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["unread"], 3)
+        self.assertEqual([t["title"] for t in res.data["instances"]], ["ticket 4", "ticket 3"])
+        self.assertIsNotNone(res.data["next_cursor"])
+
+        res = self.client.get(self.url, {"unread": "true"})
+        self.assertEqual(len(res.data["instances"]), 3)
+
+    def test_mark_seen(self):
+        ids = [self.tickets[2].pk, self.tickets[3].pk, self.tickets[0].pk]
+        with self.assertNumQueries(1):
+            res = self.client.post(reverse("inbox_seen"), {"ids": ids}, format="json")
+        self.assertEqual(res.data["marked"], 2)
+        self.assertEqual(self.client.get(self.url).data["unread"], 1)
+
+        res = self.client.post(reverse("inbox_seen"), {"all": True}, format="json")
+        self.assertEqual(res.data["marked"], 1)
+
+    def test_mark_seen_needs_ids_or_all(self):
+        res = self.client.post(reverse("inbox_seen"), {}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cannot_mark_tickets_of_others(self):
+        other = Ticket.objects.get(to_user=self.manager)
+        res = self.client.post(reverse("inbox_seen"), {"ids": [other.pk]}, format="json")
+        self.assertEqual(res.data["marked"], 0)
+
+    def test_retrieve_marks_seen(self):
+        ticket = self.tickets[4]
+        res = self.client.get(reverse("ticket", args=[ticket.pk]))
+        self.assertTrue(res.data["instances"]["seen"])
+        ticket.refresh_from_db()
+        self.assertTrue(ticket.seen)
+
+
+class TicketQueueTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        cls.buildings = [
+            Building.objects.create(owner=cls.manager, name=f"testBuilding{n}", unit_count=1) for n in range(2)]
+        Unit.objects.create(building=cls.buildings[0], unit_number=1, resident=cls.resident)
+        now = timezone.now()
+        cls.tickets = Ticket.objects.bulk_create([
+            Ticket(building=building, from_user=cls.resident, to_user=cls.manager, title=title, message="message",
+                   priority=priority, date_created=now - timezone.timedelta(hours=hours))
+            for building, title, priority, hours in [
+                (cls.buildings[0], "old normal", Ticket.NORMAL, 10),
+                (cls.buildings[1], "new urgent", Ticket.URGENT, 1),
+                (cls.buildings[1], "new normal", Ticket.NORMAL, 2),
+                (cls.buildings[0], "old urgent", Ticket.URGENT, 5),
+            ]
+        ])
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(user=self.manager)
+
+    def test_queue_across_buildings(self):
+        res = self.client.get(reverse("ticket_queue"))
+        self.assertEqual([t["title"] for t in res.data["instances"]],
+                         ["old urgent", "new urgent", "old normal", "new normal"])
+
+        res = self.client.get(reverse("ticket_queue"), {"building": self.buildings[1].pk, "limit": 1})
+        self.assertEqual([t["title"] for t in res.data["instances"]], ["new urgent"])
+        res = self.client.get(reverse("ticket_queue"), {"building": self.buildings[1].pk,
+                                                        "cursor": res.data["next_cursor"]})
+        self.assertEqual([t["title"] for t in res.data["instances"]], ["new normal"])
+
+    def test_closed_tickets_leave_the_queue(self):
+        res = self.client.post(reverse("ticket_status", args=[self.tickets[3].pk]), {"status": Ticket.CLOSED})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(res.data["instances"]["closed_at"])
+        res = self.client.get(reverse("ticket_queue"))
+        self.assertNotIn("old urgent", [t["title"] for t in res.data["instances"]])
+
+    def test_only_receiver_changes_status(self):
+        self.client.force_authenticate(user=self.resident)
+        res = self.client.post(reverse("ticket_status", args=[self.tickets[0].pk]), {"status": Ticket.CLOSED})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_sla_is_updated_on_first_response(self):
+        # responded after 10h, 1h and 2h, the second status change of a ticket isn't a new response
+        for ticket in self.tickets[:3]:
+            self.client.post(reverse("ticket_status", args=[ticket.pk]), {"status": Ticket.IN_PROGRESS})
+        self.client.post(reverse("ticket_status", args=[self.tickets[0].pk]), {"status": Ticket.CLOSED})
+
+        sla = TicketSLA.objects.get(building=self.buildings[1])
+        self.assertEqual(sla.responded, 2)
+        res = self.client.get(reverse("buildings_tickets_sla", args=[self.buildings[1].pk]))
+        self.assertEqual(res.data["sla"]["median_minutes"], 60)
+        self.assertEqual(res.data["sla"]["p90_minutes"], 120)
+        res = self.client.get(reverse("buildings_tickets_sla", args=[self.buildings[0].pk]))
+        self.assertEqual(res.data["sla"]["responded"], 1)
+        self.assertEqual(res.data["sla"]["p90_minutes"], 720)
+
+    def test_percentile(self):
+        sla = TicketSLA(responded=10, histogram=[5, 0, 0, 4, 0, 0, 0, 0, 0, 0, 0, 0, 1])
+        self.assertEqual(tickets.percentile(sla, 0.5), 5)
+        self.assertEqual(tickets.percentile(sla, 0.9), 60)
+        self.assertIsNone(tickets.percentile(sla, 0.95))
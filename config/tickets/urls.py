@@ -5,5 +5,10 @@ from . import views
 urlpatterns = [
     path("", views.TicketsView.as_view(), name="tickets"),
     path("<int:pk>/", views.RetrieveTicketView.as_view(), name="ticket"),
-    path("buildings/<int:pk>/", views.ManagerTicketView.as_view(), name="buildings_tickets")
+    path("<int:pk>/status/", views.TicketStatusView.as_view(), name="ticket_status"),
+    path("queue/", views.ManagerQueueView.as_view(), name="ticket_queue"),
+    path("inbox/", views.InboxView.as_view(), name="inbox"),
+    path("inbox/seen/", views.MarkSeenView.as_view(), name="inbox_seen"),
+    path("buildings/<int:pk>/", views.ManagerTicketView.as_view(), name="buildings_tickets"),
+    path("buildings/<int:pk>/sla/", views.TicketSLAView.as_view(), name="buildings_tickets_sla"),
 ]
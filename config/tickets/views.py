@@ -16,6 +16,9 @@ from permissions.permissions import has_obj_permission
 
 
 from utils.general import response
+from utils.idempotency import idempotent
+from utils import quota
+from utils.tickets import get_inbox_page, mark_seen, manager_queue, set_status, get_sla, QUEUE_ORDERING
 
 
 class ManagerTicketView(APIView):
@@ -25,7 +28,8 @@ class ManagerTicketView(APIView):
         building = get_object_or_404(Building, pk=pk)
         has_obj_permission(request, obj=building.owner, raise_exception=True)
         tickets = Ticket.objects.filter(building=building, to_user=request.user)
-        return response(status.HTTP_200_OK, instance=tickets, serializer=cs.TicketSerializer, many=True)
+        return response(status.HTTP_200_OK, instance=tickets, serializer=cs.TicketSerializer, many=True,
+                        request=request, ordering=("-pk",))
 
 
 class TicketsView(APIView):
@@ -37,21 +41,25 @@ class TicketsView(APIView):
         """
         if request.user.is_manager:
             return response(status.HTTP_400_BAD_REQUEST, detail="use buildings tickets view")
-        inbox_tickets = Ticket.objects.filter(to_user=request.user, building__units__resident=request.user)
-        return response(status.HTTP_200_OK, instance=inbox_tickets, serializer=cs.TicketSerializer, many=True)
+        inbox_tickets = Ticket.objects.filter(to_user=request.user)
+        return response(status.HTTP_200_OK, instance=inbox_tickets, serializer=cs.TicketSerializer, many=True,
+                        request=request, ordering=("-pk",))
 
+    @idempotent
     def post(self, request):
 
         if request.user.is_resident:
             serializer = cs.ResidentNewTicketSerializer(data=request.data)
             if not serializer.is_valid():
                 return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
-            building = Building.objects.filter(units__resident=request.user).first()
-            to_user = building.owner
-            ticket = Ticket.objects.create(
-                to_user=to_user, from_user=request.user,
-                building=building,
-                **serializer.data)
+            building = Building.objects.select_related("owner").filter(units__resident=request.user).first()
+            if building is None:
+                return response(status.HTTP_400_BAD_REQUEST, detail="you don't live in any building")
+            with quota.reserve(quota.TICKETS, request.user):
+                ticket = Ticket.objects.create(
+                    to_user=building.owner, from_user=request.user,
+                    building=building,
+                    **serializer.data)
             return response(status.HTTP_201_CREATED, instance=ticket, serializer=cs.TicketSerializer)
 
         elif request.user.is_manager:
@@ -63,11 +71,12 @@ class TicketsView(APIView):
                 return response(status.HTTP_400_BAD_REQUEST, detail="user is not for this building")
             building = get_object_or_404(Building, pk=data["building"])
             to_user = get_object_or_404(User, pk=data["to_user"])
-            ticket = Ticket.objects.create(
-                from_user=request.user, to_user=to_user,
-                building=building,
-                title=data["title"], message=data["message"]
-            )
+            with quota.reserve(quota.TICKETS, request.user):
+                ticket = Ticket.objects.create(
+                    from_user=request.user, to_user=to_user,
+                    building=building,
+                    title=data["title"], message=data["message"], priority=data.get("priority", Ticket.NORMAL)
+                )
             return response(status.HTTP_201_CREATED, instance=ticket, serializer=cs.TicketSerializer)
 
 
@@ -81,8 +90,81 @@ class RetrieveTicketView(APIView):
         is_manager_building = has_obj_permission(request, obj=ticket.building.owner)
         if is_for_user or is_from_user or is_manager_building:
             if not ticket.seen and request.user == ticket.to_user:
+                mark_seen(request.user, [ticket.pk])
                 ticket.seen = True
-                ticket.save()
-                ticket.refresh_from_db()
             return response(status.HTTP_200_OK, instance=ticket, serializer=cs.TicketSerializer)
         raise PermissionDenied
+
+
+class InboxView(APIView):
+    """
+    tickets sent to the user, newest first, with the number of unread ones. ?unread=true only lists unread tickets
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        serializer = cs.InboxSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        tickets, page, unread = get_inbox_page(request.user, request, serializer.validated_data["unread"])
+        return response(status.HTTP_200_OK, instances=cs.TicketSerializer(tickets, many=True).data,
+                        unread=unread, **page)
+
+
+class MarkSeenView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = cs.MarkSeenSerializer(data=request.data)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        data = serializer.validated_data
+        marked = mark_seen(request.user, None if data["all"] else data["ids"])
+        return response(status.HTTP_200_OK, marked=marked)
+
+
+class TicketStatusView(APIView):
+    """
+    the receiver of a ticket or the manager of its building moves it between open, in progress and closed
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        ticket = get_object_or_404(Ticket.objects.select_related("building"), pk=pk)
+        is_for_user = has_obj_permission(request, obj=ticket.to_user)
+        is_manager_building = has_obj_permission(request, obj=ticket.building.owner)
+        if not (is_for_user or is_manager_building):
+            raise PermissionDenied
+        serializer = cs.TicketStatusSerializer(data=request.data)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        data = serializer.validated_data
+        set_status(ticket, data["status"], data.get("priority"))
+        return response(status.HTTP_200_OK, instance=ticket, serializer=cs.TicketSerializer)
+
+
+class ManagerQueueView(APIView):
+    """
+    open tickets of every building of the manager, most urgent and oldest first
+    """
+    permission_classes = [IsManager]
+
+    def get(self, request):
+        serializer = cs.QueueSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return response(status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+        tickets = manager_queue(request.user, serializer.validated_data.get("building"))
+        return response(status.HTTP_200_OK, instance=tickets, serializer=cs.TicketSerializer, many=True,
+                        request=request, ordering=QUEUE_ORDERING)
+
+
+class TicketSLAView(APIView):
+    """
+    average, median and p90 minutes to the first response of the building tickets
+    """
+    permission_classes = [IsManager]
+
+    def get(self, request, pk):
+        building = get_object_or_404(Building, pk=pk)
+        has_obj_permission(request, obj=building.owner, raise_exception=True)
+        return response(status.HTTP_200_OK, sla=get_sla(building.pk))
@@ -1,13 +1,5 @@
 from django.contrib import admin
-<<<<<<< HEAD
-from.models import User
-# Register your models here.
-
-admin.site.register(User)
-=======
 from .models import User
 
 
 admin.site.register(User)
-
->>>>>>> 83dd68b41fc261d17aafd22c16c9c27c6539be3b
@@ -0,0 +1,45 @@
+"""
+bump the home screen versions of the residents a change is shown to
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from announcements.models import Announcement, AnnouncementReadState
+from buildings.models import Unit
+from financials.models import Bill
+from tickets.models import Ticket
+from utils import home
+
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def touch_user(sender, instance, **kwargs):
+    home.touch_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Unit)
+def touch_unit(sender, instance, **kwargs):
+    home.touch_unit(instance.pk)
+    home.forget_residence(instance.resident_id)
+
+
+@receiver([post_save, post_delete], sender=Bill)
+def touch_bill_unit(sender, instance, **kwargs):
+    home.touch_unit(instance.unit_id)
+
+
+@receiver([post_save, post_delete], sender=Ticket)
+def touch_ticket_users(sender, instance, **kwargs):
+    home.touch_user(instance.from_user_id)
+    home.touch_user(instance.to_user_id)
+
+
+@receiver([post_save, post_delete], sender=Announcement)
+def touch_announcement_building(sender, instance, **kwargs):
+    home.touch_building(instance.building_id)
+
+
+@receiver(post_save, sender=AnnouncementReadState)
+def touch_reader(sender, instance, **kwargs):
+    home.touch_user(instance.user_id)
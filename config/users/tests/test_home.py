@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from users.models import User
+from buildings.models import Building, Unit
+from announcements.models import Announcement
+from financials.models import Bill
+from tickets.models import Ticket
+
+
+class ResidentHomeTestCase(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("resident_home")
+        cls.manager = User.objects.create_user(username="testManager", role=User.MANAGER)
+        cls.resident = User.objects.create_user(username="testResident", role=User.RESIDENT)
+        cls.building = Building.objects.create(owner=cls.manager, name="testBuilding", unit_count=2)
+        cls.unit = Unit.objects.create(building=cls.building, unit_number=1, resident=cls.resident)
+        cls.other_unit = Unit.objects.create(building=cls.building, unit_number=2)
+        now = timezone.now()
+        Bill.objects.bulk_create([
+            Bill(amount=10, created_by=cls.manager, unit=cls.unit, expire_date=now - timezone.timedelta(days=1),
+                 description="overdue"),
+            Bill(amount=20, created_by=cls.manager, unit=cls.unit, expire_date=now + timezone.timedelta(days=1),
+                 description="due"),
+            Bill(amount=40, created_by=cls.manager, unit=cls.unit, expire_date=now, description="paid", is_paid=True),
+            Bill(amount=80, created_by=cls.manager, unit=cls.other_unit, expire_date=now, description="other"),
+        ])
+        Ticket.objects.bulk_create([
+            Ticket(building=cls.building, from_user=cls.manager, to_user=cls.resident, title="t", message="m",
+                   seen=seen)
+            for seen in (True, False, False)
+        ])
+        Announcement.objects.bulk_create([
+            Announcement(building=cls.building, poster=cls.manager, title="a", description="d") for _ in range(2)])
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_authenticate(user=self.resident)
+
+    def test_home(self):
+        with self.assertNumQueries(7):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["profile"]["username"], "testResident")
+        self.assertEqual(res.data["unit"]["id"], self.unit.pk)
+        self.assertEqual(len(res.data["bills"]), 2)
+        self.assertEqual((res.data["outstanding"], res.data["overdue"], res.data["overdue_count"]), (30, 10, 1))
+        self.assertEqual(res.data["unread_tickets"], 2)
+        self.assertEqual(res.data["unread_announcements"], 2)
+        self.assertTrue(res.has_header("ETag"))
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(0):
+            res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def _assert_changed_by(self, change):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_new_announcement_changes_etag(self):
+        self._assert_changed_by(lambda: Announcement.objects.create(
+            building=self.building, poster=self.manager, title="new", description="d"))
+
+    def test_paid_bill_changes_etag(self):
+        self._assert_changed_by(lambda: Bill.objects.filter(unit=self.unit, is_paid=False).first().delete())
+
+    def test_marking_tickets_seen_changes_etag(self):
+        self._assert_changed_by(lambda: self.client.post(reverse("inbox_seen"), {"all": True}, format="json"))
+
+    def test_unrelated_change_keeps_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Bill.objects.create(amount=1, created_by=self.manager, unit=self.other_unit,
+                                expire_date=timezone.now(), description="other")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+    def test_overdue_bill_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        later = timezone.now() + timezone.timedelta(days=2)
+        with mock.patch("django.utils.timezone.now", return_value=later):
+            res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.data["overdue_count"], 2)
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=res["ETag"]).status_code,
+                             status.HTTP_304_NOT_MODIFIED)
+
+    def test_lost_versions_change_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        cache.clear()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
@@ -14,6 +14,7 @@ urlpatterns = [
     path("login/", views.LoginView.as_view(), name="login"),
     path("logout/", views.LogoutView.as_view(), name="logout"),
     path("me/", views.MeView.as_view(), name="me"),
+    path("me/home/", views.ResidentHomeView.as_view(), name="resident_home"),
     path('token/', TokenObtainPairView.as_view(), name = 'token'),
     path('refresh/token/', TokenRefreshView.as_view(), name = 'token_refresh'),
 ]
@@ -11,6 +11,7 @@ from django.utils.html import strip_tags
 from django.conf import settings
 from django.core.mail import send_mail
 from django.core.mail import EmailMessage
+from django.utils.cache import get_conditional_response
 from rest_framework.generics import GenericAPIView
 from utils.exceptions import BadRequest
 from . import serializers as cs, custom_permission_classes as cp
@@ -21,10 +22,14 @@ from utils.general import response, unauthorized, logout
 from utils.db import update_instance
 from utils.otp import check_otp_request
 from utils.db import update_unit_member
+from utils import home
 
 from permissions import permissions, filters
 
 from buildings.custom_permission_classes import IsManager
+from buildings.serializers import UnitSerializer
+from financials.serializers import BillSerializer
+from tickets.serializers import TicketSerializer
 
 from otp.models import OTP
 from otp.serializers import OTPSerializer, SendOTPSerializer, OTPVerificationSerializer
@@ -42,8 +47,7 @@ class ListRegisterUserView(APIView):
         only staff
         """
         users = User.objects.all()
-        return response(
-            status.HTTP_200_OK, instance=users, serializer=cs.UserSerializer, total=users.count(), many=True)
+        return response(status.HTTP_200_OK, instance=users, serializer=cs.UserSerializer, many=True, request=request)
 
     def post(self, request):
         serializer = cs.RegisterUserSerializer(data=request.data)
@@ -159,6 +163,40 @@ class MeView(APIView):
         return response(status.HTTP_200_OK, instance=request.user, serializer=cs.UserSerializer)
 
 
+class ResidentHomeView(APIView):
+    """
+    everything the resident app shows on launch. sends an ETag, a matching If-None-Match gets a 304 that is
+    answered from the cache. a full answer is at most seven queries, up to two for the ETag and five for get_home
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.is_manager:
+            return response(status.HTTP_400_BAD_REQUEST, detail="use the buildings dashboard")
+        etag = home.get_etag(request.user)
+        if not_modified := get_conditional_response(request, etag=etag):
+            # built without a response, so it has no validator of its own
+            not_modified["ETag"] = etag
+            not_modified["Cache-Control"] = "private, no-cache"
+            return not_modified
+        data = home.get_home(request.user)
+        res = response(
+            status.HTTP_200_OK,
+            profile=cs.UserSerializer(request.user).data,
+            unit=UnitSerializer(data["unit"]).data if data["unit"] else None,
+            bills=BillSerializer(data["bills"], many=True).data,
+            outstanding=data["outstanding"],
+            overdue=data["overdue"],
+            overdue_count=data["overdue_count"],
+            tickets=TicketSerializer(data["tickets"], many=True).data,
+            unread_tickets=data["unread_tickets"],
+            unread_announcements=data["unread_announcements"],
+        )
+        res["ETag"] = etag
+        res["Cache-Control"] = "private, no-cache"
+        return res
+
+
 class SendVerificationView(APIView):
     """
     this view handle sending OTP for email and phone verification.
@@ -0,0 +1,45 @@
+from django.db.models import QuerySet
+
+from advertisements.models import Advertisement
+
+from .buildings import filter_unit_specifications
+
+# ordering param -> keyset columns. newest and oldest walk the primary key. price, rent and mortgage are read in
+# order from the (what_for, amount) indexes only when what_for is filtered too, without it and for area the
+# matching rows are sorted
+SEARCH_ORDERINGS = {
+    "newest": ("-pk",),
+    "oldest": ("pk",),
+    "price": ("price",),
+    "-price": ("-price",),
+    "rent": ("rent",),
+    "-rent": ("-rent",),
+    "mortgage": ("mortgage",),
+    "-mortgage": ("-mortgage",),
+    "area": ("unit_specification__area",),
+    "-area": ("-unit_specification__area",),
+}
+
+
+def search_advertisements(filters: dict) -> QuerySet[Advertisement]:
+    """
+    advertisements matching the validated AdSearchSerializer filters
+    """
+    ads = Advertisement.objects.select_related("unit_specification")
+    ads = filter_unit_specifications(ads, filters, prefix="unit_specification__")
+    if what_for := filters.get("what_for"):
+        ads = ads.filter(what_for=what_for)
+    for field in ("price", "rent", "mortgage"):
+        if filters.get(f"min_{field}") is not None:
+            ads = ads.filter(**{f"{field}__gte": filters[f"min_{field}"]})
+        if filters.get(f"max_{field}") is not None:
+            ads = ads.filter(**{f"{field}__lte": filters[f"max_{field}"]})
+    ordering = get_search_ordering(filters)
+    # keyset pagination can't compare against null, ads without the sorted amount are left out
+    for key in ordering:
+        ads = ads.filter(**{f"{key.lstrip('-')}__isnull": False})
+    return ads
+
+
+def get_search_ordering(filters: dict) -> tuple:
+    return SEARCH_ORDERINGS[filters.get("ordering") or "newest"]
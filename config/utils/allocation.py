@@ -0,0 +1,82 @@
+"""
+exact splitting of money between units. amounts are split in integer minor units with the largest remainder
+method, so the shares always add up to the total
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Sequence, Tuple
+
+from django.db.models import QuerySet
+
+from buildings.models import Unit
+
+from .exceptions import BadRequest
+
+UNIT = "unit"
+MEMBER = "member"
+AREA = "area"
+CUSTOM = "custom"
+METHODS = (UNIT, MEMBER, AREA, CUSTOM)
+
+DECIMAL_PLACES = 2
+MINOR_UNITS = 10 ** DECIMAL_PLACES
+# areas are weighted in hundredths of a square meter
+AREA_SCALE = 100
+
+
+def to_minor(amount) -> int:
+    return int((Decimal(str(amount)) * MINOR_UNITS).to_integral_value(ROUND_HALF_UP))
+
+
+def from_minor(amount: int) -> Decimal:
+    return Decimal(amount).scaleb(-DECIMAL_PLACES)
+
+
+def allocate(total: int, weights: Sequence[int]) -> List[int]:
+    """
+    split the integer total in proportion to the non negative integer weights. every share gets the floor of its
+    exact value and what is left is handed out one by one to the largest remainders, ties go to the earlier weight
+    """
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        raise ValueError("weights must add up to a positive number")
+    shares, remainders = [], []
+    for weight in weights:
+        share, remainder = divmod(total * weight, weight_sum)
+        shares.append(share)
+        remainders.append(remainder)
+    left = total - sum(shares)
+    if left:
+        for i in sorted(range(len(weights)), key=remainders.__getitem__, reverse=True)[:left]:
+            shares[i] += 1
+    return shares
+
+
+def _weights(units: QuerySet, method: str, custom_weights: Dict[int, int] = None) -> List[Tuple[int, int]]:
+    if method == UNIT:
+        return [(pk, 1) for pk in units.values_list("pk", flat=True)]
+    if method == MEMBER:
+        # vacant units have no members to split the bill between
+        return list(units.filter(resident__isnull=False).values_list("pk", "members"))
+    if method == AREA:
+        return [(pk, int(round((area or 0) * AREA_SCALE)))
+                for pk, area in units.values_list("pk", "unitspecification__area")]
+    if method == CUSTOM:
+        custom_weights = custom_weights or dict()
+        unit_ids = set(units.filter(pk__in=list(custom_weights)).values_list("pk", flat=True))
+        if unknown := set(custom_weights) - unit_ids:
+            raise BadRequest(detail=f"units {sorted(unknown)} are not in this building")
+        return sorted(custom_weights.items())
+    raise BadRequest(detail=f"unknown division method {method}")
+
+
+def allocate_units(units: QuerySet, amount, method: str, custom_weights: Dict[int, int] = None
+                   ) -> List[Tuple[int, Decimal]]:
+    """
+    (unit id, share) of every unit taking part in the split, in unit id order. units with no weight get no share
+    """
+    weights = sorted(_weights(units.order_by(), method, custom_weights))
+    weights = [(pk, weight) for pk, weight in weights if weight]
+    if not weights:
+        raise BadRequest(detail=f"no unit of the building has a {method} weight to split the amount by")
+    shares = allocate(to_minor(amount), [weight for _, weight in weights])
+    return [(pk, from_minor(share)) for (pk, _), share in zip(weights, shares)]
@@ -0,0 +1,88 @@
+from announcements.models import Announcement, AnnouncementReadState, ArchivedAnnouncement
+from buildings.models import Building
+
+from django.db import transaction
+from django.utils import timezone
+
+
+def _compact(state: AnnouncementReadState):
+    """
+    move last_seen_id forward over the announcements that were read out of order
+    """
+    seen_ids = set(state.seen_ids)
+    next_ids = Announcement.objects.filter(
+        building_id=state.building_id, pk__gt=state.last_seen_id
+    ).order_by("pk").values_list("pk", flat=True)[:len(seen_ids) + 1]
+    for pk in next_ids:
+        if pk not in seen_ids:
+            break
+        state.last_seen_id = pk
+    state.seen_ids = sorted(pk for pk in seen_ids if pk > state.last_seen_id)
+
+
+def is_read(state: AnnouncementReadState, announcement: Announcement) -> bool:
+    return state is not None and (announcement.pk <= state.last_seen_id or announcement.pk in state.seen_ids)
+
+
+def mark_read(user, announcement: Announcement):
+    """
+    record that the user read the announcement. repeat reads only cost the read state lookup
+    """
+    state = AnnouncementReadState.objects.filter(user=user, building_id=announcement.building_id).first()
+    if is_read(state, announcement):
+        return
+    with transaction.atomic():
+        state, _ = AnnouncementReadState.objects.select_for_update().get_or_create(
+            user=user, building_id=announcement.building_id)
+        if is_read(state, announcement):
+            return
+        state.seen_ids = state.seen_ids + [announcement.pk]
+        _compact(state)
+        state.save(update_fields=["last_seen_id", "seen_ids"])
+
+
+def unread_count(user, building: Building) -> int:
+    """
+    one read state lookup and one count over the (building, id) index range above the user last_seen_id. the count
+    grows with the announcements the user hasn't read, not with the building history
+    """
+    state = AnnouncementReadState.objects.filter(user=user, building=building).first()
+    unread = Announcement.objects.live().filter(building=building)
+    if state is not None:
+        unread = unread.filter(pk__gt=state.last_seen_id).exclude(pk__in=state.seen_ids)
+    return unread.count()
+
+
+def archive_expired_batch(batch_size: int, now=None) -> int:
+    """
+    move up to batch_size expired announcements with their read state into the archive table in one transaction,
+    oldest expiry first along the (expire_date, id) index. returns how many were archived
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        expired = Announcement.objects.filter(expire_date__lte=now).order_by("expire_date", "pk")
+        announcements = list(expired[:batch_size])
+        if not announcements:
+            return 0
+        states = dict()
+        for state in AnnouncementReadState.objects.filter(building__in={a.building_id for a in announcements}):
+            states.setdefault(state.building_id, []).append(state)
+
+        ArchivedAnnouncement.objects.bulk_create([
+            ArchivedAnnouncement(
+                original_id=a.pk, building_id=a.building_id, poster_id=a.poster_id, title=a.title,
+                description=a.description, pub_data=a.pub_data, expire_date=a.expire_date,
+                read_by=[state.user_id for state in states.get(a.building_id, []) if is_read(state, a)])
+            for a in announcements
+        ])
+
+        archived_ids = {a.pk for a in announcements}
+        changed_states = []
+        for building_states in states.values():
+            for state in building_states:
+                if archived_ids.intersection(state.seen_ids):
+                    state.seen_ids = [pk for pk in state.seen_ids if pk not in archived_ids]
+                    changed_states.append(state)
+        AnnouncementReadState.objects.bulk_update(changed_states, ["seen_ids"], batch_size=500)
+        Announcement.objects.filter(pk__in=archived_ids).delete()
+    return len(announcements)
@@ -1,15 +1,342 @@
-from buildings.models import Building, Unit
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from buildings.models import Building, Unit, ProvisioningJob, ProvisioningCredentials, Feature, UnitSpecification
 from users.models import User
 from typing import List, Tuple
 
-from django.db.models import Sum, QuerySet
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, QuerySet
+from django.utils import timezone
+
+from utils import helper
+from utils.exceptions import BadRequest
+
+logger = logging.getLogger(__name__)
+
+# below this many passwords the process pool start-up costs more than the hashing itself
+HASH_POOL_THRESHOLD = 8
+HASH_CHUNK_SIZE = 25
+# a running job that didn't commit a chunk for this long is considered crashed and gets picked up again
+JOB_STALE_AFTER = timezone.timedelta(minutes=10)
+# a failed job is picked up again after this long, until it was tried MAX_JOB_ATTEMPTS times
+JOB_RETRY_AFTER = timezone.timedelta(minutes=5)
+MAX_JOB_ATTEMPTS = 3
+# plaintext passwords that were never delivered to the manager are deleted after this long
+CREDENTIALS_TTL = timezone.timedelta(days=7)
+
+
+def update_counters(building_id: int, occupied: int = 0, vacant: int = 0, members: int = 0):
+    """
+    shift the occupancy counters of a building. call it inside the transaction that changes the units
+    """
+    Building.objects.filter(pk=building_id).update(
+        occupied_units=F("occupied_units") + occupied,
+        vacant_units=F("vacant_units") + vacant,
+        total_members=F("total_members") + members,
+    )
+
 
+def calculate_counters(buildings: QuerySet[Building]) -> dict:
+    """
+    occupancy counters of the buildings calculated from their units in one grouped query
+    """
+    counters = {pk: (0, 0, 0) for pk in buildings.values_list("pk", flat=True)}
+    units = Unit.objects.filter(building__in=buildings).values("building").annotate(
+        units=Count("id"),
+        occupied=Count("resident"),
+        members=Sum("members", filter=Q(resident__isnull=False)),
+    )
+    for unit in units:
+        counters[unit["building"]] = (unit["occupied"], unit["units"] - unit["occupied"], unit["members"] or 0)
+    return counters
 
-def count_all_members(units: QuerySet[Unit]) -> dict:
-    return units.aggregate(all_members=Sum("members"))
+
+def rebuild_counters(buildings: QuerySet[Building], fix: bool = True) -> List[Tuple[Building, tuple, tuple]]:
+    """
+    compare the stored counters of the buildings with their units and fix the drifted ones.
+    returns the drifted buildings with their stored and actual (occupied_units, vacant_units, total_members)
+    """
+    fields = ["occupied_units", "vacant_units", "total_members"]
+    counters = calculate_counters(buildings)
+    drifted = []
+    for building in buildings.only(*fields):
+        stored = tuple(getattr(building, field) for field in fields)
+        if stored != counters[building.pk]:
+            drifted.append((building, stored, counters[building.pk]))
+    if fix and drifted:
+        for building, _, counter in drifted:
+            building.occupied_units, building.vacant_units, building.total_members = counter
+        Building.objects.bulk_update([building for building, _, _ in drifted], fields, batch_size=500)
+    return drifted
+
+
+def get_occupancy(building: Building) -> dict:
+    return {
+        "occupied_units": building.occupied_units,
+        "vacant_units": building.vacant_units,
+        "total_members": building.total_members,
+        "members_per_unit": round(building.total_members / building.occupied_units, 2)
+        if building.occupied_units else 0,
+    }
 
 
 def get_all_residents(building: Building) -> Tuple[List[User], dict]:
-    units = building.units.all()
-    members_count = count_all_members(units)
-    return [unit.resident for unit in units if unit.resident is not None], members_count
+    residents = User.objects.filter(unit__building=building).only(
+        "username", "first_name", "last_name", "email", "phone").order_by("unit__unit_number")
+    return list(residents), get_occupancy(building)
+
+
+def assign_resident(unit: Unit, resident: User):
+    """
+    the unit row is locked before it's checked, so two concurrent requests can't both fill it and count it twice
+    """
+    with transaction.atomic():
+        locked = Unit.objects.select_for_update().get(pk=unit.pk)
+        if locked.resident_id is not None:
+            raise BadRequest(detail="unit already have a resident")
+        locked.resident = resident
+        locked.save()
+        update_counters(locked.building_id, occupied=1, vacant=-1, members=locked.members)
+
+
+def remove_resident(unit: Unit):
+    with transaction.atomic():
+        locked = Unit.objects.select_for_update().select_related("resident").get(pk=unit.pk)
+        if locked.resident_id is None:
+            raise BadRequest(detail="unit doesn't have a resident")
+        resident = locked.resident
+        locked.resident = None
+        locked.save()
+        update_counters(locked.building_id, occupied=-1, vacant=1, members=-locked.members)
+        resident.delete()
+
+
+def vacate_units(resident: User):
+    """
+    free the units of a resident that is being deleted, its unit.resident is set to null by the delete itself.
+    call it inside the deleting transaction
+    """
+    # locked with a plain query, FOR UPDATE isn't allowed with GROUP BY, and summed per building here
+    buildings = defaultdict(lambda: [0, 0])
+    units = Unit.objects.select_for_update().filter(resident=resident).order_by("pk")
+    for building_id, members in units.values_list("building_id", "members"):
+        buildings[building_id][0] += 1
+        buildings[building_id][1] += members
+    for building_id, (units, members) in sorted(buildings.items()):
+        update_counters(building_id, occupied=-units, vacant=units, members=-members)
+
+
+def _init_hash_worker():
+    # workers started with "spawn" don't inherit the configured django settings
+    django.setup()
+
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    return [make_password(password) for password in passwords]
+
+
+def hash_passwords(passwords: List[str], workers: int = None) -> List[str]:
+    """
+    hash the passwords with the default hasher. PBKDF2 is cpu bound so big batches are spread over a process pool
+    """
+    if len(passwords) < HASH_POOL_THRESHOLD:
+        return _hash_passwords(passwords)
+    chunks = [passwords[i:i + HASH_CHUNK_SIZE] for i in range(0, len(passwords), HASH_CHUNK_SIZE)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker) as pool:
+        return [hashed for chunk in pool.map(_hash_passwords, chunks) for hashed in chunk]
+
+
+def _unique_usernames(building: Building, count: int) -> List[str]:
+    usernames = set()
+    while len(usernames) < count:
+        usernames.add(helper.random_username(building))
+    taken = set(User.objects.filter(username__in=usernames).values_list("username", flat=True))
+    usernames -= taken
+    while len(usernames) < count:
+        username = helper.random_username(building)
+        if username not in usernames and not User.objects.filter(username=username).exists():
+            usernames.add(username)
+    return list(usernames)
+
+
+def _generate_credentials(building: Building, count: int) -> Tuple[List[str], List[str], List[str]]:
+    usernames = _unique_usernames(building, count)
+    passwords = [helper.generate_random_password(10) for _ in range(count)]
+    return usernames, passwords, hash_passwords(passwords)
+
+
+def _insert_units(building: Building, first_unit: int, usernames: List[str], hashed_passwords: List[str]):
+    residents = User.objects.bulk_create(
+        [User(username=username, password=hashed, role=User.RESIDENT)
+         for username, hashed in zip(usernames, hashed_passwords)]
+    )
+    if any(resident.pk is None for resident in residents):
+        # backends that can't return ids from a bulk insert
+        ids = dict(User.objects.filter(username__in=usernames).values_list("username", "pk"))
+        for resident in residents:
+            resident.pk = ids[resident.username]
+    units = Unit.objects.bulk_create(
+        [Unit(building=building, unit_number=first_unit + i, resident=resident)
+         for i, resident in enumerate(residents)]
+    )
+    update_counters(building.pk, occupied=len(units), members=sum(unit.members for unit in units))
+
+
+def _residents_info(first_unit: int, usernames: List[str], passwords: List[str]) -> List[dict]:
+    return [
+        {"unit": first_unit + i, "username": username, "password": password}
+        for i, (username, password) in enumerate(zip(usernames, passwords))
+    ]
+
+
+def provision_units(building: Building, first_unit: int, last_unit: int) -> List[dict]:
+    """
+    create a resident user and a unit for every unit number in [first_unit, last_unit] in one transaction.
+    passwords are hashed before the transaction is opened so the database isn't locked while hashing
+    """
+    usernames, passwords, hashed_passwords = _generate_credentials(building, last_unit - first_unit + 1)
+    with transaction.atomic():
+        _insert_units(building, first_unit, usernames, hashed_passwords)
+    return _residents_info(first_unit, usernames, passwords)
+
+
+def create_building(owner: User, **data) -> Tuple[Building, List[dict]]:
+    """
+    create a building with all of its units and residents. nothing is left behind if any step fails
+    """
+    building = Building(**data, owner=owner)
+    usernames, passwords, hashed_passwords = _generate_credentials(building, building.unit_count)
+    with transaction.atomic():
+        building.save()
+        _insert_units(building, 1, usernames, hashed_passwords)
+    building.refresh_from_db()
+    return building, _residents_info(1, usernames, passwords)
+
+
+def start_provisioning_job(owner: User, **data) -> ProvisioningJob:
+    """
+    create the building right away and leave its units and residents to a provisioning worker
+    """
+    with transaction.atomic():
+        building = Building.objects.create(**data, owner=owner)
+        return ProvisioningJob.objects.create(building=building)
+
+
+def claim_provisioning_job() -> ProvisioningJob:
+    """
+    pick the oldest pending job, a running one whose worker stopped committing chunks or a failed one that has
+    attempts left. the conditional update makes sure only one worker gets a job
+    """
+    now = timezone.now()
+    candidates = ProvisioningJob.objects.filter(
+        Q(status=ProvisioningJob.PENDING)
+        | Q(status=ProvisioningJob.RUNNING, updated_at__lt=now - JOB_STALE_AFTER)
+        | Q(status=ProvisioningJob.FAILED, updated_at__lt=now - JOB_RETRY_AFTER, attempts__lt=MAX_JOB_ATTEMPTS)
+    )
+    for job in candidates.order_by("pk")[:10]:
+        claimed = ProvisioningJob.objects.filter(
+            pk=job.pk, status=job.status, updated_at=job.updated_at
+        ).update(status=ProvisioningJob.RUNNING, attempts=F("attempts") + 1, updated_at=timezone.now())
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_provisioning_job(job: ProvisioningJob) -> ProvisioningJob:
+    """
+    provision the remaining units of the job chunk by chunk. units, credentials and progress of a chunk are committed
+    in the same transaction, so the job can always resume from units_done
+    """
+    building = job.building
+    try:
+        while job.units_done < building.unit_count:
+            first_unit = job.units_done + 1
+            last_unit = min(job.units_done + job.chunk_size, building.unit_count)
+            usernames, passwords, hashed_passwords = _generate_credentials(building, last_unit - first_unit + 1)
+            with transaction.atomic():
+                _insert_units(building, first_unit, usernames, hashed_passwords)
+                ProvisioningCredentials.objects.create(
+                    job=job, first_unit=first_unit, residents_info=_residents_info(first_unit, usernames, passwords))
+                job.units_done = last_unit
+                job.save(update_fields=["units_done", "updated_at"])
+    except Exception:
+        # the exception can carry sql and internals, it goes to the log and the client gets a generic error
+        logger.exception("provisioning job %s failed after %s units", job.pk, job.units_done)
+        job.status = ProvisioningJob.FAILED
+        job.error = f"provisioning stopped after {job.units_done} units"
+        job.save(update_fields=["status", "error", "updated_at"])
+        raise
+    job.status = ProvisioningJob.DONE
+    job.error = None
+    job.save(update_fields=["status", "error", "updated_at"])
+    return job
+
+
+def deliver_credentials(job: ProvisioningJob) -> List[dict]:
+    """
+    the residents info of every chunk of the job, deleted as they are handed out. a second call gets nothing
+    """
+    with transaction.atomic():
+        chunks = list(ProvisioningCredentials.objects.select_for_update().filter(job=job).order_by("first_unit"))
+        ProvisioningCredentials.objects.filter(pk__in=[chunk.pk for chunk in chunks]).delete()
+    return [info for chunk in chunks for info in chunk.residents_info]
+
+
+def purge_credentials() -> int:
+    """
+    delete the credentials that were never delivered within CREDENTIALS_TTL
+    """
+    return ProvisioningCredentials.objects.filter(created_at__lt=timezone.now() - CREDENTIALS_TTL).delete()[0]
+
+
+def parse_features(text: str) -> List[str]:
+    return sorted({name.strip().lower()[:50] for name in (text or "").split(",") if name.strip()})
+
+
+def set_features(unit_spec: UnitSpecification, text: str):
+    """
+    store the comma-separated features of a unit specification as tags
+    """
+    names = parse_features(text)
+    Feature.objects.bulk_create([Feature(name=name) for name in names], ignore_conflicts=True)
+    unit_spec.tags.set(Feature.objects.filter(name__in=names))
+
+
+def filter_unit_specifications(queryset: QuerySet, filters: dict, prefix: str = "") -> QuerySet:
+    """
+    apply the validated unit specification filters. prefix is the lookup path to UnitSpecification
+    """
+    lookups = {
+        "building": "unit__building",
+        "bedroom": "bedroom",
+        "floor": "floor",
+        "min_area": "area__gte",
+        "max_area": "area__lte",
+        "min_year": "year_of_construction__gte",
+        "max_year": "year_of_construction__lte",
+    }
+    for key, lookup in lookups.items():
+        if filters.get(key) is not None:
+            queryset = queryset.filter(**{f"{prefix}{lookup}": filters[key]})
+    for name in parse_features(filters.get("features")):
+        queryset = queryset.filter(**{f"{prefix}tags__name": name})
+    return queryset
+
+
+def feature_facets(queryset: QuerySet, path: str = "unit_specifications") -> List[dict]:
+    """
+    number of rows of queryset per feature in one grouped query. path is the lookup from Feature to its model
+    """
+    return list(
+        Feature.objects.filter(**{f"{path}__in": queryset})
+        .values("name")
+        .annotate(count=Count(path))
+        .order_by("-count", "name")
+    )
@@ -0,0 +1,78 @@
+from typing import List, Tuple
+
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from announcements.models import Announcement
+from buildings.models import Building
+from financials.models import Bill
+from tickets.models import Ticket
+
+from .buildings import get_occupancy
+from .pagination import paginate
+
+LATEST_ANNOUNCEMENTS = 3
+
+
+def _bill_totals(building_ids: List[int], now) -> dict:
+    overdue = Q(expire_date__lt=now)
+    rows = Bill.objects.filter(building__in=building_ids, is_paid=False).values("building").annotate(
+        outstanding=Sum("amount"),
+        outstanding_count=Count("pk"),
+        overdue=Sum("amount", filter=overdue),
+        overdue_count=Count("pk", filter=overdue),
+    ).order_by()
+    return {
+        row.pop("building"): {key: value or 0 for key, value in row.items()}
+        for row in rows
+    }
+
+
+def _ticket_counts(user, building_ids: List[int]) -> dict:
+    rows = Ticket.objects.filter(to_user=user, building__in=building_ids).values("building").annotate(
+        unread=Count("pk", filter=Q(seen=False)),
+        open=Count("pk", filter=Q(closed_at__isnull=True)),
+    ).order_by()
+    return {row.pop("building"): row for row in rows}
+
+
+def _latest_announcements(building_ids: List[int]) -> dict:
+    """
+    the LATEST_ANNOUNCEMENTS newest live announcements of every building, picked by a correlated subquery
+    so it's one query however many buildings there are
+    """
+    latest = Announcement.objects.live().filter(building=OuterRef("building")).order_by("-pk").values("pk")
+    announcements = Announcement.objects.filter(
+        building__in=building_ids, pk__in=Subquery(latest[:LATEST_ANNOUNCEMENTS])
+    ).order_by("building", "-pk").values("id", "building", "title", "pub_data", "expire_date")
+    by_building = dict()
+    for announcement in announcements:
+        by_building.setdefault(announcement.pop("building"), []).append(announcement)
+    return by_building
+
+
+def get_dashboard(user, request) -> Tuple[List[dict], dict]:
+    """
+    a cursor page of the manager buildings with their occupancy, unpaid and overdue bills, tickets and latest
+    announcements. four queries per page whatever the number of buildings or units
+    """
+    buildings, page = paginate(Building.objects.filter(owner=user), request)
+    building_ids = [building.pk for building in buildings]
+    now = timezone.now()
+    bills = _bill_totals(building_ids, now)
+    tickets = _ticket_counts(user, building_ids)
+    announcements = _latest_announcements(building_ids)
+    no_bills = {"outstanding": 0, "outstanding_count": 0, "overdue": 0, "overdue_count": 0}
+    no_tickets = {"unread": 0, "open": 0}
+    return [
+        {
+            "id": building.pk,
+            "name": building.name,
+            "unit_count": building.unit_count,
+            "occupancy": get_occupancy(building),
+            "bills": bills.get(building.pk, no_bills),
+            "tickets": tickets.get(building.pk, no_tickets),
+            "latest_announcements": announcements.get(building.pk, []),
+        }
+        for building in buildings
+    ], page
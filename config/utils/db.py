@@ -2,7 +2,10 @@ from users.models import User
 
 from buildings.models import Unit
 
+from django.db import transaction
+
 from .exceptions import BadRequest
+from .buildings import update_counters
 
 
 def update_instance(instance, validated_data):
@@ -24,5 +27,11 @@ def update_instance(instance, validated_data):
 def update_unit_member(request, members):
     if request.user.is_manager:
         raise BadRequest(detail="managers cant set members field")
-    user_unit = Unit.objects.filter(resident=request.user).first()
-    update_instance(user_unit, {"members": members})
+    with transaction.atomic():
+        # locked so concurrent updates don't compute their change from the same old value
+        user_unit = Unit.objects.select_for_update().filter(resident=request.user).first()
+        if not user_unit:
+            raise BadRequest(detail="user doesn't have a unit")
+        members_change = members - user_unit.members
+        update_instance(user_unit, {"members": members})
+        update_counters(user_unit.building_id, members=members_change)
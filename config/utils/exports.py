@@ -0,0 +1,83 @@
+"""
+streaming exports of bills for accounting. rows are read with values_list().iterator() so no model instances are
+built and memory stays flat whatever the number of bills
+"""
+import csv
+import io
+from datetime import date
+from typing import Iterable, Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from financials.models import Bill
+
+from .financials import get_period, in_period
+
+CSV = "csv"
+NDJSON = "ndjson"
+FORMATS = (CSV, NDJSON)
+CONTENT_TYPES = {CSV: "text/csv", NDJSON: "application/x-ndjson"}
+
+# column name -> bill field
+COLUMNS = {
+    "id": "pk",
+    "building": "building_id",
+    "unit": "unit_id",
+    "unit_number": "unit__unit_number",
+    "amount": "amount",
+    "description": "description",
+    "period": "period",
+    "date_created": "date_created",
+    "expire_date": "expire_date",
+    "is_paid": "is_paid",
+    "charge": "charge_id",
+    "created_by": "created_by_id",
+}
+# rows written per yielded chunk
+LINES_PER_CHUNK = 500
+
+
+def filter_bills(bills: QuerySet, period: date = None, is_paid: bool = None) -> QuerySet:
+    if period is not None:
+        bills = bills.filter(in_period(get_period(period)))
+    if is_paid is not None:
+        bills = bills.filter(is_paid=is_paid)
+    return bills
+
+
+def bill_rows(bills: QuerySet, chunk_size: int = 2000) -> Iterator[tuple]:
+    return bills.order_by("pk").values_list(*COLUMNS.values()).iterator(chunk_size=chunk_size)
+
+
+def _csv_lines(rows: Iterable[tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for n, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if n % LINES_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(rows: Iterable[tuple]) -> Iterator[str]:
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    lines = []
+    for row in rows:
+        lines.append(encoder.encode(dict(zip(COLUMNS, row))))
+        if len(lines) == LINES_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def export_bills(bills: QuerySet, output: str = CSV, chunk_size: int = 2000) -> Iterator[str]:
+    """
+    the bills as chunks of CSV or newline delimited JSON text, in id order
+    """
+    rows = bill_rows(bills, chunk_size)
+    return _csv_lines(rows) if output == CSV else _ndjson_lines(rows)
@@ -1,7 +1,20 @@
+import uuid
+from datetime import date, datetime, time
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, QuerySet, Sum
 from django.utils import timezone
 
 from rest_framework.serializers import ValidationError
 
+from buildings.models import Building, Unit
+from financials.models import Bill, RecurringCharge
+
+from . import home
+from .allocation import allocate_units
+from .ledger import post_charges, post_payments
+
 
 def get_expire_date(data):
     return timezone.now() + timezone.timedelta(days=data["expire_date"])
@@ -13,3 +26,171 @@ def check_serializer_keys(data):
     if data.get("unit") and data.get("divide_by"):
         raise ValidationError("only a specific unit or a division method must be provided")
     return data
+
+
+def create_bills(building: Building, amount, divide_by: str, weights: Dict[int, int] = None, **fields) -> List[Bill]:
+    """
+    split amount between the units of the building in one bulk insert
+    """
+    shares = allocate_units(Unit.objects.filter(building=building), amount, divide_by, weights)
+    with transaction.atomic():
+        bills = Bill.objects.bulk_create([
+            Bill(unit_id=unit_id, building=building, amount=share, **fields)
+            for unit_id, share in shares
+        ])
+        post_charges(bills)
+    # bulk_create doesn't send post_save
+    home.touch_building(building.pk)
+    return bills
+
+
+def get_period(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_period(period: date) -> date:
+    return (period.replace(day=28) + timezone.timedelta(days=4)).replace(day=1)
+
+
+def in_period(period: date) -> Q:
+    """
+    bills of a month: recurring ones by the period they were billed for, the others by their creation date
+    """
+    start = timezone.make_aware(datetime.combine(period, time()))
+    end = timezone.make_aware(datetime.combine(next_period(period), time()))
+    return Q(period=period) | Q(period__isnull=True, date_created__gte=start, date_created__lt=end)
+
+
+def _expire_date(charge: RecurringCharge, period: date) -> datetime:
+    billed_at = timezone.make_aware(datetime.combine(period.replace(day=charge.day_of_month), time()))
+    return billed_at + timezone.timedelta(days=charge.expire_days)
+
+
+def due_charges(period: date, today: date) -> QuerySet:
+    """
+    active charges not billed for period yet. in the current month only the ones whose day has come
+    """
+    charges = RecurringCharge.objects.filter(is_active=True).filter(
+        Q(last_period__isnull=True) | Q(last_period__lt=period))
+    if period == get_period(today):
+        charges = charges.filter(day_of_month__lte=today.day)
+    elif period > today:
+        return charges.none()
+    return charges.select_related("building").order_by("pk")
+
+
+def bill_charge(charge: RecurringCharge, period: date, chunk_size: int = 2000) -> Tuple[int, int]:
+    """
+    bill a recurring charge for period. the whole charge is allocated at once so the shares add up to its amount,
+    then inserted chunk by chunk in unit id order. every chunk is a transaction that skips the units already billed,
+    so an interrupted run can simply be run again. returns (units, created bills)
+    """
+    shares = allocate_units(Unit.objects.filter(building_id=charge.building_id), charge.amount, charge.divide_by)
+    expire_date = _expire_date(charge, period)
+    created = 0
+    for i in range(0, len(shares), chunk_size):
+        chunk = shares[i:i + chunk_size]
+        with transaction.atomic():
+            # concurrent runs of the charge take turns on its row, so the bills missing now are the ones this run
+            # inserts. the unique (charge, unit, period) constraint still skips anything billed in between
+            RecurringCharge.objects.select_for_update().filter(pk=charge.pk).first()
+            unit_ids = [unit_id for unit_id, _ in chunk]
+            billed = set(Bill.objects.filter(
+                charge=charge, period=period, unit_id__in=unit_ids).values_list("unit_id", flat=True))
+            Bill.objects.bulk_create([
+                Bill(unit_id=unit_id, building_id=charge.building_id, amount=share, charge=charge, period=period,
+                     created_by_id=charge.created_by_id, expire_date=expire_date, description=charge.description)
+                for unit_id, share in chunk if unit_id not in billed
+            ], ignore_conflicts=True)
+            # ignore_conflicts leaves the ids unset, the ledger needs them
+            bills = list(Bill.objects.filter(charge=charge, period=period, unit_id__in=unit_ids).exclude(
+                unit_id__in=billed))
+            post_charges(bills)
+            created += len(bills)
+    if charge.last_period is None or charge.last_period < period:
+        charge.last_period = period
+        charge.save(update_fields=["last_period"])
+    home.touch_building(charge.building_id)
+    return len(shares), created
+
+
+PAID = "paid"
+ALREADY_PAID = "already_paid"
+NOT_FOUND = "not_found"
+
+
+def settle_bills(manager, bill_ids: List[int] = None, **filters) -> Tuple[uuid.UUID, List[Bill], dict]:
+    """
+    mark the unpaid bills of the manager buildings paid with one conditional UPDATE, either the given ids or the
+    ones matching filters (unit, period, building). a bill is only paid by the settlement whose UPDATE found it
+    unpaid, however many run at once. returns (settlement, settled bills, id -> outcome for the given ids)
+    """
+    bills = Bill.objects.filter(building__owner=manager)
+    if bill_ids is not None:
+        bills = bills.filter(pk__in=bill_ids)
+    if building := filters.get("building"):
+        bills = bills.filter(building=building)
+    if unit := filters.get("unit"):
+        bills = bills.filter(unit=unit)
+    if period := filters.get("period"):
+        bills = bills.filter(period=get_period(period))
+    settlement = uuid.uuid4()
+    with transaction.atomic():
+        # the join to the manager buildings goes in a subquery, UPDATE can't join
+        Bill.objects.filter(pk__in=bills.values("pk"), is_paid=False).update(is_paid=True, settlement=settlement)
+        settled = list(Bill.objects.filter(settlement=settlement))
+        post_payments(settled, created_by=manager)
+        found = set(bills.values_list("pk", flat=True)) if bill_ids is not None else set()
+    for building_id in {bill.building_id for bill in settled if bill.building_id}:
+        # update doesn't send post_save
+        home.touch_building(building_id)
+    outcomes = dict()
+    if bill_ids is not None:
+        paid_ids = {bill.pk for bill in settled}
+        outcomes = {bill_id: PAID if bill_id in paid_ids else ALREADY_PAID if bill_id in found else NOT_FOUND
+                    for bill_id in bill_ids}
+    return settlement, settled, outcomes
+
+
+# overdue amounts are also reported by how many days they are late: 0-30, 30-60, 60-90 and 90+
+AGING_DAYS = (30, 60, 90)
+
+
+def _overdue_aggregates(now) -> dict:
+    aggregates = {"count": Count("pk"), "total": Sum("amount"), "oldest_expire_date": Min("expire_date")}
+    bounds = (0, *AGING_DAYS, None)
+    for low, high in zip(bounds, bounds[1:]):
+        late = Q(expire_date__lte=now - timezone.timedelta(days=low))
+        if high is not None:
+            late &= Q(expire_date__gt=now - timezone.timedelta(days=high))
+        aggregates[f"days_{low}_{high}" if high else f"days_{low}_plus"] = Sum("amount", filter=late)
+    return aggregates
+
+
+def _empty_summary(now) -> dict:
+    return {key: None if key == "oldest_expire_date" else 0 for key in _overdue_aggregates(now)}
+
+
+def _clean(summary: dict) -> dict:
+    return {key: value if value is not None or key == "oldest_expire_date" else 0 for key, value in summary.items()}
+
+
+def overdue_summary(bills: QuerySet, now=None) -> dict:
+    """
+    number, amount, oldest expire date and aging of the overdue bills of bills in one aggregate query
+    """
+    now = now or timezone.now()
+    return _clean(bills.overdue(now).aggregate(**_overdue_aggregates(now)))
+
+
+def overdue_by_building(building_ids: List[int], now=None) -> dict:
+    """
+    overdue summary of every building in one grouped query
+    """
+    now = now or timezone.now()
+    rows = Bill.objects.overdue(now).filter(building__in=building_ids).values("building").annotate(
+        **_overdue_aggregates(now)).order_by()
+    summaries = {building_id: _empty_summary(now) for building_id in building_ids}
+    for row in rows:
+        summaries[row.pop("building")] = _clean(row)
+    return summaries
@@ -3,13 +3,21 @@ from rest_framework import status
 
 from functools import wraps
 
+from .pagination import paginate
 
-def response(status_code, instance=None, detail=None, errors=None, serializer=None, many=False, **kwargs):
+
+def response(status_code, instance=None, detail=None, errors=None, serializer=None, many=False,
+             request=None, ordering=("pk",), **kwargs):
     """
-    generate Response objects for API response
+    generate Response objects for API response.
+    if request is passed with a many=True queryset, a cursor page of it ordered by ordering is returned
     """
     response_body = dict()
-    if instance:
+    if many and request is not None and instance is not None:
+        instance, page = paginate(instance, request, ordering)
+        response_body.update(page)
+        response_body["instances"] = serializer(instance, many=many).data
+    elif instance:
         if not serializer:
             raise Exception("serializer for instance not provided")
         serialized_instance = serializer(instance, many=many)
@@ -0,0 +1,132 @@
+"""
+the resident home screen and its ETag. the ETag is made of cache version counters of the user, their unit and their
+building that are bumped whenever something shown on the home screen changes, so an unchanged home screen is answered
+from the cache without querying the database. bills getting overdue and announcements expiring change it without a
+write, so the ETag also holds the next of those expiries and moves on once it passed
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from announcements.models import Announcement
+from buildings.models import Unit
+from financials.models import Bill
+
+from .announcements import unread_count
+from .tickets import inbox
+
+HOME_ITEMS = 5
+# versions don't need to outlive the clients that hold the ETag for long
+VERSION_TIMEOUT = 7 * 24 * 3600
+
+USER = "home:user:{}"
+UNIT = "home:unit:{}"
+BUILDING = "home:building:{}"
+RESIDENCE = "home:residence:{}"
+EXPIRY = "home:expiry:{}:{}"
+
+
+def _incr(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # not cached, the next get_etag starts it at a fresh value
+        pass
+
+
+def _touch(key: str):
+    # after commit, or a request could pair the new version with the old data
+    transaction.on_commit(lambda: _incr(key))
+
+
+def touch_user(user_id: int):
+    if user_id:
+        _touch(USER.format(user_id))
+
+
+def touch_unit(unit_id: int):
+    if unit_id:
+        _touch(UNIT.format(unit_id))
+
+
+def touch_building(building_id: int):
+    if building_id:
+        _touch(BUILDING.format(building_id))
+
+
+def forget_residence(user_id: int):
+    if user_id:
+        transaction.on_commit(lambda: cache.delete(RESIDENCE.format(user_id)))
+        touch_user(user_id)
+
+
+def _versions(keys: list) -> dict:
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # a new start value, so a version lost from the cache never repeats an old ETag
+        start = time.time_ns()
+        for key in missing:
+            cache.add(key, start, timeout=VERSION_TIMEOUT)
+        versions = cache.get_many(keys)
+    return versions
+
+
+def _next_expiry(unit_id: int, building_id: int, versions: list):
+    """
+    the next time an unpaid bill of the unit gets overdue or an announcement of the building expires, in one query.
+    cached for the unit and building versions it was read with, a new bill or announcement bumps them
+    """
+    key = EXPIRY.format(unit_id, building_id)
+    now = timezone.now()
+    cached = cache.get(key)
+    if cached is not None and cached[0] == versions and (cached[1] is None or cached[1] > now):
+        return cached[1]
+    # a bill is overdue only after its expire date, an announcement is gone at its expire date
+    bills = Bill.objects.filter(unit=unit_id, is_paid=False, expire_date__gte=now).values("expire_date")
+    announcements = Announcement.objects.filter(building=building_id, expire_date__gt=now).values("expire_date")
+    expiry = bills.union(announcements).order_by("expire_date").values_list("expire_date", flat=True).first()
+    cache.set(key, (versions, expiry), timeout=VERSION_TIMEOUT)
+    return expiry
+
+
+def get_etag(user) -> str:
+    """
+    only reads the cache, unless the unit of the user isn't cached yet or one of the shown expiries passed
+    """
+    residence = cache.get(RESIDENCE.format(user.pk))
+    if residence is None:
+        unit = Unit.objects.filter(resident=user).values_list("pk", "building").first() or (0, 0)
+        residence = list(unit)
+        cache.set(RESIDENCE.format(user.pk), residence, timeout=VERSION_TIMEOUT)
+    unit_id, building_id = residence
+    keys = [USER.format(user.pk), UNIT.format(unit_id), BUILDING.format(building_id)]
+    versions = _versions(keys)
+    expiry = _next_expiry(unit_id, building_id, [versions.get(key) for key in keys[1:]]) if unit_id else None
+    parts = [user.pk, unit_id, *(versions.get(key) for key in keys), int(expiry.timestamp() * 10 ** 6) if expiry else 0]
+    return '"{}"'.format("-".join(str(part) for part in parts))
+
+
+def get_home(user) -> dict:
+    """
+    unit, unpaid bills, unread tickets and unread announcements of the resident in five queries
+    """
+    unit = Unit.objects.select_related("building").filter(resident=user).first()
+    if unit:
+        unit.resident = user
+    now = timezone.now()
+    bills = list(Bill.objects.filter(unit=unit, is_paid=False).order_by("expire_date")) if unit else []
+    overdue = [bill for bill in bills if bill.expire_date < now]
+    tickets = list(inbox(user, unread_only=True).order_by("-pk")[:HOME_ITEMS])
+    return {
+        "unit": unit,
+        "bills": bills,
+        "outstanding": sum(bill.amount for bill in bills),
+        "overdue": sum(bill.amount for bill in overdue),
+        "overdue_count": len(overdue),
+        "tickets": tickets,
+        "unread_tickets": tickets[0].unread_count if tickets else 0,
+        "unread_announcements": unread_count(user, unit.building) if unit else 0,
+    }
@@ -0,0 +1,111 @@
+"""
+Idempotency-Key support for the views creating things. the first request with a key runs the view and stores its
+response, retries with the same key get the stored response back without running the view again. the body is
+stored compressed, a split over a whole building responds with thousands of bills
+"""
+import hashlib
+import json
+import zlib
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from idempotency.models import IdempotencyKey
+
+from .general import response
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint(request) -> str:
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def _claim(user, key: str, fingerprint: str):
+    """
+    (record, created). the unique (user, key) constraint lets one request in, a concurrent duplicate waits for its
+    transaction and then finds the stored response
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user, key=key, fingerprint=fingerprint,
+                expires_at=now + timezone.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)), True
+    except IntegrityError:
+        pass
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is None or record.expires_at <= now:
+        # expired but not purged yet, or purged in between
+        IdempotencyKey.objects.filter(user=user, key=key, expires_at__lte=now).delete()
+        return _claim(user, key, fingerprint)
+    return record, False
+
+
+def _store(record: IdempotencyKey, result: Response):
+    # stored as the client received it, decimals and dates included
+    record.status_code = result.status_code
+    record.body = zlib.compress(JSONRenderer().render(result.data))
+    record.save(update_fields=["status_code", "body"])
+
+
+def _replay(record: IdempotencyKey, fingerprint: str):
+    if record.fingerprint != fingerprint:
+        return response(status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail=f"this {HEADER} was already used for a different request")
+    data = json.loads(zlib.decompress(record.body) or "null")
+    return Response(data=data, status=record.status_code, headers={REPLAYED_HEADER: "true"})
+
+
+def idempotent(method):
+    """
+    make a view method safe to retry with an Idempotency-Key header. the key, the view and the stored response are
+    one transaction, so a failed request releases its key and a stored response always matches committed rows.
+    server errors aren't stored so they can be retried
+    """
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return method(view, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return response(status.HTTP_400_BAD_REQUEST,
+                            detail=f"{HEADER} can be at most {MAX_KEY_LENGTH} characters")
+        fingerprint = _fingerprint(request)
+        with transaction.atomic():
+            record, created = _claim(request.user, key, fingerprint)
+            if not created:
+                return _replay(record, fingerprint)
+            result = method(view, request, *args, **kwargs)
+            if result.status_code >= 500:
+                transaction.set_rollback(True)
+                return result
+            _store(record, result)
+        return result
+
+    return wrapper
+
+
+def purge_expired(batch_size: int = 5000) -> int:
+    """
+    delete the expired keys in batches, returns how many went
+    """
+    purged = 0
+    while True:
+        pks = list(IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).values_list("pk", flat=True)[
+                   :batch_size])
+        if not pks:
+            return purged
+        purged += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,123 @@
+import base64
+import binascii
+import datetime
+import json
+from typing import Sequence, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+
+from .exceptions import BadRequest
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+CURSOR_PARAM = "cursor"
+LIMIT_PARAM = "limit"
+TOTAL_PARAM = "total"
+
+
+def _get_field(model, path: str):
+    field = None
+    for name in path.split("__"):
+        if name == "pk":
+            field = model._meta.pk
+        else:
+            field = model._meta.get_field(name)
+        if field.is_relation:
+            model = field.related_model
+    return field
+
+
+def _get_value(instance, path: str):
+    for name in path.split("__"):
+        if instance is None:
+            return None
+        instance = getattr(instance, name)
+    if hasattr(instance, "pk"):
+        return instance.pk
+    return instance
+
+
+def _normalize_ordering(queryset: QuerySet, ordering: Sequence[str]) -> Tuple[str, ...]:
+    """
+    keyset pagination needs a total order, the primary key is appended as the tie breaker
+    """
+    ordering = tuple(ordering)
+    if not ordering or ordering[-1].lstrip("-") not in ("pk", queryset.model._meta.pk.name):
+        direction = "-" if ordering and ordering[-1].startswith("-") else ""
+        ordering += (f"{direction}pk",)
+    return ordering
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder drops the microseconds, the cursor must compare equal to the stored value
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, cls=_CursorEncoder).encode()).decode()
+
+
+def decode_cursor(queryset: QuerySet, ordering: Tuple[str, ...], cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError
+        return [
+            _get_field(queryset.model, key.lstrip("-")).to_python(value)
+            for key, value in zip(ordering, values)
+        ]
+    except (ValueError, TypeError, binascii.Error, ValidationError, FieldDoesNotExist):
+        raise BadRequest(detail="invalid cursor")
+
+
+def _after(ordering: Tuple[str, ...], values: list) -> Q:
+    """
+    rows that come after values in ordering: (a > x) or (a = x and b > y) or ...
+    it only compares against the indexed ordering columns so every page costs the same as the first one
+    """
+    condition = Q()
+    equal = Q()
+    for key, value in zip(ordering, values):
+        field = key.lstrip("-")
+        lookup = "lt" if key.startswith("-") else "gt"
+        condition |= equal & Q(**{f"{field}__{lookup}": value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def _get_limit(request) -> int:
+    try:
+        limit = int(request.query_params.get(LIMIT_PARAM, DEFAULT_LIMIT))
+    except ValueError:
+        raise BadRequest(detail=f"{LIMIT_PARAM} must be an integer")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def paginate(queryset: QuerySet, request, ordering: Sequence[str] = ("pk",)) -> Tuple[list, dict]:
+    """
+    cursor (keyset) pagination over the given ordering columns. the total count is only
+    calculated if the client asks for it with ?total=true since it scans the whole filtered table
+    """
+    ordering = _normalize_ordering(queryset, ordering)
+    limit = _get_limit(request)
+    meta = dict()
+    if request.query_params.get(TOTAL_PARAM, "").lower() in ("1", "true"):
+        meta["total"] = queryset.count()
+
+    page_queryset = queryset.order_by(*ordering)
+    if cursor := request.query_params.get(CURSOR_PARAM):
+        page_queryset = page_queryset.filter(_after(ordering, decode_cursor(queryset, ordering, cursor)))
+    items = list(page_queryset[:limit + 1])
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([_get_value(items[-1], key.lstrip("-")) for key in ordering])
+    meta["next_cursor"] = next_cursor
+    return items, meta
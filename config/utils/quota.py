@@ -0,0 +1,104 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework.exceptions import Throttled
+
+from announcements.models import Announcement
+from tickets.models import Ticket
+
+ANNOUNCEMENTS = "announcements"
+TICKETS = "tickets"
+
+
+def _posted_tickets(user, start, end):
+    return Ticket.objects.filter(from_user=user, date_created__gte=start, date_created__lt=end).count()
+
+
+# counts the posts of a user between two datetimes, used when the cache doesn't have the counters
+DB_FALLBACKS = {
+    ANNOUNCEMENTS: Announcement.objects.posted_between,
+    TICKETS: _posted_tickets,
+}
+
+
+def _key(scope: str, user_id: int, bucket: int) -> str:
+    return f"quota:{scope}:{user_id}:{bucket}"
+
+
+def _datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+def _get_counters(scope: str, user, bucket: int, window: int) -> tuple:
+    current_key, previous_key = _key(scope, user.pk, bucket), _key(scope, user.pk, bucket - 1)
+    counters = cache.get_many([current_key, previous_key])
+    if not counters:
+        # cold cache, seed both buckets from the database once
+        count = DB_FALLBACKS[scope]
+        counters = {
+            current_key: count(user, _datetime(bucket * window), _datetime((bucket + 1) * window)),
+            previous_key: count(user, _datetime((bucket - 1) * window), _datetime(bucket * window)),
+        }
+        for key, value in counters.items():
+            cache.add(key, value, timeout=2 * window)
+        counters = cache.get_many([current_key, previous_key]) or counters
+    return counters.get(current_key, 0), counters.get(previous_key, 0)
+
+
+def consume(scope: str, user, now: float = None) -> str:
+    """
+    take one post from the user quota or raise Throttled, returns the key of the counter it was taken from.
+    the sliding window is approximated by weighting the previous fixed window by how much of it still overlaps
+    """
+    quota = settings.QUOTAS[scope]
+    limit, window = quota["limit"], quota["window"]
+    now = time.time() if now is None else now
+    bucket = int(now // window)
+    overlap = 1 - (now % window) / window
+
+    _, previous = _get_counters(scope, user, bucket, window)
+    current_key = _key(scope, user.pk, bucket)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # evicted between the read and the increment
+        cache.add(current_key, 0, timeout=2 * window)
+        current = cache.incr(current_key)
+
+    if previous * overlap + current > limit:
+        cache.decr(current_key)
+        if current > limit:
+            wait = overlap * window
+        else:
+            # until the weight of the previous window drops enough
+            wait = (overlap - (limit - current) / previous) * window
+        raise Throttled(wait=wait, detail=f"you can post at most {limit} {scope} in {window} seconds")
+    return current_key
+
+
+def release(key: str):
+    """
+    give back a post taken by consume
+    """
+    try:
+        cache.decr(key)
+    except ValueError:
+        # expired or evicted, nothing left to give back
+        pass
+
+
+@contextmanager
+def reserve(scope: str, user):
+    """
+    take one post from the user quota for the post created in the block, given back if the block raises
+    """
+    key = consume(scope, user)
+    try:
+        yield
+    except BaseException:
+        release(key)
+        raise
@@ -0,0 +1,152 @@
+"""
+monthly billed and collected totals per building. the ledger moves them along in the transaction of every charge,
+payment and cancelled bill, rebuild_bill_rollups recomputes them from the bills
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, List, Tuple
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from financials.models import Bill, MonthlyBillRollup
+
+from .exceptions import BadRequest
+
+TOTALS = ("billed", "billed_count", "collected", "collected_count")
+# the revenue report covers three years by default and ten at most
+DEFAULT_MONTHS = 36
+MAX_MONTHS = 120
+
+
+def _add_months(month: date, months: int) -> date:
+    month_index = month.year * 12 + month.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def bill_month(bill: Bill) -> date:
+    return bill.period or timezone.localtime(bill.date_created).date().replace(day=1)
+
+
+def _apply(deltas: dict):
+    """
+    add the deltas of every (building, month) to its rollup row with one UPDATE per row, so concurrent writers
+    never overwrite each other. rows are locked in (building, month) order so two writers can't deadlock
+    """
+    deltas = sorted((key, delta) for key, delta in deltas.items() if any(delta))
+    if not deltas:
+        return
+    MonthlyBillRollup.objects.bulk_create(
+        [MonthlyBillRollup(building_id=building_id, month=month) for (building_id, month), _ in deltas],
+        ignore_conflicts=True)
+    for (building_id, month), delta in deltas:
+        MonthlyBillRollup.objects.filter(building_id=building_id, month=month).update(
+            updated_at=timezone.now(), **{name: F(name) + value for name, value in zip(TOTALS, delta) if value})
+
+
+def _deltas(bills: Iterable[Bill], billed: int = 0, collected: int = 0) -> dict:
+    deltas = defaultdict(lambda: [Decimal(0), 0, Decimal(0), 0])
+    for bill in bills:
+        if bill.building_id is None:
+            continue
+        delta = deltas[bill.building_id, bill_month(bill)]
+        delta[0] += billed * bill.amount
+        delta[1] += billed
+        delta[2] += collected * bill.amount
+        delta[3] += collected
+    return deltas
+
+
+def record_billed(bills: Iterable[Bill]):
+    _apply(_deltas(bills, billed=1))
+
+
+def record_collected(bills: Iterable[Bill]):
+    _apply(_deltas(bills, collected=1))
+
+
+def record_cancelled(bills: Iterable[Bill]):
+    bills = list(bills)
+    _apply(_deltas(bills, billed=-1))
+    _apply(_deltas([bill for bill in bills if bill.is_paid], collected=-1))
+
+
+def actual_rollups(building_ids: List[int]) -> dict:
+    """
+    (building, month) -> totals recomputed from the bills in one grouped query
+    """
+    paid = Q(is_paid=True)
+    rows = Bill.objects.filter(building__in=building_ids).annotate(
+        month=Coalesce("period", TruncMonth("date_created", output_field=DateField()))
+    ).values("building", "month").annotate(
+        billed=Sum("amount"), billed_count=Count("pk"), collected=Sum("amount", filter=paid),
+        collected_count=Count("pk", filter=paid),
+    ).order_by()
+    return {(row["building"], row["month"]): tuple(row[name] or 0 for name in TOTALS) for row in rows}
+
+
+def verify_rollups(building_ids: List[int], fix: bool = False) -> List[Tuple[int, date, tuple, tuple]]:
+    """
+    compare the rollups of the buildings with the bills. returns the drifted (building, month, stored, actual),
+    replaced by the actual totals if asked to
+    """
+    actual = actual_rollups(building_ids)
+    stored = {(row[0], row[1]): tuple(row[2:]) for row in MonthlyBillRollup.objects.filter(
+        building__in=building_ids).values_list("building", "month", *TOTALS)}
+    empty = (0,) * len(TOTALS)
+    drifted = [(building_id, month, stored.get((building_id, month), empty), actual.get((building_id, month), empty))
+               for building_id, month in sorted(set(actual) | set(stored))
+               if stored.get((building_id, month), empty) != actual.get((building_id, month), empty)]
+    if fix and drifted:
+        _fix(building_ids, [(building_id, month) for building_id, month, _, _ in drifted])
+    return drifted
+
+
+def _fix(building_ids: List[int], keys: List[Tuple[int, date]]):
+    """
+    set the drifted rollups to the totals of the bills. the rows are locked in the order _apply locks them before
+    the bills are summed again, so a charge or payment committed meanwhile is counted once, either by the sum or by
+    its own update waiting for the lock. rows are zeroed instead of deleted, a writer waiting on one still finds it
+    """
+    with transaction.atomic():
+        MonthlyBillRollup.objects.bulk_create(
+            [MonthlyBillRollup(building_id=building_id, month=month) for building_id, month in keys],
+            ignore_conflicts=True)
+        query = Q()
+        for building_id, month in keys:
+            query |= Q(building_id=building_id, month=month)
+        rows = list(MonthlyBillRollup.objects.select_for_update().filter(query).order_by("building", "month"))
+        actual = actual_rollups(building_ids)
+        now = timezone.now()
+        for row in rows:
+            for name, value in zip(TOTALS, actual.get((row.building_id, row.month), (0,) * len(TOTALS))):
+                setattr(row, name, value)
+            row.updated_at = now
+        MonthlyBillRollup.objects.bulk_update(rows, [*TOTALS, "updated_at"], batch_size=500)
+
+
+def get_revenue(building_id: int, since: date = None, until: date = None) -> dict:
+    """
+    billed, collected and outstanding of every month from since to until, months without bills included,
+    read with one range scan of the (building, month) index
+    """
+    until = (until or timezone.localdate()).replace(day=1)
+    since = since.replace(day=1) if since else _add_months(until, 1 - DEFAULT_MONTHS)
+    if since > until:
+        raise BadRequest(detail="since must not be after until")
+    if _add_months(since, MAX_MONTHS) <= until:
+        raise BadRequest(detail=f"at most {MAX_MONTHS} months can be reported at once")
+    rows = {row["month"]: row for row in MonthlyBillRollup.objects.filter(
+        building_id=building_id, month__gte=since, month__lte=until).values("month", *TOTALS)}
+    months = []
+    month = since
+    while month <= until:
+        row = rows.get(month) or dict(month=month, **{name: 0 for name in TOTALS})
+        row["outstanding"] = row["billed"] - row["collected"]
+        months.append(row)
+        month = _add_months(month, 1)
+    totals = {name: sum(row[name] for row in months) for name in (*TOTALS, "outstanding")}
+    return {"months": months, "totals": totals}
@@ -0,0 +1,154 @@
+from typing import Iterable, List
+
+from django.db import connection
+from django.db.models import Q
+
+from advertisements.models import Advertisement
+from announcements.models import Announcement
+from buildings.models import Building
+from tickets.models import Ticket
+
+AD = "ad"
+ANNOUNCEMENT = "announcement"
+TICKET = "ticket"
+
+# every kind gets its own residue class of rowid so an object can be replaced by its rowid alone
+KIND_CODES = {AD: 1, ANNOUNCEMENT: 2, TICKET: 3}
+MODELS = {AD: Advertisement, ANNOUNCEMENT: Announcement, TICKET: Ticket}
+
+TABLE = "search_index"
+# bm25 weight of the title and body columns
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+
+def is_supported() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def _rowid(kind: str, object_id: int) -> int:
+    return object_id * 4 + KIND_CODES[kind]
+
+
+def _ad_row(ad: Advertisement) -> tuple:
+    spec = ad.unit_specification
+    return (_rowid(AD, ad.pk), ad.get_what_for_display(), " ".join(filter(None, [spec.description, spec.features])),
+            AD, ad.pk, None, None, None)
+
+
+def _announcement_row(announcement: Announcement) -> tuple:
+    return (_rowid(ANNOUNCEMENT, announcement.pk), announcement.title, announcement.description,
+            ANNOUNCEMENT, announcement.pk, announcement.building_id, None, None)
+
+
+def _ticket_row(ticket: Ticket) -> tuple:
+    return (_rowid(TICKET, ticket.pk), ticket.title, ticket.message,
+            TICKET, ticket.pk, ticket.building_id, ticket.from_user_id, ticket.to_user_id)
+
+
+ROW_BUILDERS = {AD: _ad_row, ANNOUNCEMENT: _announcement_row, TICKET: _ticket_row}
+
+
+def index_objects(kind: str, objects: Iterable):
+    if not is_supported():
+        return
+    rows = [ROW_BUILDERS[kind](obj) for obj in objects]
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(f"INSERT INTO {TABLE} (rowid, title, body, kind, object_id, building_id, "
+                           f"from_user_id, to_user_id) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)", rows)
+
+
+def remove_objects(kind: str, object_ids: Iterable[int]):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s",
+                           [(_rowid(kind, object_id),) for object_id in object_ids])
+
+
+def rebuild_index(chunk_size: int = 2000) -> dict:
+    """
+    drop every indexed row and index all ads, announcements and tickets again
+    """
+    if not is_supported():
+        return dict()
+    querysets = {
+        AD: Advertisement.objects.select_related("unit_specification"),
+        ANNOUNCEMENT: Announcement.objects.all(),
+        TICKET: Ticket.objects.all(),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+    counts = dict()
+    for kind, queryset in querysets.items():
+        chunk = []
+        counts[kind] = 0
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) == chunk_size:
+                index_objects(kind, chunk)
+                counts[kind] += len(chunk)
+                chunk = []
+        index_objects(kind, chunk)
+        counts[kind] += len(chunk)
+    return counts
+
+
+def _match_query(text: str) -> str:
+    """
+    quote every term so user input can't break the fts5 query syntax. the last term is matched as a prefix
+    """
+    terms = ['"{}"'.format(term.replace('"', '""')) for term in text.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(user, text: str, kinds: List[str], limit: int, offset: int = 0) -> List[dict]:
+    """
+    ranked (bm25) matches the user is allowed to see: every ad, announcements of the user buildings
+    and tickets the user sent, received or that belong to the user buildings
+    """
+    match = _match_query(text)
+    if not match or not kinds:
+        return []
+    building_ids = list(
+        Building.objects.filter(Q(owner=user) | Q(units__resident=user)).values_list("pk", flat=True).distinct())
+    owned_building_ids = list(Building.objects.filter(owner=user).values_list("pk", flat=True))
+
+    scopes, params = [], []
+    if AD in kinds:
+        scopes.append("kind = %s")
+        params.append(AD)
+    if ANNOUNCEMENT in kinds and building_ids:
+        scopes.append(f"(kind = %s AND building_id IN ({', '.join(['%s'] * len(building_ids))}))")
+        params += [ANNOUNCEMENT, *building_ids]
+    if TICKET in kinds:
+        owned = f" OR building_id IN ({', '.join(['%s'] * len(owned_building_ids))})" if owned_building_ids else ""
+        scopes.append(f"(kind = %s AND (from_user_id = %s OR to_user_id = %s{owned}))")
+        params += [TICKET, user.pk, user.pk, *owned_building_ids]
+    if not scopes:
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT kind, object_id, bm25({TABLE}, %s, %s) AS rank FROM {TABLE} "
+            f"WHERE {TABLE} MATCH %s AND ({' OR '.join(scopes)}) ORDER BY rank LIMIT %s OFFSET %s",
+            [TITLE_WEIGHT, BODY_WEIGHT, match, *params, limit, offset],
+        )
+        matches = cursor.fetchall()
+
+    ids_by_kind = dict()
+    for kind, object_id, _ in matches:
+        ids_by_kind.setdefault(kind, []).append(object_id)
+    objects = dict()
+    for kind, ids in ids_by_kind.items():
+        queryset = MODELS[kind].objects.filter(pk__in=ids)
+        if kind == AD:
+            queryset = queryset.select_related("unit_specification")
+        objects.update({(kind, obj.pk): obj for obj in queryset})
+    return [
+        {"kind": kind, "rank": rank, "instance": objects[(kind, object_id)]}
+        for kind, object_id, rank in matches if (kind, object_id) in objects
+    ]
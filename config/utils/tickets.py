@@ -0,0 +1,129 @@
+import bisect
+from typing import List, Tuple
+
+from django.db import transaction
+from django.db.models import Count, QuerySet, Subquery
+from django.utils import timezone
+
+from tickets.models import Ticket, TicketSLA
+
+from . import home
+from .pagination import paginate
+
+
+def unread_count(user) -> int:
+    return Ticket.objects.filter(to_user=user, seen=False).count()
+
+
+def inbox(user, unread_only: bool = False) -> QuerySet:
+    """
+    tickets sent to the user. every row carries the unread count of the whole inbox as a scalar subquery,
+    both are answered from the (to_user, seen, id) index
+    """
+    unread = Ticket.objects.filter(to_user=user, seen=False).order_by().values("to_user").annotate(
+        count=Count("pk")).values("count")
+    tickets = Ticket.objects.filter(to_user=user)
+    if unread_only:
+        tickets = tickets.filter(seen=False)
+    return tickets.annotate(unread_count=Subquery(unread))
+
+
+def get_inbox_page(user, request, unread_only: bool = False) -> Tuple[List[Ticket], dict, int]:
+    """
+    a cursor page of the inbox, newest first, with the unread count read from the same query
+    """
+    tickets, page = paginate(inbox(user, unread_only), request, ("-pk",))
+    if tickets:
+        unread = tickets[0].unread_count or 0
+    else:
+        # past the last page there is no row to carry the count
+        unread = unread_count(user)
+    return tickets, page, unread
+
+
+def mark_seen(user, ids: List[int] = None) -> int:
+    """
+    mark the given tickets of the user inbox, or all of them, as seen in one UPDATE. returns how many changed
+    """
+    tickets = Ticket.objects.filter(to_user=user, seen=False)
+    if ids is not None:
+        tickets = tickets.filter(pk__in=ids)
+    marked = tickets.update(seen=True)
+    if marked:
+        home.touch_user(user.pk)
+    return marked
+
+
+QUEUE_ORDERING = ("-priority", "date_created", "pk")
+
+
+def manager_queue(user, building_id: int = None) -> QuerySet:
+    """
+    open tickets sent to the manager from all of the manager buildings, most urgent and oldest first.
+    matches the partial queue index so the page is read in index order
+    """
+    tickets = Ticket.objects.filter(to_user=user, closed_at__isnull=True)
+    if building_id is not None:
+        tickets = tickets.filter(building_id=building_id)
+    return tickets
+
+
+def _record_response(building_id: int, seconds: int):
+    sla, _ = TicketSLA.objects.select_for_update().get_or_create(building_id=building_id)
+    histogram = sla.histogram or [0] * (len(TicketSLA.RESPONSE_BUCKETS) + 1)
+    histogram[bisect.bisect_left(TicketSLA.RESPONSE_BUCKETS, seconds / 60)] += 1
+    sla.histogram = histogram
+    sla.responded += 1
+    sla.total_response_seconds += seconds
+    sla.save(update_fields=["histogram", "responded", "total_response_seconds"])
+
+
+def set_status(ticket: Ticket, status: str, priority: int = None, now=None) -> Ticket:
+    """
+    move the ticket to status. the first move out of OPEN is the first response and is added to the SLA
+    histogram of the building in the same transaction
+    """
+    now = now or timezone.now()
+    fields = ["status", "closed_at"]
+    with transaction.atomic():
+        # conditional update so concurrent first responses only count once
+        if status != Ticket.OPEN and Ticket.objects.filter(
+                pk=ticket.pk, first_response_at__isnull=True).update(first_response_at=now):
+            ticket.first_response_at = now
+            _record_response(ticket.building_id, max(0, int((now - ticket.date_created).total_seconds())))
+        ticket.status = status
+        if status == Ticket.CLOSED:
+            ticket.closed_at = ticket.closed_at or now
+        else:
+            ticket.closed_at = None
+        if priority is not None:
+            ticket.priority = priority
+            fields.append("priority")
+        ticket.save(update_fields=fields)
+    return ticket
+
+
+def percentile(sla: TicketSLA, q: float):
+    """
+    upper bound in minutes of the histogram bucket holding the q quantile. None if nothing was responded yet or
+    if it falls in the last, unbounded bucket
+    """
+    if not sla.responded:
+        return None
+    rank = q * sla.responded
+    seen = 0
+    for bound, count in zip(TicketSLA.RESPONSE_BUCKETS, sla.histogram):
+        seen += count
+        if seen >= rank:
+            return bound
+    return None
+
+
+def get_sla(building_id: int) -> dict:
+    sla = TicketSLA.objects.filter(building_id=building_id).first() or TicketSLA(building_id=building_id)
+    return {
+        "responded": sla.responded,
+        "average_minutes": round(sla.total_response_seconds / sla.responded / 60, 2) if sla.responded else None,
+        "median_minutes": percentile(sla, 0.5),
+        "p90_minutes": percentile(sla, 0.9),
+    }